@@ -1,24 +1,120 @@
-from config import Config, GLMConfig, OpenAIConfig
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from config import Config
+from ai_translator.llm.cached_model import CachedModel
 from ai_translator.llm.glm_model import GLMModel
-from ai_translator.llm.openai_model import OpenAIModel
+from ai_translator.llm.hedged_model import HedgedModel
+from ai_translator.llm.llm_base import LLMBase
+from ai_translator.llm.translation_cache import TranslationCache
+from ai_translator.translator.boilerplate import BoilerplateDetector
+from ai_translator.translator.book_queue import BookJob, BookQueue
+from ai_translator.translator.model_router import ModelRouter
+from ai_translator.translator.parse_cache import ParseCache
+from ai_translator.translator.pdf_parser import PDFParser
 from ai_translator.translator.pdf_translator import PDFTranslator
+from ai_translator.translator.segmenter import Segmenter
+from ai_translator.translator.translation_memory import TranslationMemory
 from ai_translator.utils.argument_parser import ArgumentParser
+from ai_translator.utils.metrics import metrics
 from logger import init_logger
 
 
 if __name__ == "__main__":
     init_logger("ai_translator.log", rotation="02:00")
     config: Config = Config()
-    if config.llm_type == "OpenAIModel":
-        openai_config: OpenAIConfig = config.openai
-        model: OpenAIModel = OpenAIModel(openai_config.model, openai_config.api_key, str(openai_config.base_url))
-    elif config.llm_type == "GLMModel":
-        glm_config: GLMConfig = config.glm
-        model: GLMModel = GLMModel(glm_config.base_url, glm_config.time_out)
-    else:
-        raise ValueError(f"未知模型类型: {config.llm_type}")
-    translator: PDFTranslator = PDFTranslator(model)
 
     argument_parser = ArgumentParser()
     args = argument_parser.parse_arguments()
-    translator.translate_pdf(pdf_file_path=args.book, output_file_path=args.output, target_language=args.target_lang)
+    if args.metrics_port:
+        metrics.serve_prometheus(args.metrics_port)
+
+    model: LLMBase = GLMModel.from_config(config, args.workers)
+    hedged_model: Optional[HedgedModel] = None
+    if args.hedge:
+        hedged_model = HedgedModel.from_config(model, config, args.workers)
+        model = hedged_model
+    cache: Optional[TranslationCache] = None
+    parse_cache: Optional[ParseCache] = None
+    if not args.no_cache:
+        cache = TranslationCache.from_config(config)
+        model = CachedModel(model, cache)
+        parse_cache = ParseCache.from_config(config, PDFParser.VERSION)
+    memory: Optional[TranslationMemory] = None if args.no_memory else TranslationMemory.from_config(config)
+
+    translator: PDFTranslator = PDFTranslator(
+        model,
+        max_workers=args.workers,
+        pack_token_budget=args.pack_tokens,
+        parse_workers=args.parse_workers,
+        parse_cache=parse_cache,
+        segmenter=Segmenter(args.segment_tokens) if args.segment_tokens else None,
+        boilerplate=None if args.no_boilerplate else BoilerplateDetector(),
+        memory=memory,
+        spill_pages=args.spill_pages,
+        router=ModelRouter.from_config(config),
+    )
+    if args.book_dir or args.manifest:
+        jobs: list[BookJob]
+        if args.manifest:
+            jobs = BookQueue.load_manifest(args.manifest, args.output, args.source_lang, args.target_lang)
+        else:
+            jobs = BookQueue.scan_directory(args.book_dir, args.output, args.source_lang, args.target_lang)
+        BookQueue(translator, args.max_books).run(jobs, args.model, args.resume)
+        if args.metrics_report:
+            # 每本书籍单独输出统计报告，汇总报告见下方
+            for job in jobs:
+                job.metrics.export_json(job.output_path.with_name(f"{job.output_path.name}.metrics.json"))
+    elif args.batch_export:
+        translator.export_batch(
+            pdf_file_path=args.book,
+            requests_file_path=args.batch_export,
+            source_language=args.source_lang,
+            target_language=args.target_lang,
+            model_name=args.model,
+        )
+    elif args.batch_results:
+        translator.translate_pdf_from_batch(
+            pdf_file_path=args.book,
+            results_file_path=args.batch_results,
+            source_language=args.source_lang,
+            target_language=args.target_lang,
+            output_file_path=args.output,
+            model_name=args.model,
+            resume=args.resume,
+        )
+    elif args.streaming:
+        translator.translate_pdf_streaming(
+            pdf_file_path=args.book,
+            source_language=args.source_lang,
+            target_language=args.target_lang,
+            output_file_path=args.output,
+            model_name=args.model,
+            window=args.window,
+            resume=args.resume,
+        )
+    else:
+        translator.translate_pdf(
+            pdf_file_path=args.book,
+            source_language=args.source_lang,
+            target_language=args.target_lang,
+            output_file_path=args.output,
+            model_name=args.model,
+            resume=args.resume,
+            revise_from=args.revise_from,
+        )
+    if cache is not None:
+        logger.info(f"翻译缓存统计: {cache.stats}")
+    if args.model == ModelRouter.AUTO:
+        logger.info(f"自动路由统计: {translator.engine.router.report()}")
+    if memory is not None:
+        memory.close()
+    if hedged_model is not None:
+        hedged_model.close()
+    if args.metrics_report:
+        metrics_report_path: Path = Path(args.metrics_report)
+        metrics.export_json(metrics_report_path)
+        metrics.export_prometheus(metrics_report_path.with_suffix(".prom"))
+        logger.info(f"统计报告: {metrics_report_path}")
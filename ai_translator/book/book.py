@@ -1,21 +1,31 @@
 from pathlib import Path
+from typing import Any, Optional, Union
 
 from ai_translator.book.page import Page
+from ai_translator.book.page_store import PageStore
 
 
 class Book:
     """书籍信息。"""
 
-    def __init__(self, pdf_file_path: Path):
+    __slots__ = ("pdf_file_path", "pages")
+
+    def __init__(self, pdf_file_path: Path, page_store: Optional[PageStore] = None):
         """初始化书籍。
 
         Args:
             pdf_file_path: Pdf文件路径。
+            page_store: 页面存储，提供时页面暂存到磁盘，内存中只保留正在处理的页面。
         """
         if not pdf_file_path.exists():
             raise FileNotFoundError(f"PDF文件不存在: {pdf_file_path}")
         self.pdf_file_path: Path = pdf_file_path
-        self.pages: list[Page] = []
+        self.pages: Union[list[Page], PageStore] = [] if page_store is None else page_store
+
+    @property
+    def spilled(self) -> bool:
+        """页面是否保存在磁盘上。"""
+        return isinstance(self.pages, PageStore)
 
     def add_page(self, page: Page) -> None:
         """添加分页内容。
@@ -24,3 +34,36 @@ class Book:
             page: 单页数据。
         """
         self.pages.append(page)
+
+    def update_page(self, page_idx: int, page: Page) -> None:
+        """写回修改后的页面。页面保存在内存中时修改已经生效，保存在磁盘上时需要调用此方法。
+
+        Args:
+            page_idx: 页面索引。
+            page: 单页数据。
+        """
+        if isinstance(self.pages, PageStore):
+            self.pages.put(page_idx, page)
+        else:
+            self.pages[page_idx] = page
+
+    def spill(self, page_store: PageStore) -> None:
+        """将内存中的页面转存到磁盘。
+
+        Args:
+            page_store: 空白的页面存储。
+        """
+        if isinstance(self.pages, PageStore):
+            return
+        pages: list[Page] = self.pages
+        self.pages = page_store
+        for page in pages:
+            page_store.append(page)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # 临时文件无法序列化，序列化时读出全部页面
+        return {"pdf_file_path": self.pdf_file_path, "pages": list(self.pages)}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.pdf_file_path = state["pdf_file_path"]
+        self.pages = state["pages"]
@@ -1,12 +1,20 @@
 import json
-from typing import Any, Optional
+import re
+from typing import TYPE_CHECKING, Any, Optional
 
-import pandas as pd
 from enum import Enum, auto
 
 from loguru import logger
-from pandas import DataFrame
-from PIL import Image as PILImage
+
+# pandas和PIL导入耗时较长，只在实际转换表格和处理图片时导入
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# 带英文月份的日期，例如"Jan 2024"、"15 March 2023"、"March 15, 2023"
+_MONTH_DATE_PATTERN: re.Pattern = re.compile(
+    r"^(\d{1,2}\s+)?(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?(\s+\d{1,2})?,?\s+\d{2,4}$",
+    re.IGNORECASE,
+)
 
 
 class ContentType(Enum):
@@ -20,6 +28,9 @@ class ContentType(Enum):
 class Content:
     """内容数据。"""
 
+    # 大型书籍中内容对象数量很多，使用__slots__避免为每个对象分配属性字典
+    __slots__ = ("content_type", "original", "translation", "status", "boilerplate_key")
+
     def __init__(self, content_type: ContentType, original: Any, translation: Optional[str] = None):
         """初始化内容数据。
 
@@ -32,6 +43,7 @@ class Content:
         self.original: Any = original
         self.translation: Any = translation
         self.status: bool = False
+        self.boilerplate_key: Optional[str] = None  # 跨页重复行的归一化文本，相同键的内容只翻译一次
 
     def set_translation(self, translation: str, status: bool) -> None:
         if not self.check_translation_type(translation):
@@ -42,28 +54,143 @@ class Content:
     def __str__(self) -> str:
         return str(self.original)
 
+    def dump_translation(self) -> Optional[str]:
+        """导出可以通过`set_translation`重新写回的译文。
+
+        Returns:
+            返回译文文本，没有文本译文时返回None。
+        """
+        return self.translation if isinstance(self.translation, str) else None
+
     def check_translation_type(self, translation):
         if self.content_type == ContentType.TEXT and isinstance(translation, str):
             return True
         elif self.content_type == ContentType.TABLE and isinstance(translation, str):
             return True
-        elif self.content_type == ContentType.IMAGE and isinstance(translation, PILImage.Image):
-            return True
+        elif self.content_type == ContentType.IMAGE:
+            from PIL import Image as PILImage
+
+            return isinstance(translation, PILImage.Image)
         return False
 
 
+class TableData:
+    """按行存储的轻量表格，只在需要时转换为pandas DataFrame。"""
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns: list[Any], rows: list[list[Any]]) -> None:
+        """初始化表格。
+
+        Args:
+            columns: 表头。
+            rows: 表格数据，每行的长度与表头相同。
+        """
+        for row in rows:
+            if len(row) != len(columns):
+                raise ValueError(f"表格行的单元格数量与表头不一致: {len(row)} != {len(columns)}")
+        self.columns: list[Any] = columns
+        self.rows: list[list[Any]] = rows
+
+    @classmethod
+    def from_records(cls, records: list[dict[str, Any]]) -> "TableData":
+        """根据JSON记录数组创建表格，表头为所有记录的键按首次出现的顺序合并。
+
+        Args:
+            records: 记录数组。
+
+        Returns:
+            返回表格对象。
+        """
+        columns: dict[str, None] = {}
+        for record in records:
+            for column in record:
+                columns.setdefault(column)
+        return cls(list(columns), [[record.get(column) for column in columns] for record in records])
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """转换为记录数组，格式与`DataFrame.to_dict(orient="records")`相同。
+
+        Returns:
+            返回记录数组。
+        """
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+    def replace(self, mapping: dict[Any, Any]) -> "TableData":
+        """按单元格原文替换表头和表格内容。
+
+        Args:
+            mapping: 单元格原文到新内容的映射，未包含的单元格保持不变。
+
+        Returns:
+            返回替换后的新表格。
+        """
+        return TableData(
+            [mapping.get(column, column) for column in self.columns],
+            [[mapping.get(cell, cell) for cell in row] for row in self.rows],
+        )
+
+    def to_dataframe(self) -> "DataFrame":
+        """转换为pandas DataFrame。
+
+        Returns:
+            返回DataFrame对象。
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.rows, columns=self.columns)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __str__(self) -> str:
+        return "\n".join(" | ".join(str(cell) for cell in row) for row in [self.columns] + self.rows)
+
+
 class TableContent(Content):
+    __slots__ = ()
+
     def __init__(self, data: list[list[str]]) -> None:
-        df: DataFrame = pd.DataFrame(data[1:], columns=data[0])
-        # Verify if the number of rows and columns in the data and DataFrame object match
-        if len(data) - 1 != len(df) or len(data[0]) != len(df.columns):
-            raise ValueError(
-                "The number of rows and columns in the extracted table data and DataFrame object do not match."
-            )
+        super().__init__(ContentType.TABLE, TableData(data[0], data[1:]))
 
-        super().__init__(ContentType.TABLE, df)
+    @classmethod
+    def is_translatable(cls, cell: Any) -> bool:
+        """判断单元格是否需要翻译，空白、数字、日期等不含文字的单元格原样保留。
+
+        Args:
+            cell: 单元格内容。
+
+        Returns:
+            需要翻译时返回True。
+        """
+        if not isinstance(cell, str):
+            return False
+        text: str = cell.strip()
+        if not any(char.isalpha() for char in text):
+            return False
+        return _MONTH_DATE_PATTERN.match(text) is None
+
+    def translatable_cells(self) -> list[str]:
+        """提取表头和表格中需要翻译的单元格文本，去重后按首次出现的顺序返回。
+
+        Returns:
+            返回待翻译的单元格文本列表。
+        """
+        cells: dict[str, None] = {}
+        for row in [self.original.columns] + self.original.rows:
+            for cell in row:
+                if self.is_translatable(cell):
+                    cells.setdefault(cell)
+        return list(cells)
 
     def set_translation(self, translation: str, status: bool) -> None:
+        """设置表格翻译结果。
+
+        Args:
+            translation: 单元格原文到译文的JSON对象，未包含的单元格保留原文；
+                也兼容整表翻译返回的JSON记录数组。
+            status: 是否翻译成功。
+        """
         try:
             if not isinstance(translation, str):
                 raise ValueError(f"Invalid translation type. Expected str, but got {type(translation)}")
@@ -73,9 +200,14 @@ class TableContent(Content):
                 translation = translation[len("```json"):]
                 translation = translation[:-len("```")]
                 logger.debug(translation)
-            translation_df = DataFrame(json.loads(translation))
-            logger.debug(translation_df)
-            self.translation = translation_df
+            data: Any = json.loads(translation)
+            if isinstance(data, dict):
+                # 按单元格替换，表格结构和不需要翻译的单元格保持不变
+                translation_table: TableData = self.original.replace(data)
+            else:
+                translation_table = TableData.from_records(data)
+            logger.opt(lazy=True).debug("{}", lambda: translation_table)
+            self.translation = translation_table
             self.status = status
         except Exception as e:
             logger.error(f"An error occurred during table translation: {e}")
@@ -83,14 +215,35 @@ class TableContent(Content):
             self.status = False
 
     def __str__(self):
-        return json.dumps(self.original.to_dict(orient="records"), ensure_ascii=False)
+        return json.dumps(self.original.to_records(), ensure_ascii=False)
+
+    def dump_translation(self) -> Optional[str]:
+        """导出单元格原文到译文的JSON对象，表格结构与原表不同时导出JSON记录数组。
+
+        Returns:
+            返回JSON文本，没有译文时返回None。
+        """
+        if self.translation is None:
+            return None
+        original: TableData = self.original
+        translation: TableData = self.translation
+        if len(original.columns) != len(translation.columns) or len(original) != len(translation):
+            return json.dumps(translation.to_records(), ensure_ascii=False)
+        mapping: dict[str, Any] = {}
+        original_rows: list[list[Any]] = [original.columns] + original.rows
+        translation_rows: list[list[Any]] = [translation.columns] + translation.rows
+        for original_row, translation_row in zip(original_rows, translation_rows):
+            for cell, translated_cell in zip(original_row, translation_row):
+                if isinstance(cell, str) and cell != translated_cell:
+                    mapping[cell] = translated_cell
+        return json.dumps(mapping, ensure_ascii=False)
 
     def iter_items(self, translated=False):
-        target_df = self.translation if translated else self.original
-        for row_idx, row in target_df.iterrows():
+        target: TableData = self.translation if translated else self.original
+        for row_idx, row in enumerate(target.rows):
             for col_idx, item in enumerate(row):
                 yield row_idx, col_idx, item
 
     def update_item(self, row_idx, col_idx, new_value, translated=False):
-        target_df: DataFrame = self.translation if translated else self.original
-        target_df.at[row_idx, col_idx] = new_value
+        target: TableData = self.translation if translated else self.original
+        target.rows[row_idx][col_idx] = new_value
@@ -4,6 +4,8 @@ from ai_translator.book.content import Content
 class Page:
     """书籍单页数据。"""
 
+    __slots__ = ("contents",)
+
     def __init__(self):
         """初始化一个空白的单页。"""
         self.contents: list[Content] = []
@@ -0,0 +1,100 @@
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from ai_translator.book.page import Page
+
+
+class PageStore:
+    """保存在磁盘上的页面序列，用于翻译大型书籍时降低内存峰值。
+
+    页面以pickle格式追加写入临时文件，内存中只保留每页的偏移量和长度。读取时每次都从文件中
+    反序列化出新的页面对象，修改后需要调用`put`写回，写回的数据追加到文件末尾，旧数据不再引用。
+    临时文件在关闭存储或进程退出时自动删除。
+    """
+
+    def __init__(self, store_dir: Optional[Path] = None) -> None:
+        """初始化页面存储。
+
+        Args:
+            store_dir: 临时文件所在目录，为None时使用系统临时目录。
+        """
+        if store_dir is not None:
+            store_dir.mkdir(parents=True, exist_ok=True)
+        self._file: IO[bytes] = tempfile.TemporaryFile(prefix="pages-", suffix=".pkl", dir=store_dir)
+        self._offsets: list[tuple[int, int]] = []
+        self._end: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def _write(self, page: Page) -> tuple[int, int]:
+        data: bytes = pickle.dumps(page, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.seek(self._end)
+        self._file.write(data)
+        offset: int = self._end
+        self._end += len(data)
+        return offset, len(data)
+
+    def append(self, page: Page) -> None:
+        """在末尾添加页面。
+
+        Args:
+            page: 单页数据。
+        """
+        with self._lock:
+            self._offsets.append(self._write(page))
+
+    def put(self, page_idx: int, page: Page) -> None:
+        """写回修改后的页面。
+
+        Args:
+            page_idx: 页面索引。
+            page: 单页数据。
+        """
+        with self._lock:
+            self._offsets[page_idx] = self._write(page)
+
+    def get(self, page_idx: int) -> Page:
+        """读取页面。
+
+        Args:
+            page_idx: 页面索引，支持负数索引。
+
+        Returns:
+            返回新反序列化的单页数据。
+        """
+        with self._lock:
+            offset, size = self._offsets[page_idx]
+            self._file.seek(offset)
+            data: bytes = self._file.read(size)
+        return pickle.loads(data)
+
+    def __getitem__(self, page_idx: int) -> Page:
+        return self.get(page_idx)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[Page]:
+        for page_idx in range(len(self._offsets)):
+            yield self.get(page_idx)
+
+    @property
+    def size(self) -> int:
+        """临时文件的字节数。"""
+        return self._end
+
+    def clear(self) -> None:
+        """删除全部页面，存储可以继续使用。"""
+        with self._lock:
+            self._file.truncate(0)
+            self._offsets = []
+            self._end = 0
+
+    def close(self) -> None:
+        """关闭并删除临时文件。"""
+        with self._lock:
+            self._file.close()
+            self._offsets = []
+            self._end = 0
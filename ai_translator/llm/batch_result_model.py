@@ -0,0 +1,39 @@
+from typing import Optional
+
+from loguru import logger
+
+from ai_translator.llm.llm_base import LLMBase
+from ai_translator.utils.metrics import metrics
+
+
+class BatchResultModel(LLMBase):
+    """以批量接口（Batch API）的结果作为响应的翻译模型，不发出任何网络请求。
+
+    批量结果中没有对应Prompt的请求（例如打包翻译失败后的逐段重试）直接返回失败，
+    这些内容保持未翻译状态，可以再次导出或通过任务日志续跑。
+    """
+
+    def __init__(self, results: dict[str, str]) -> None:
+        """初始化模型。
+
+        Args:
+            results: Prompt到翻译结果的映射。
+        """
+        self.results: dict[str, str] = results
+
+    def make_request(self, prompt: str, model_name: str) -> tuple[str, bool]:
+        """查找Prompt对应的批量结果。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回(翻译结果, 是否有批量结果)。
+        """
+        translation: Optional[str] = self.results.get(prompt)
+        if translation is None:
+            logger.debug(f"没有批量结果的请求: {prompt[:80]!r}")
+            metrics.incr("batch_missing")
+            return "", False
+        return translation, True
@@ -0,0 +1,84 @@
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from ai_translator.llm.llm_base import LLMBase
+from ai_translator.llm.translation_cache import TranslationCache
+from ai_translator.utils.metrics import metrics
+
+
+class CachedModel(LLMBase):
+    """带持久化缓存的翻译模型，可以包装任意LLMBase子类。
+
+    `cache.stats`统计共用同一缓存的全部调用，单个任务的命中情况见`cache_hits`和`cache_misses`计数器。
+    """
+
+    def __init__(self, model: LLMBase, cache: TranslationCache) -> None:
+        """初始化缓存模型。
+
+        Args:
+            model: 被包装的翻译模型。
+            cache: 翻译缓存。
+        """
+        self.model: LLMBase = model
+        self.cache: TranslationCache = cache
+
+    def make_request(self, prompt: str, model_name: str) -> tuple[str, bool]:
+        """发送翻译请求，缓存命中时直接返回缓存结果，不再请求模型。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回(翻译结果, 是否成功响应)。
+        """
+        key: str = self.cache.make_key(prompt, model_name)
+        cached: Optional[str] = self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"翻译缓存命中: {key}")
+            metrics.incr("cache_hits")
+            return cached, True
+        metrics.incr("cache_misses")
+
+        translation: str
+        status: bool
+        translation, status = self.model.make_request(prompt, model_name)
+        # 只缓存成功的翻译结果，失败的请求下次需要重新翻译
+        if status:
+            self.cache.put(key, translation)
+        return translation, status
+
+    def make_stream_request(self, prompt: str, model_name: str) -> Iterator[str]:
+        """流式发送翻译请求，缓存命中时一次性返回缓存结果，未命中时边输出边累积，完成后写入缓存。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回增量文本的迭代器。
+        """
+        key: str = self.cache.make_key(prompt, model_name)
+        cached: Optional[str] = self.cache.get(key)
+        if cached is not None:
+            metrics.incr("cache_hits")
+            yield cached
+            return
+        metrics.incr("cache_misses")
+
+        deltas: list[str] = []
+        for delta in self.model.make_stream_request(prompt, model_name):
+            deltas.append(delta)
+            yield delta
+        self.cache.put(key, "".join(deltas))
+
+    def discard(self, prompt: str, model_name: str) -> None:
+        """删除未通过校验的缓存结果，下次请求时重新翻译，避免重复读到同一个错误响应。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+        """
+        self.cache.delete(self.cache.make_key(prompt, model_name))
+        self.model.discard(prompt, model_name)
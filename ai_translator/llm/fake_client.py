@@ -0,0 +1,240 @@
+import json
+import math
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+
+import httpx
+from zhipuai import APIInternalError, APIReachLimitError, APIStatusError
+from zhipuai.types.chat.chat_completion import Completion
+from zhipuai.types.chat.chat_completion_chunk import ChatCompletionChunk
+
+from ai_translator.utils.token_estimator import estimate_tokens
+
+
+class FakeCompletions:
+    """模拟`client.chat.completions`接口。"""
+
+    def __init__(self, client: "FakeZhipuAIClient") -> None:
+        self.client: FakeZhipuAIClient = client
+
+    def create(
+        self, model: str, messages: list[dict[str, str]], stream: bool = False, **kwargs: Any
+    ) -> Union[Completion, Iterator[ChatCompletionChunk]]:
+        if stream:
+            return self.client.stream(model, messages[-1]["content"])
+        return self.client.complete(model, messages[-1]["content"])
+
+
+class FakeChat:
+    """模拟`client.chat`接口。"""
+
+    def __init__(self, client: "FakeZhipuAIClient") -> None:
+        self.completions: FakeCompletions = FakeCompletions(client)
+
+
+class LatencyDistribution:
+    """模拟请求延迟分布：固定延迟、均匀分布或对数正态分布，另加与输出token数成正比的生成时间。"""
+
+    def __init__(
+        self,
+        kind: str = "constant",
+        median: float = 0.0,
+        spread: float = 0.0,
+        per_output_token: float = 0.0,
+    ) -> None:
+        """初始化延迟分布。
+
+        Args:
+            kind: 分布类型，可选constant、uniform、lognormal。
+            median: 首token延迟的中位数（秒）。
+            spread: uniform为上下浮动的秒数，lognormal为对数标准差，数值越大长尾越明显。
+            per_output_token: 每个输出token的生成时间（秒）。
+        """
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"不支持的延迟分布: {kind}")
+        self.kind: str = kind
+        self.median: float = median
+        self.spread: float = spread
+        self.per_output_token: float = per_output_token
+
+    def sample(self, rng: random.Random, output_tokens: int = 0) -> float:
+        """采样一次请求的延迟。
+
+        Args:
+            rng: 随机数生成器。
+            output_tokens: 输出token数量。
+
+        Returns:
+            返回延迟秒数。
+        """
+        if self.kind == "uniform":
+            first_token: float = rng.uniform(max(0.0, self.median - self.spread), self.median + self.spread)
+        elif self.kind == "lognormal":
+            first_token = self.median * math.exp(rng.gauss(0, self.spread)) if self.median > 0 else 0.0
+        else:
+            first_token = self.median
+        return first_token + output_tokens * self.per_output_token
+
+
+class FakeZhipuAIClient:
+    """本地模拟的ZhipuAI客户端，可以注入延迟、限流和服务端错误，用于测试与压测，不会发出任何网络请求。
+
+    返回的译文为待翻译内容加上前缀；打包翻译的Prompt会按JSON数组返回对应数量的译文，表格原样返回。
+    流式请求将译文按`STREAM_CHUNK_CHARS`个字符切分为多个增量返回，最后一个增量附带token用量。
+    `fabricate_batch_results`可以为批量请求文件生成本地结果文件。
+    """
+
+    STREAM_CHUNK_CHARS: int = 8  # 流式响应每个增量的字符数
+
+    def __init__(
+        self,
+        latency: Union[float, LatencyDistribution] = 0.0,
+        throttle_rate: float = 0.0,
+        max_concurrency: Optional[int] = None,
+        seed: Optional[int] = None,
+        error_rate: float = 0.0,
+        response_scale: float = 1.0,
+    ) -> None:
+        """初始化模拟客户端。
+
+        Args:
+            latency: 每次请求的模拟延迟（秒）或延迟分布。
+            throttle_rate: 随机返回429限流错误的概率。
+            max_concurrency: 服务端允许的最大并发数，超出时返回429限流错误，为空表示不限制。
+            seed: 随机数种子。
+            error_rate: 随机返回500服务端错误的概率。
+            response_scale: 译文长度相对原文的倍数，用于模拟不同的响应大小。
+        """
+        self.latency: LatencyDistribution = (
+            latency if isinstance(latency, LatencyDistribution) else LatencyDistribution(median=latency)
+        )
+        self.throttle_rate: float = throttle_rate
+        self.error_rate: float = error_rate
+        self.response_scale: float = response_scale
+        self.max_concurrency: Optional[int] = max_concurrency
+        self.chat: FakeChat = FakeChat(self)
+        self.random: random.Random = random.Random(seed)
+        self.requests: int = 0
+        self.throttled: int = 0
+        self.errors: int = 0
+        self.in_flight: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def throttle_error(cls) -> APIReachLimitError:
+        """构造与真实接口一致的429限流异常。"""
+        request: httpx.Request = httpx.Request("POST", "https://open.bigmodel.cn/api/paas/v4/chat/completions")
+        return APIReachLimitError("Too Many Requests", response=httpx.Response(429, request=request))
+
+    @classmethod
+    def server_error(cls) -> APIInternalError:
+        """构造与真实接口一致的500服务端异常。"""
+        request: httpx.Request = httpx.Request("POST", "https://open.bigmodel.cn/api/paas/v4/chat/completions")
+        return APIInternalError("Internal Server Error", response=httpx.Response(500, request=request))
+
+    def scale(self, text: str) -> str:
+        """按响应大小倍数调整译文长度。"""
+        if self.response_scale == 1.0 or not text:
+            return text
+        length: int = max(1, int(len(text) * self.response_scale))
+        return (text * math.ceil(length / len(text)))[:length]
+
+    def fake_translate(self, prompt: str) -> str:
+        """根据Prompt生成模拟译文。"""
+        blocks: list[str] = prompt.split("```")
+        text: str = blocks[-2] if len(blocks) >= 3 else prompt
+        try:
+            data: Any = json.loads(text)
+        except json.JSONDecodeError:
+            return f"[译]{self.scale(text)}"
+        if isinstance(data, list) and all(isinstance(item, str) for item in data):
+            return json.dumps([f"[译]{self.scale(item)}" for item in data], ensure_ascii=False)
+        return text
+
+    def complete(self, model: str, prompt: str) -> Completion:
+        """处理一次对话补全请求。"""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            over_limit: bool = self.max_concurrency is not None and self.in_flight > self.max_concurrency
+            throttled: bool = over_limit or self.random.random() < self.throttle_rate
+            failed: bool = not throttled and self.random.random() < self.error_rate
+            self.throttled += throttled
+            self.errors += failed
+        try:
+            if throttled:
+                raise self.throttle_error()
+            if failed:
+                raise self.server_error()
+            content: str = self.fake_translate(prompt)
+            prompt_tokens: int = estimate_tokens(prompt)
+            completion_tokens: int = estimate_tokens(content)
+            with self._lock:
+                delay: float = self.latency.sample(self.random, completion_tokens)
+            time.sleep(delay)
+            return Completion(
+                model=model,
+                choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                usage={
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stream(self, model: str, prompt: str) -> Iterator[ChatCompletionChunk]:
+        """处理一次流式对话补全请求，与真实接口一样在返回迭代器之前完成限流检查和首token等待。"""
+        completion: Completion = self.complete(model, prompt)
+        return self._iter_chunks(completion)
+
+    def _iter_chunks(self, completion: Completion) -> Iterator[ChatCompletionChunk]:
+        content: str = completion.choices[0].message.content
+        pieces: list[str] = [
+            content[start : start + self.STREAM_CHUNK_CHARS] for start in range(0, len(content), self.STREAM_CHUNK_CHARS)
+        ]
+        for idx, piece in enumerate(pieces):
+            last: bool = idx == len(pieces) - 1
+            yield ChatCompletionChunk(
+                model=completion.model,
+                choices=[{"index": 0, "finish_reason": "stop" if last else None, "delta": {"content": piece}}],
+                usage=completion.usage.model_dump() if last else None,
+                extra_json={},
+            )
+
+    def fabricate_batch_results(self, requests_path: Path, results_path: Path) -> int:
+        """按批量接口的格式为请求文件生成结果文件，注入的限流和服务端错误写为失败的结果行。
+
+        Args:
+            requests_path: 批量请求文件路径。
+            results_path: 结果文件路径。
+
+        Returns:
+            返回处理的请求数量。
+        """
+        count: int = 0
+        with open(requests_path, "r", encoding="utf-8") as requests_file, open(
+            results_path, "w", encoding="utf-8"
+        ) as results_file:
+            for line in requests_file:
+                request: dict[str, Any] = json.loads(line)
+                body: dict[str, Any] = request["body"]
+                response: dict[str, Any]
+                try:
+                    completion: Completion = self.complete(body["model"], body["messages"][-1]["content"])
+                    response = {"status_code": 200, "body": completion.model_dump(exclude_none=True)}
+                except APIStatusError as e:
+                    response = {"status_code": e.status_code, "body": {"error": {"message": str(e)}}}
+                result: dict[str, Any] = {
+                    "id": f"batch-fake-{count}",
+                    "custom_id": request["custom_id"],
+                    "response": response,
+                }
+                results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                count += 1
+        return count
@@ -1,30 +1,205 @@
-from zhipuai import ZhipuAI
-from zhipuai.types.chat.chat_completion import Completion
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Iterator, Optional
 
 from ai_translator.llm.llm_base import LLMBase
+from ai_translator.llm.request_governor import RequestGovernor
+from ai_translator.utils.metrics import metrics
+from ai_translator.utils.token_estimator import estimate_tokens
+
+# zhipuai依赖pydantic、httpx等，导入耗时较长，在创建客户端时才导入
+if TYPE_CHECKING:
+    from zhipuai import ZhipuAI
+    from zhipuai.types.chat.chat_completion import Completion
+    from zhipuai.types.chat.chat_completion_chunk import ChatCompletionChunk
+
+    from config import Config
+
+THROTTLE_STATUS_CODES: set[int] = {429}  # 限流状态码
+TRANSIENT_STATUS_CODES: set[int] = {408, 500, 502, 503, 504}  # 可重试的临时错误状态码
 
 
 class GLMModel(LLMBase):
     """GLM模型。"""
 
-    def __init__(self, api_key: str) -> None:
+    def __init__(self, api_key: str, governor: Optional[RequestGovernor] = None, client: Optional[Any] = None) -> None:
         """模型初始化。
 
         Args:
             api_key: API密钥。
+            governor: 请求调度器，负责限流、重试和自适应并发，为空时不做任何控制。
+            client: 兼容`ZhipuAI`接口的客户端，为空时使用API密钥创建`ZhipuAI`客户端，便于测试时替换为本地模拟客户端。
         """
         self.api_key: str = api_key
-        self.client: ZhipuAI = ZhipuAI(api_key=self.api_key)
+        if client is None:
+            from zhipuai import ZhipuAI
+
+            client = ZhipuAI(api_key=self.api_key, **self.client_options(governor))
+        self.client: ZhipuAI = client
+        self.governor: Optional[RequestGovernor] = governor
+        self._wire: threading.local = threading.local()  # 各线程最近一次请求本身的耗时
+
+    @classmethod
+    def from_config(cls, config: "Config", workers: Optional[int] = None) -> "GLMModel":
+        """根据配置信息创建模型。
+
+        HTTP连接池的连接数与最大并发数一致，空闲连接保持`http_keepalive_seconds`秒，
+        多个翻译任务共用同一个模型时复用连接，并共享请求调度器的限流额度。
+
+        Args:
+            config: 配置信息。
+            workers: 共用该模型的翻译线程总数，作为请求调度器的初始并发上限和最大并发上限。
+
+        Returns:
+            返回模型对象。
+        """
+        import httpx
+        from zhipuai import ZhipuAI
+
+        governor: RequestGovernor = RequestGovernor.from_config(config, workers)
+        connections: int = int(governor.limiter.max_limit)
+        limits: httpx.Limits = httpx.Limits(
+            max_connections=connections,
+            max_keepalive_connections=connections,
+            keepalive_expiry=config.http_keepalive_seconds,
+        )
+        client: ZhipuAI = ZhipuAI(
+            api_key=config.api_key, http_client=httpx.Client(limits=limits), **cls.client_options(governor)
+        )
+        return cls(config.api_key, governor, client)
+
+    @classmethod
+    def client_options(cls, governor: Optional[RequestGovernor]) -> dict[str, Any]:
+        """确定创建`ZhipuAI`客户端的额外参数。
+
+        SDK默认会对408、409、429和5xx自动重试，使用请求调度器时关闭SDK的重试，
+        否则调度器要等SDK重试完才能感知限流，退避时间叠加，单个请求的尝试次数也会成倍增加。
+
+        Args:
+            governor: 请求调度器。
+
+        Returns:
+            使用请求调度器时返回`{"max_retries": 0}`，否则保留SDK的默认重试。
+        """
+        return {"max_retries": 0} if governor is not None else {}
+
+    @classmethod
+    def is_throttle_error(cls, e: Exception) -> bool:
+        """判断异常是否为限流错误。
+
+        Args:
+            e: 请求异常。
+
+        Returns:
+            是否为限流错误。
+        """
+        from zhipuai import APIReachLimitError
+
+        return isinstance(e, APIReachLimitError) or getattr(e, "status_code", None) in THROTTLE_STATUS_CODES
+
+    @classmethod
+    def is_transient_error(cls, e: Exception) -> bool:
+        """判断异常是否为可重试的临时错误，例如超时、连接失败和服务端错误。
+
+        Args:
+            e: 请求异常。
+
+        Returns:
+            是否为临时错误。
+        """
+        from zhipuai import APIConnectionError, APIStatusError, APITimeoutError
+
+        if isinstance(e, (APITimeoutError, APIConnectionError, TimeoutError, ConnectionError)):
+            return True
+        return isinstance(e, APIStatusError) and e.status_code in TRANSIENT_STATUS_CODES
+
+    def create_completion(self, prompt: str, model_name: str, stream: bool = False) -> Any:
+        """调用对话补全接口。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+            stream: 是否流式返回。
+
+        Returns:
+            非流式时返回`Completion`，流式时返回`ChatCompletionChunk`的迭代器。
+        """
+        return self.client.chat.completions.create(
+            model=model_name,
+            messages=[
+                {"role": "user", "content": prompt},
+            ],
+            stream=stream,
+        )
+
+    def timed_completion(self, prompt: str, model_name: str) -> "Completion":
+        """调用对话补全接口，并记录本次请求本身的耗时，供`last_wire_seconds`读取。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回`Completion`。
+        """
+        start: float = time.perf_counter()
+        try:
+            return self.create_completion(prompt, model_name)
+        finally:
+            self._wire.seconds = time.perf_counter() - start
+
+    def last_wire_seconds(self) -> Optional[float]:
+        return getattr(self._wire, "seconds", None)
+
+    def backing_off(self) -> bool:
+        return self.governor is not None and self.governor.backing_off
 
     def make_request(self, prompt: str, model_name: str) -> tuple[str, bool]:
+        return self.make_admitted_request(prompt, model_name, threading.Event())
+
+    def make_admitted_request(self, prompt: str, model_name: str, admitted: threading.Event) -> tuple[str, bool]:
+        self._wire.seconds = None
         try:
-            response: Completion = self.client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "user", "content": prompt},
-                ],
-            )
+            response: Completion
+            with metrics.span(f"llm_request.{model_name}"):
+                if self.governor is None:
+                    admitted.set()
+                    response = self.timed_completion(prompt, model_name)
+                else:
+                    # 调度器放行后才开始计时，重试时记录最后一次请求的耗时
+                    response = self.governor.call(
+                        lambda: self.timed_completion(prompt, model_name),
+                        # 译文长度与原文相近，按Prompt的两倍估算本次请求消耗的token
+                        estimated_tokens=estimate_tokens(prompt) * 2,
+                        is_throttle=self.is_throttle_error,
+                        is_transient=self.is_transient_error,
+                        on_admit=admitted.set,
+                    )
+            if response.usage is not None:
+                metrics.record_usage(model_name, response.usage.prompt_tokens, response.usage.completion_tokens)
             translation: str = response.choices[0].message.content
             return translation, True
         except Exception as e:
-            raise Exception(f"发生了未知错误：{e}")
+            raise Exception(f"发生了未知错误：{e}") from e
+
+    def make_stream_request(self, prompt: str, model_name: str) -> Iterator[str]:
+        try:
+            with metrics.span(f"llm_stream_request.{model_name}"):
+                chunks: Iterator[ChatCompletionChunk]
+                if self.governor is None:
+                    chunks = self.create_completion(prompt, model_name, stream=True)
+                else:
+                    # 流式请求只对建立连接的过程限流和重试，开始输出后的中断直接抛出
+                    chunks = self.governor.call(
+                        lambda: self.create_completion(prompt, model_name, stream=True),
+                        estimated_tokens=estimate_tokens(prompt) * 2,
+                        is_throttle=self.is_throttle_error,
+                        is_transient=self.is_transient_error,
+                    )
+                for chunk in chunks:
+                    if chunk.usage is not None:
+                        metrics.record_usage(model_name, chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"发生了未知错误：{e}") from e
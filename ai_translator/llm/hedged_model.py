@@ -0,0 +1,190 @@
+import contextvars
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from loguru import logger
+
+from ai_translator.llm.llm_base import LLMBase
+from ai_translator.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from config import Config
+
+
+class HedgedModel(LLMBase):
+    """对长尾请求发送对冲请求的翻译模型，可以包装任意LLMBase子类。
+
+    按模型名称分别统计最近完成请求的耗时，请求发出后超过`percentile`分位数仍未返回时，
+    再发送一次相同的请求，先成功返回的结果生效，另一个请求尚未开始时直接取消，已经发出时忽略其结果。
+    对冲请求数量不超过总请求数的`max_hedge_ratio`，统计样本不足`min_samples`时不对冲。
+    耗时样本优先使用被包装模型报告的请求本身耗时，不含限流排队和重试退避；对冲计时从被包装模型放行请求时开始，
+    仍在限流排队的请求不对冲，被包装模型因限流退避期间也不对冲。
+    流式请求不做对冲。使用完毕后调用`close`关闭请求线程池。
+    """
+
+    def __init__(
+        self,
+        model: LLMBase,
+        percentile: float = 95,
+        max_hedge_ratio: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 32,
+    ) -> None:
+        """初始化对冲模型。
+
+        Args:
+            model: 被包装的翻译模型。
+            percentile: 触发对冲的耗时分位数，取值1~99。
+            max_hedge_ratio: 对冲请求数占总请求数的比例上限。
+            window: 每个模型保留的最近耗时样本数。
+            min_samples: 开始对冲所需的最少样本数。
+            max_workers: 执行请求的最大线程数，需要大于翻译引擎的并发数。
+        """
+        if not 1 <= percentile <= 99:
+            raise ValueError(f"分位数必须在1~99之间: {percentile}")
+        self.model: LLMBase = model
+        self.percentile: float = percentile
+        self.max_hedge_ratio: float = max_hedge_ratio
+        self.min_samples: int = min_samples
+        self.latencies: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self.requests: int = 0
+        self.hedges: int = 0
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, model: LLMBase, config: "Config", workers: int) -> "HedgedModel":
+        """根据配置信息创建对冲模型。
+
+        每个翻译线程同时最多有一个主请求和一个对冲请求，请求线程数取翻译引擎并发数的两倍。
+
+        Args:
+            model: 被包装的翻译模型。
+            config: 配置信息。
+            workers: 翻译引擎的并发数。
+
+        Returns:
+            返回对冲模型。
+        """
+        return cls(model, config.hedge_percentile, config.hedge_max_ratio, max_workers=2 * workers)
+
+    def threshold(self, model_name: str) -> Optional[float]:
+        """计算触发对冲的耗时阈值。
+
+        Args:
+            model_name: 模型版本名称。
+
+        Returns:
+            返回阈值（秒），样本不足时返回None。
+        """
+        with self._lock:
+            samples: list[float] = list(self.latencies[model_name])
+        if len(samples) < self.min_samples:
+            return None
+        return statistics.quantiles(samples, n=100, method="inclusive")[int(self.percentile) - 1]
+
+    def _timed_request(self, prompt: str, model_name: str, admitted: threading.Event) -> tuple[str, bool]:
+        start: float = time.perf_counter()
+        try:
+            result: tuple[str, bool] = self.model.make_admitted_request(prompt, model_name, admitted)
+        finally:
+            # 未能发出就失败的请求也要唤醒等待放行的调用方
+            admitted.set()
+        # 限流排队和退避的等待不代表服务端的长尾，计入样本会抬高阈值
+        wire_seconds: Optional[float] = self.model.last_wire_seconds()
+        with self._lock:
+            self.latencies[model_name].append(time.perf_counter() - start if wire_seconds is None else wire_seconds)
+        return result
+
+    def _allow_hedge(self) -> bool:
+        if self.model.backing_off():
+            return False
+        with self._lock:
+            if self.hedges + 1 > self.max_hedge_ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def make_request(self, prompt: str, model_name: str) -> tuple[str, bool]:
+        """发送翻译请求，超过耗时阈值时发送对冲请求。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回(翻译结果, 是否成功响应)。
+        """
+        with self._lock:
+            self.requests += 1
+        admitted: threading.Event = threading.Event()
+        primary: Future = self._executor.submit(
+            contextvars.copy_context().run, self._timed_request, prompt, model_name, admitted
+        )
+        threshold: Optional[float] = self.threshold(model_name)
+        if threshold is None:
+            return primary.result()
+        # 仍在限流排队的请求还没有发出，此时对冲只会多消耗限流额度，从放行时开始计时
+        admitted.wait()
+        done: set[Future]
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._allow_hedge():
+            return primary.result()
+
+        metrics.incr("hedged_requests")
+        logger.debug(f"请求超过{threshold:.2f}秒未返回，发送对冲请求")
+        hedge: Future = self._executor.submit(
+            contextvars.copy_context().run, self._timed_request, prompt, model_name, threading.Event()
+        )
+        pending: set[Future] = {primary, hedge}
+        failure: Optional[tuple[str, bool]] = None
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                result: tuple[str, bool] = future.result()
+                if not result[1]:
+                    failure = result
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is hedge:
+                    metrics.incr("hedge_wins")
+                return result
+        # 两个请求都没有成功时，优先返回失败的响应，否则抛出异常
+        if failure is not None:
+            return failure
+        raise error
+
+    def make_stream_request(self, prompt: str, model_name: str) -> Iterator[str]:
+        """流式请求直接交给被包装的模型。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回增量文本的迭代器。
+        """
+        return self.model.make_stream_request(prompt, model_name)
+
+    def close(self) -> None:
+        """关闭请求线程池，尚未开始的请求直接取消。"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def discard(self, prompt: str, model_name: str) -> None:
+        """交给被包装的模型处理。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+        """
+        self.model.discard(prompt, model_name)
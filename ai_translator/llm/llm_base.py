@@ -1,4 +1,7 @@
+import json
+import threading
 from abc import ABC
+from typing import Iterator, Optional
 
 from ai_translator.book.content import Content, ContentType
 
@@ -7,22 +10,35 @@ class LLMBase(ABC):
     """LLM翻译模型基类。"""
 
     @classmethod
-    def make_text_prompt(cls, text: str, source_language: str, target_language: str) -> str:
+    def make_text_prompt(
+        cls, text: str, source_language: str, target_language: str, reference: Optional[tuple[str, str]] = None
+    ) -> str:
         """生成文本翻译Prompt。
 
         Args:
             text: 待翻译文本。
             source_language: 源语言。
             target_language: 目标语言。
+            reference: 相似原文及其译文，提供时要求模型参照其译法，只需改写不同的部分。
 
         Returns:
             返回生成好的Prompt字符串。
         """
-        return f"""
+        if reference is None:
+            return f"""
             请将下面的{source_language}文本翻译为{target_language}，只返回翻译结果，待翻译文本以```包裹，翻译结果不需要用```包裹：
             
             ```{text}```
         """
+        return f"""
+            请将下面的{source_language}文本翻译为{target_language}，只返回翻译结果，待翻译文本以```包裹，翻译结果不需要用```包裹。
+            下面提供一段相似的原文及其译文作为参考，请沿用参考译文的术语和句式，只修改与参考原文不同的部分：
+
+            参考原文：```{reference[0]}```
+            参考译文：```{reference[1]}```
+
+            待翻译文本：```{text}```
+        """
 
     @classmethod
     def make_table_prompt(cls, table: str, source_language: str, target_language: str) -> str:
@@ -43,6 +59,52 @@ class LLMBase(ABC):
             ```{table}```
         """
 
+    @classmethod
+    def make_batch_prompt(cls, texts: list[str], source_language: str, target_language: str) -> str:
+        """生成多段文本打包翻译的Prompt。
+
+        Args:
+            texts: 待翻译文本列表。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            返回生成好的Prompt字符串。
+        """
+        return f"""
+            请将下面JSON数组中的每一段{source_language}文本分别翻译为{target_language}，待翻译的数组以```包裹，
+            翻译结果以纯JSON字符串数组格式返回，数组长度和顺序必须与原数组完全一致，只返回翻译结果JSON字符串，翻译结果不需要用```包裹，
+            例如 ["译文1", "译文2", ...]
+
+            ```{json.dumps(texts, ensure_ascii=False)}```
+        """
+
+    @classmethod
+    def parse_batch_response(cls, response: str, count: int) -> Optional[list[str]]:
+        """解析打包翻译的响应结果。
+
+        Args:
+            response: 模型返回的翻译结果。
+            count: 打包的文本数量。
+
+        Returns:
+            解析成功且数量一致时返回译文列表，否则返回None。
+        """
+        response = response.strip()
+        if response.startswith("```"):
+            response = response.strip("`")
+            if response.startswith("json"):
+                response = response[len("json"):]
+        try:
+            translations = json.loads(response)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(translations, list) or len(translations) != count:
+            return None
+        if not all(isinstance(translation, str) for translation in translations):
+            return None
+        return translations
+
     @classmethod
     def translate_prompt(cls, content: Content, source_language: str, target_language: str) -> str:
         """根据内容类型，自动生成对应的内容翻译Prompt。
@@ -72,3 +134,61 @@ class LLMBase(ABC):
             返回(翻译结果, 是否成功响应)。
         """
         raise NotImplementedError("子类必须实现 make_request 方法")
+
+    def make_admitted_request(self, prompt: str, model_name: str, admitted: threading.Event) -> tuple[str, bool]:
+        """发送翻译请求，请求通过限流排队、真正发出时设置`admitted`。
+
+        默认模型没有排队，直接设置后发送。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+            admitted: 请求发出时设置的事件。
+
+        Returns:
+            返回(翻译结果, 是否成功响应)。
+        """
+        admitted.set()
+        return self.make_request(prompt, model_name)
+
+    def make_stream_request(self, prompt: str, model_name: str) -> Iterator[str]:
+        """以流式方式发送翻译请求，逐段返回翻译结果的增量文本。
+
+        不支持流式输出的模型一次性返回完整翻译结果。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回增量文本的迭代器。
+        """
+        translation: str
+        translation, _ = self.make_request(prompt, model_name)
+        yield translation
+
+    def last_wire_seconds(self) -> Optional[float]:
+        """当前线程最近一次`make_request`中请求本身的耗时，不含限流排队和重试退避的等待。
+
+        Returns:
+            返回耗时（秒），模型不区分等待和请求耗时时返回None。
+        """
+        return None
+
+    def backing_off(self) -> bool:
+        """模型当前是否因限流而退避，退避期间不宜发送额外的请求。
+
+        Returns:
+            正在退避时返回True。
+        """
+        return False
+
+    def discard(self, prompt: str, model_name: str) -> None:
+        """通知模型该请求的响应未通过校验（例如打包或表格JSON无法解析），带缓存的模型据此删除缓存结果。
+
+        默认不做处理。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+        """
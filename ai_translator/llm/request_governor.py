@@ -0,0 +1,294 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from config import Config
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """令牌桶限流器，按固定速率补充令牌，令牌不足时阻塞等待。"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        """初始化令牌桶。
+
+        Args:
+            rate: 每秒补充的令牌数量。
+            capacity: 令牌桶容量，即允许的突发量，默认为1秒的补充量。
+        """
+        if rate <= 0:
+            raise ValueError(f"令牌补充速率必须大于0: {rate}")
+        self.rate: float = rate
+        self.capacity: float = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens: float = self.capacity
+        self._updated_at: float = time.monotonic()
+        self._lock: threading.Lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """获取令牌，令牌不足时阻塞到补充足够为止。
+
+        单次请求量超过桶容量时按容量计算，避免永远无法满足。
+
+        Args:
+            amount: 需要的令牌数量。
+
+        Returns:
+            返回等待的秒数。
+        """
+        amount = min(amount, self.capacity)
+        waited: float = 0.0
+        while True:
+            with self._lock:
+                now: float = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay: float = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveConcurrencyLimiter:
+    """基于AIMD（加性增、乘性减）的自适应并发限制器。
+
+    每个成功的请求使并发上限增加`increase_step / limit`，即每轮成功约增加`increase_step`；
+    每次被限流时并发上限乘以`decrease_factor`。
+    """
+
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: float = 1.0,
+        max_limit: float = 64.0,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        """初始化并发限制器。
+
+        Args:
+            initial_limit: 初始并发上限。
+            min_limit: 最小并发上限。
+            max_limit: 最大并发上限。
+            increase_step: 每轮成功后增加的并发数。
+            decrease_factor: 被限流后并发上限的缩小比例。
+        """
+        self.min_limit: float = min_limit
+        self.max_limit: float = max_limit
+        self.increase_step: float = increase_step
+        self.decrease_factor: float = decrease_factor
+        self.limit: float = min(max(initial_limit, min_limit), max_limit)
+        self.in_flight: int = 0
+        self._condition: threading.Condition = threading.Condition()
+        self._last_decrease_at: float = 0.0
+
+    def acquire(self) -> None:
+        """占用一个并发名额，达到上限时阻塞等待。"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        """释放一个并发名额。"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self) -> None:
+        """请求成功，加性增加并发上限。
+
+        只有并发名额已被占满时才增加上限，否则调用方的并发不足以验证更高的上限。
+        """
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                self.limit = min(self.max_limit, self.limit + self.increase_step / self.limit)
+                self._condition.notify()
+
+    def on_throttle(self, cooldown: float = 1.0) -> None:
+        """请求被限流，乘性减小并发上限。
+
+        同一批在途请求往往会同时被限流，冷却时间内只减小一次。
+
+        Args:
+            cooldown: 两次减小之间的最短间隔（秒）。
+        """
+        with self._condition:
+            now: float = time.monotonic()
+            if now - self._last_decrease_at < cooldown:
+                return
+            self._last_decrease_at = now
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            logger.warning(f"请求被限流，并发上限降至{self.limit:.2f}")
+
+
+@dataclass
+class GovernorStats:
+    """请求调度统计。"""
+
+    requests: int = 0  # 实际发出的请求次数（含重试）
+    retries: int = 0  # 重试次数
+    throttled: int = 0  # 被限流次数
+    failures: int = 0  # 最终失败次数
+    wait_seconds: float = 0.0  # 限流等待总时长
+
+    def __str__(self) -> str:
+        return (
+            f"requests={self.requests}, retries={self.retries}, throttled={self.throttled}, "
+            f"failures={self.failures}, wait_seconds={self.wait_seconds:.2f}"
+        )
+
+
+class RequestGovernor:
+    """客户端请求调度器：令牌桶限流、指数退避重试以及AIMD自适应并发。"""
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        initial_concurrency: float = 4.0,
+        max_concurrency: float = 64.0,
+    ) -> None:
+        """初始化请求调度器。
+
+        Args:
+            requests_per_second: 每秒请求数上限，为空表示不限制。
+            tokens_per_minute: 每分钟token数上限，为空表示不限制。
+            max_retries: 临时错误的最大重试次数。
+            base_delay: 退避基础等待时间（秒）。
+            max_delay: 退避最长等待时间（秒）。
+            initial_concurrency: 初始并发上限。
+            max_concurrency: 最大并发上限。
+        """
+        self.request_bucket: Optional[TokenBucket] = (
+            TokenBucket(requests_per_second) if requests_per_second else None
+        )
+        self.token_bucket: Optional[TokenBucket] = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        )
+        self.limiter: AdaptiveConcurrencyLimiter = AdaptiveConcurrencyLimiter(
+            initial_concurrency, max_limit=max_concurrency
+        )
+        self.max_retries: int = max_retries
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.stats: GovernorStats = GovernorStats()
+        self._stats_lock: threading.Lock = threading.Lock()
+        self._backoff_until: float = 0.0  # 最近一次限流退避的结束时间
+
+    @classmethod
+    def from_config(cls, config: "Config", workers: Optional[int] = None) -> "RequestGovernor":
+        """根据配置信息创建请求调度器。
+
+        AIMD只在并发槽位全部占满时提高上限，而在途请求数不会超过翻译线程数，
+        因此提供翻译线程数时以它作为初始并发上限和最大并发上限（不超过`max_concurrency`），开始时即可用满全部线程。
+
+        Args:
+            config: 配置信息。
+            workers: 共用该调度器的翻译线程总数，为空时从默认的初始并发上限开始。
+
+        Returns:
+            返回请求调度器。
+        """
+        if workers is None:
+            return cls(
+                requests_per_second=config.requests_per_second,
+                tokens_per_minute=config.tokens_per_minute,
+                max_retries=config.max_retries,
+                max_concurrency=config.max_concurrency,
+            )
+        concurrency: int = min(workers, config.max_concurrency)
+        return cls(
+            requests_per_second=config.requests_per_second,
+            tokens_per_minute=config.tokens_per_minute,
+            max_retries=config.max_retries,
+            initial_concurrency=concurrency,
+            max_concurrency=concurrency,
+        )
+
+    @property
+    def backing_off(self) -> bool:
+        """是否有请求正在因限流而退避等待。"""
+        return time.monotonic() < self._backoff_until
+
+    def backoff_delay(self, attempt: int) -> float:
+        """计算第`attempt`次重试前的等待时间，使用带完全抖动的指数退避。
+
+        Args:
+            attempt: 重试次数，从0开始。
+
+        Returns:
+            返回等待秒数。
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(
+        self,
+        func: Callable[[], T],
+        estimated_tokens: int = 0,
+        is_throttle: Callable[[Exception], bool] = lambda e: False,
+        is_transient: Callable[[Exception], bool] = lambda e: False,
+        on_admit: Optional[Callable[[], None]] = None,
+    ) -> T:
+        """在限流和并发控制下执行请求，遇到限流或临时错误时退避重试。
+
+        Args:
+            func: 请求函数。
+            estimated_tokens: 估算的请求token数量，用于每分钟token限流。
+            is_throttle: 判断异常是否为限流错误。
+            is_transient: 判断异常是否为可重试的临时错误。
+            on_admit: 每次请求通过限流和并发控制、即将发出时调用。
+
+        Returns:
+            返回请求函数的结果。
+        """
+        attempt: int = 0
+        while True:
+            waited: float = 0.0
+            if self.request_bucket is not None:
+                waited += self.request_bucket.acquire()
+            if self.token_bucket is not None and estimated_tokens:
+                waited += self.token_bucket.acquire(estimated_tokens)
+
+            self.limiter.acquire()
+            try:
+                with self._stats_lock:
+                    self.stats.requests += 1
+                    self.stats.wait_seconds += waited
+                if on_admit is not None:
+                    on_admit()
+                result: T = func()
+            except Exception as e:
+                throttled: bool = is_throttle(e)
+                if throttled:
+                    self.limiter.on_throttle()
+                if not (throttled or is_transient(e)) or attempt >= self.max_retries:
+                    with self._stats_lock:
+                        self.stats.throttled += throttled
+                        self.stats.failures += 1
+                    raise
+                delay: float = self.backoff_delay(attempt)
+                with self._stats_lock:
+                    self.stats.throttled += throttled
+                    self.stats.retries += 1
+                    if throttled:
+                        self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+            else:
+                self.limiter.on_success()
+                return result
+            finally:
+                self.limiter.release()
+
+            logger.warning(f"请求失败，{delay:.2f}秒后第{attempt + 1}次重试")
+            time.sleep(delay)
+            attempt += 1
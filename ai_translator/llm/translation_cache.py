@@ -0,0 +1,202 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from config import Config
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计。"""
+
+    hits: int = 0  # 命中次数
+    misses: int = 0  # 未命中次数
+    evictions: int = 0  # 淘汰条目数
+
+    @property
+    def hit_rate(self) -> float:
+        """缓存命中率。"""
+        total: int = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"hits={self.hits}, misses={self.misses}, evictions={self.evictions}, hit_rate={self.hit_rate:.2%}"
+
+
+class TranslationCache:
+    """基于SQLite的持久化翻译缓存，以内容哈希作为键。"""
+
+    EVICT_INTERVAL: int = 256  # 每写入多少条记录执行一次淘汰
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_entries: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> None:
+        """初始化翻译缓存。
+
+        Args:
+            db_path: SQLite数据库文件路径。
+            max_entries: 最大缓存条目数，超出时按最近访问时间淘汰，为空表示不限制。
+            max_age_seconds: 缓存条目最长保留时间（秒），为空表示不过期。
+        """
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path: Path = db_path
+        self.max_entries: Optional[int] = max_entries
+        self.max_age_seconds: Optional[float] = max_age_seconds
+        self.stats: CacheStats = CacheStats()
+        self._puts_since_evict: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translation_cache (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed_at ON translation_cache (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    @classmethod
+    def from_config(cls, config: "Config") -> "TranslationCache":
+        """根据配置信息创建翻译缓存。
+
+        Args:
+            config: 配置信息。
+
+        Returns:
+            返回翻译缓存对象。
+        """
+        max_age_seconds: Optional[float] = None
+        if config.translation_cache_max_age_days is not None:
+            max_age_seconds = config.translation_cache_max_age_days * 24 * 3600
+        return cls(Path(config.translation_cache_path), config.translation_cache_max_entries, max_age_seconds)
+
+    @classmethod
+    def make_key(cls, prompt: str, model_name: str) -> str:
+        """生成缓存键。
+
+        Prompt中已经包含待翻译内容以及源语言、目标语言，因此与模型名称一起即可唯一确定一次翻译。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回SHA-256十六进制摘要。
+        """
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存。
+
+        Args:
+            key: 缓存键。
+
+        Returns:
+            命中时返回翻译结果，否则返回None。
+        """
+        now: float = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translation, created_at FROM translation_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.max_age_seconds is not None and now - row[1] > self.max_age_seconds:
+                self._conn.execute("DELETE FROM translation_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats.evictions += 1
+                row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE translation_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats.hits += 1
+            return row[0]
+
+    def put(self, key: str, translation: str) -> None:
+        """写入缓存。
+
+        Args:
+            key: 缓存键。
+            translation: 翻译结果。
+        """
+        now: float = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translation_cache (key, translation, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, translation, now, now),
+            )
+            self._conn.commit()
+            self._puts_since_evict += 1
+            # 淘汰需要扫描索引，按批次执行以摊薄写入开销
+            should_evict: bool = self._puts_since_evict >= self.EVICT_INTERVAL
+        if should_evict:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        """删除缓存。
+
+        Args:
+            key: 缓存键。
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM translation_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """按照过期时间和条目上限淘汰缓存。
+
+        Returns:
+            返回本次淘汰的条目数。
+        """
+        removed: int = 0
+        with self._lock:
+            if self.max_age_seconds is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM translation_cache WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+                )
+                removed += cursor.rowcount
+            if self.max_entries is not None:
+                cursor = self._conn.execute(
+                    """
+                    DELETE FROM translation_cache WHERE key IN (
+                        SELECT key FROM translation_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+                removed += cursor.rowcount
+            self._conn.commit()
+            self._puts_since_evict = 0
+            self.stats.evictions += removed
+        if removed:
+            logger.debug(f"翻译缓存淘汰{removed}条记录")
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translation_cache").fetchone()[0]
+
+    def close(self) -> None:
+        """关闭数据库连接。"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,197 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.llm.batch_result_model import BatchResultModel
+from ai_translator.translator.job_journal import JobJournal
+from ai_translator.translator.translation_engine import TranslationEngine, TranslationTask
+from ai_translator.utils.metrics import metrics
+
+
+class BatchJob:
+    """批量接口（Batch API）翻译任务，用于不需要实时结果的大批量翻译。
+
+    导出时按翻译引擎的规划（打包、表格单元格分批、跨页重复行去重）生成全部请求，
+    每个请求写为一行与批量接口兼容的JSONL，`custom_id`由首个内容槽位和Prompt摘要组成，
+    相同的书籍和配置每次导出的ID都相同。导入时重新规划请求，按ID找到批量结果对应的Prompt，
+    再由翻译引擎以批量结果代替在线请求完成翻译，因此结果解析与在线翻译完全一致。
+    """
+
+    URL: str = "/v4/chat/completions"  # 批量请求调用的接口
+
+    def __init__(self, engine: TranslationEngine) -> None:
+        """初始化批量任务。
+
+        Args:
+            engine: 翻译引擎，使用其打包和翻译记忆配置规划请求。
+        """
+        self.engine: TranslationEngine = engine
+
+    @classmethod
+    def custom_id(cls, slot: tuple[int, int], prompt: str, part: Optional[int] = None) -> str:
+        """生成请求ID。
+
+        Args:
+            slot: 任务的首个内容槽位(页码索引, 页内内容索引)。
+            prompt: Prompt文本。
+            part: 表格任务中单元格批次的序号。
+
+        Returns:
+            返回形如`page-3-content-1-1a2b3c4d`的请求ID，Prompt变化时ID随之变化。
+        """
+        digest: str = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        prefix: str = f"page-{slot[0]}-content-{slot[1]}"
+        if part is not None:
+            prefix += f"-part-{part}"
+        return f"{prefix}-{digest}"
+
+    @classmethod
+    def task_requests(cls, task: TranslationTask) -> list[tuple[str, str]]:
+        """列出翻译任务的首轮请求，失败后的重试请求不参与导出。
+
+        Args:
+            task: 翻译任务。
+
+        Returns:
+            返回(请求ID, Prompt)列表。
+        """
+        if task.cells:
+            return [
+                (cls.custom_id(task.slots[0], prompt, part), prompt) for part, (_, prompt) in enumerate(task.cell_batches)
+            ]
+        return [(cls.custom_id(task.slots[0], task.prompt), task.prompt)]
+
+    def requests(
+        self, book: Book, source_language: str, target_language: str, model_name: str
+    ) -> list[tuple[str, str, str]]:
+        """规划书籍的全部翻译请求。
+
+        Args:
+            book: 书籍对象。
+            source_language: 源语言。
+            target_language: 目标语言。
+            model_name: 模型版本名称，自动路由时按任务难度确定每个请求的模型。
+
+        Returns:
+            返回按书籍顺序排列的(请求ID, Prompt, 模型版本名称)列表。
+        """
+        if book.spilled:
+            # 页面暂存到磁盘时翻译按页面窗口进行，请求的划分与整本规划不同
+            raise ValueError("批量翻译需要整本书籍保存在内存中")
+        tasks: list[TranslationTask] = self.engine.plan(book, source_language, target_language)
+        requests: list[tuple[str, str, str]] = []
+        for task in tasks:
+            task_model: str = self.engine.router.select(task.hard, model_name)
+            requests.extend((custom_id, prompt, task_model) for custom_id, prompt in self.task_requests(task))
+        return requests
+
+    def export(
+        self, book: Book, source_language: str, target_language: str, model_name: str, requests_path: Path
+    ) -> int:
+        """导出批量请求文件。
+
+        Args:
+            book: 书籍对象。
+            source_language: 源语言。
+            target_language: 目标语言。
+            model_name: 模型版本名称。
+            requests_path: 请求文件路径。
+
+        Returns:
+            返回导出的请求数量。
+        """
+        requests: list[tuple[str, str, str]] = self.requests(book, source_language, target_language, model_name)
+        requests_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(requests_path, "w", encoding="utf-8") as requests_file:
+            for custom_id, prompt, request_model in requests:
+                request: dict[str, Any] = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": self.URL,
+                    "body": {"model": request_model, "messages": [{"role": "user", "content": prompt}]},
+                }
+                requests_file.write(json.dumps(request, ensure_ascii=False) + "\n")
+        logger.info(f"导出{len(requests)}个批量请求: {requests_path}")
+        return len(requests)
+
+    @classmethod
+    def load_results(cls, results_path: Path, model_name: str) -> dict[str, str]:
+        """读取批量结果文件，失败的请求只记录日志。
+
+        Args:
+            results_path: 结果文件路径。
+            model_name: 模型版本名称，用于统计token用量。
+
+        Returns:
+            返回请求ID到翻译结果的映射。
+        """
+        results: dict[str, str] = {}
+        with open(results_path, "r", encoding="utf-8") as results_file:
+            for line in results_file:
+                if not line.strip():
+                    continue
+                record: dict[str, Any] = json.loads(line)
+                response: dict[str, Any] = record.get("response") or {}
+                body: dict[str, Any] = response.get("body") or {}
+                if response.get("status_code") != 200 or not body.get("choices"):
+                    logger.warning(f"批量请求失败: {record.get('custom_id')}, {body.get('error') or response}")
+                    metrics.incr("batch_failed")
+                    continue
+                usage: Optional[dict[str, int]] = body.get("usage")
+                if usage:
+                    # 自动路由时各请求的模型不同，以结果中的模型为准
+                    metrics.record_usage(
+                        body.get("model") or model_name, usage["prompt_tokens"], usage["completion_tokens"]
+                    )
+                results[record["custom_id"]] = body["choices"][0]["message"]["content"]
+        return results
+
+    def ingest(
+        self,
+        book: Book,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        results_path: Path,
+        journal: Optional[JobJournal] = None,
+    ) -> int:
+        """将批量结果写回书籍。
+
+        Args:
+            book: 与导出时相同的书籍对象。
+            source_language: 源语言。
+            target_language: 目标语言。
+            model_name: 模型版本名称。
+            results_path: 结果文件路径。
+            journal: 任务日志，提供时记录写回的翻译结果，没有批量结果的内容可以续跑在线翻译。
+
+        Returns:
+            返回匹配到的批量结果数量。
+        """
+        results: dict[str, str] = self.load_results(results_path, model_name)
+        if journal is not None:
+            journal.restore(book)
+        prompts: dict[str, str] = {}
+        matched: int = 0
+        for custom_id, prompt, _ in self.requests(book, source_language, target_language, model_name):
+            if custom_id in results:
+                prompts[prompt] = results[custom_id]
+                matched += 1
+        if matched < len(results):
+            # 书籍内容、语言或打包配置与导出时不同时，Prompt摘要变化，结果无法对应
+            logger.warning(f"{len(results) - matched}个批量结果与当前书籍的请求不匹配，已忽略")
+        engine: TranslationEngine = TranslationEngine(
+            BatchResultModel(prompts),
+            self.engine.max_workers,
+            self.engine.pack_token_budget,
+            self.engine.memory,
+            self.engine.router,
+        )
+        engine.translate_book(book, source_language, target_language, model_name, journal)
+        logger.info(f"写回{matched}个批量结果")
+        metrics.incr("batch_ingested", matched)
+        return matched
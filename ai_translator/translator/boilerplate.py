@@ -0,0 +1,222 @@
+import math
+import re
+from collections import Counter
+from typing import Iterable, Iterator, Optional, Sequence
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.book.content import Content, ContentType
+from ai_translator.book.page import Page
+from ai_translator.utils.metrics import metrics
+
+_DIGITS_PATTERN: re.Pattern = re.compile(r"\d+")
+_SPACES_PATTERN: re.Pattern = re.compile(r"\s+")
+
+# 重复内容的译文记忆，键为归一化文本，值为(原文, 译文)
+BoilerplateMemo = dict[str, tuple[str, str]]
+
+
+class BoilerplateDetector:
+    """识别跨页重复出现的页眉、页脚、页码和版权声明等样板文字。
+
+    每页文本开头和结尾的若干行按(位置, 归一化文本)统计出现的页数，数字被统一掩码，
+    因此"Page 3 of 10"与"Page 4 of 10"视为同一行。重复行从正文中拆出，作为带有`boilerplate_key`的独立文本内容，
+    翻译引擎对相同键的内容只请求一次，其余页面复用译文并替换其中的数字。
+    """
+
+    def __init__(self, edge_lines: int = 3, min_pages: int = 3, min_ratio: float = 0.3) -> None:
+        """初始化样板文字检测器。
+
+        Args:
+            edge_lines: 每页开头和结尾参与检测的行数。
+            min_pages: 判定为重复行所需的最少页数。
+            min_ratio: 判定为重复行所需的最低页数占比，奇偶页页眉不同时每种各占一半左右。
+        """
+        if edge_lines < 1:
+            raise ValueError(f"检测行数必须大于0: {edge_lines}")
+        self.edge_lines: int = edge_lines
+        self.min_pages: int = min_pages
+        self.min_ratio: float = min_ratio
+
+    @classmethod
+    def normalize(cls, line: str) -> str:
+        """归一化单行文本：掩码数字、合并空白并忽略大小写。
+
+        Args:
+            line: 单行文本。
+
+        Returns:
+            返回归一化后的文本。
+        """
+        return _SPACES_PATTERN.sub(" ", _DIGITS_PATTERN.sub("#", line)).strip().casefold()
+
+    @classmethod
+    def adapt_translation(cls, template: str, translation: str, original: str) -> Optional[str]:
+        """将同一重复行的译文套用到另一页的原文上，按顺序替换其中的数字。
+
+        Args:
+            template: 已翻译的原文。
+            translation: `template`的译文。
+            original: 归一化后与`template`相同的另一段原文。
+
+        Returns:
+            返回套用后的译文，译文中的数字与原文无法一一对应时返回None。
+        """
+        if original == template:
+            return translation
+        template_digits: list[str] = _DIGITS_PATTERN.findall(template)
+        original_digits: list[str] = _DIGITS_PATTERN.findall(original)
+        if len(template_digits) != len(original_digits):
+            return None
+        # 例如数字被译为中文数字或者顺序被调换时，无法确定替换位置
+        if _DIGITS_PATTERN.findall(translation) != template_digits:
+            return None
+        digits: Iterator[str] = iter(original_digits)
+        return _DIGITS_PATTERN.sub(lambda _: next(digits), translation)
+
+    def edge_positions(self, line_count: int) -> dict[int, str]:
+        """计算参与检测的行及其位置标记。
+
+        Args:
+            line_count: 文本行数。
+
+        Returns:
+            返回{行索引: 位置标记}，开头的行标记为head:n，结尾的行标记为foot:n。
+        """
+        positions: dict[int, str] = {}
+        for offset in range(min(self.edge_lines, line_count)):
+            positions[offset] = f"head:{offset}"
+        for offset in range(min(self.edge_lines, line_count)):
+            positions.setdefault(line_count - 1 - offset, f"foot:{offset}")
+        return positions
+
+    @classmethod
+    def page_lines(cls, page: Page) -> Optional[tuple[int, list[str]]]:
+        """获取页面中第一个未翻译的文本内容及其文本行。
+
+        Args:
+            page: 页面对象。
+
+        Returns:
+            返回(内容索引, 文本行列表)，页面没有文本内容时返回None。
+        """
+        for content_idx, content in enumerate(page.contents):
+            if content.content_type == ContentType.TEXT and not content.status and content.boilerplate_key is None:
+                return content_idx, str(content).split("\n")
+        return None
+
+    def detect(self, pages: Sequence[Page]) -> set[tuple[str, str]]:
+        """统计跨页重复的行。
+
+        Args:
+            pages: 解析后、切分前的页面列表。
+
+        Returns:
+            返回重复行的(位置标记, 归一化文本)集合。
+        """
+        counter: Counter = Counter()
+        for page in pages:
+            found: Optional[tuple[int, list[str]]] = self.page_lines(page)
+            if found is None:
+                continue
+            lines: list[str] = found[1]
+            positions: dict[int, str] = self.edge_positions(len(lines))
+            counter.update({(position, self.normalize(lines[line_idx])) for line_idx, position in positions.items()})
+        threshold: int = max(self.min_pages, math.ceil(self.min_ratio * len(pages)))
+        return {key for key, count in counter.items() if count >= threshold and key[1]}
+
+    def split_page(self, page: Page, repeated: set[tuple[str, str]]) -> int:
+        """将页面文本中的重复行拆分为独立的文本内容，其余正文保持原有顺序。
+
+        不含字母的重复行（例如单独的页码）无需翻译，直接以原文作为译文。
+
+        Args:
+            page: 页面对象。
+            repeated: `detect`返回的重复行集合。
+
+        Returns:
+            返回拆出的重复行数量。
+        """
+        found: Optional[tuple[int, list[str]]] = self.page_lines(page)
+        if found is None or not repeated:
+            return 0
+        content_idx, lines = found
+        boilerplate_lines: set[int] = {
+            line_idx
+            for line_idx, position in self.edge_positions(len(lines)).items()
+            if (position, self.normalize(lines[line_idx])) in repeated
+        }
+        if not boilerplate_lines:
+            return 0
+
+        contents: list[Content] = []
+        body: list[str] = []
+
+        def flush_body() -> None:
+            if body:
+                contents.append(Content(ContentType.TEXT, "\n".join(body)))
+                body.clear()
+
+        for line_idx, line in enumerate(lines):
+            if line_idx not in boilerplate_lines:
+                body.append(line)
+                continue
+            flush_body()
+            content: Content = Content(ContentType.TEXT, line)
+            content.boilerplate_key = self.normalize(line)
+            if not any(char.isalpha() for char in line):
+                content.set_translation(line, True)
+            contents.append(content)
+        flush_body()
+        page.contents[content_idx : content_idx + 1] = contents
+        return len(boilerplate_lines)
+
+    def process_book(self, book: Book) -> int:
+        """检测并拆分整本书籍中的重复行。
+
+        Args:
+            book: 书籍对象。
+
+        Returns:
+            返回拆出的重复行数量。
+        """
+        repeated: set[tuple[str, str]] = self.detect(book.pages)
+        count: int = 0
+        for page_idx, page in enumerate(book.pages):
+            count += self.split_page(page, repeated)
+            book.update_page(page_idx, page)
+        self._log(repeated, count)
+        return count
+
+    def process_pages(self, pages: Iterable[Page], sample_pages: int = 32) -> Iterator[Page]:
+        """流式检测并拆分重复行，根据开头`sample_pages`页的统计结果处理全部页面。
+
+        Args:
+            pages: 页面迭代器。
+            sample_pages: 用于统计的页面数量，这些页面会暂存在内存中。
+
+        Returns:
+            返回拆分后的页面迭代器。
+        """
+        page_iter: Iterator[Page] = iter(pages)
+        sample: list[Page] = []
+        for page in page_iter:
+            sample.append(page)
+            if len(sample) >= sample_pages:
+                break
+        repeated: set[tuple[str, str]] = self.detect(sample)
+        count: int = 0
+        for page in sample:
+            count += self.split_page(page, repeated)
+            yield page
+        for page in page_iter:
+            count += self.split_page(page, repeated)
+            yield page
+        self._log(repeated, count)
+
+    @classmethod
+    def _log(cls, repeated: set[tuple[str, str]], count: int) -> None:
+        if repeated:
+            logger.info(f"识别到{len(repeated)}种跨页重复行，共拆出{count}行")
+        metrics.incr("boilerplate_lines", count)
@@ -0,0 +1,311 @@
+import json
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.translator.book_snapshot import BookSnapshot
+from ai_translator.translator.job_journal import JobJournal
+from ai_translator.translator.translation_engine import TranslationEngine, TranslationTask
+from ai_translator.utils.metrics import Metrics, metrics
+from ai_translator.utils.token_estimator import estimate_tokens
+
+if TYPE_CHECKING:
+    from ai_translator.translator.pdf_translator import PDFTranslator
+
+
+@dataclass(eq=False)
+class BookJob:
+    """队列中的单本书籍翻译任务。"""
+
+    pdf_file_path: str  # PDF文件路径
+    output_path: Path  # 输出文件路径
+    priority: int = 1  # 优先级，数值越大越先开始，并按比例分得更多的并发请求
+    source_language: str = "英语"  # 源语言
+    target_language: str = "中文"  # 目标语言
+    status: str = "waiting"  # 状态：waiting、running、done、failed
+    error: Optional[str] = None  # 失败原因
+    book: Optional[Book] = field(default=None, repr=False)
+    journal: Optional[JobJournal] = field(default=None, repr=False)
+    tasks: deque[TranslationTask] = field(default_factory=deque, repr=False)  # 尚未提交的翻译任务
+    remaining: int = 0  # 尚未完成的翻译任务数
+    vtime: float = 0.0  # 加权公平调度的虚拟时间
+    metrics: Metrics = field(default_factory=Metrics, repr=False)  # 本书籍的埋点统计，同时计入全局统计
+
+    def __post_init__(self) -> None:
+        # 调度时按优先级缩放虚拟时间，0或负数会导致除零或虚拟时间倒退
+        if self.priority < 1:
+            raise ValueError(f"优先级必须大于0: {self.pdf_file_path}, {self.priority}")
+
+
+class BookQueue:
+    """多本书籍共用一个请求线程池的翻译队列。
+
+    书籍按优先级依次解析和规划，同时参与调度的书籍不超过`max_active_books`本，下一本书籍在后台提前解析。
+    调度采用加权公平排队：每提交一个任务，所属书籍的虚拟时间增加`预估token数 / 优先级`，
+    每次从虚拟时间最小的书籍中取出任务，因此高优先级的书籍按比例分得更多请求，低优先级的书籍也不会饿死。
+    在途请求数始终保持为`max_workers`，吞吐只受接口配额限制；每本书籍翻译完成后立即在后台线程中写出结果。
+    """
+
+    def __init__(self, translator: "PDFTranslator", max_active_books: int = 4) -> None:
+        """初始化翻译队列。
+
+        Args:
+            translator: PDF翻译器，使用其解析、切分配置和翻译引擎。
+            max_active_books: 同时参与调度的最大书籍数量。
+        """
+        if max_active_books < 1:
+            raise ValueError(f"书籍数量必须大于0: {max_active_books}")
+        self.translator: PDFTranslator = translator
+        self.engine: TranslationEngine = translator.engine
+        self.max_active_books: int = max_active_books
+        self._clock: float = 0.0  # 最近一次提交的任务所属书籍的虚拟时间
+
+    @classmethod
+    def scan_directory(
+        cls,
+        book_dir: str,
+        output_dir: Optional[str] = None,
+        source_language: str = "英语",
+        target_language: str = "中文",
+    ) -> list[BookJob]:
+        """为目录中的全部PDF文件创建翻译任务。
+
+        Args:
+            book_dir: PDF文件目录。
+            output_dir: 输出目录，为空时输出到PDF文件同目录下。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            按文件名排序的任务列表。
+        """
+        jobs: list[BookJob] = []
+        for pdf_file_path in sorted(Path(book_dir).glob("*.pdf")):
+            output_path: Path = cls.default_output_path(str(pdf_file_path), output_dir)
+            jobs.append(BookJob(str(pdf_file_path), output_path, 1, source_language, target_language))
+        return jobs
+
+    @classmethod
+    def load_manifest(
+        cls,
+        manifest_path: str,
+        output_dir: Optional[str] = None,
+        source_language: str = "英语",
+        target_language: str = "中文",
+    ) -> list[BookJob]:
+        """读取任务清单。
+
+        清单为JSONL文件，每行一本书籍，例如：
+        {"book": "a.pdf", "priority": 2, "output": "a.md", "source_lang": "英语", "target_lang": "中文"}
+        其中只有book是必填项，相对路径以清单文件所在目录为准，priority必须为正整数。
+
+        Args:
+            manifest_path: 清单文件路径。
+            output_dir: 未指定输出路径时的输出目录，为空时输出到PDF文件同目录下。
+            source_language: 未指定源语言时的源语言。
+            target_language: 未指定目标语言时的目标语言。
+
+        Returns:
+            按清单顺序排列的任务列表。
+        """
+        base_dir: Path = Path(manifest_path).parent
+        jobs: list[BookJob] = []
+        with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+            for line in manifest_file:
+                if not line.strip():
+                    continue
+                entry: dict[str, Any] = json.loads(line)
+                pdf_file_path: str = str(base_dir / entry["book"])
+                output_path: Path = cls.default_output_path(pdf_file_path, output_dir)
+                if entry.get("output"):
+                    output_path = base_dir / entry["output"]
+                job: BookJob = BookJob(
+                    pdf_file_path,
+                    output_path,
+                    int(entry.get("priority", 1)),
+                    entry.get("source_lang") or source_language,
+                    entry.get("target_lang") or target_language,
+                )
+                jobs.append(job)
+        return jobs
+
+    @classmethod
+    def default_output_path(cls, pdf_file_path: str, output_dir: Optional[str] = None) -> Path:
+        """确定默认的输出文件路径。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            output_dir: 输出目录，为空时输出到PDF文件同目录下。
+
+        Returns:
+            返回输出文件路径。
+        """
+        if output_dir:
+            return Path(output_dir) / f"{Path(pdf_file_path).stem}_translated.pdf"
+        return Path(pdf_file_path).parent / f"{Path(pdf_file_path).stem}_translated.pdf"
+
+    def run(self, jobs: list[BookJob], model_name: str = "GLM-4", resume: bool = False) -> list[BookJob]:
+        """翻译队列中的全部书籍，单本书籍失败不影响其他书籍。
+
+        Args:
+            jobs: 书籍任务列表。
+            model_name: 模型版本名称。
+            resume: 是否根据各书籍的任务日志续跑。
+
+        Returns:
+            返回任务列表，可以通过`status`查看每本书籍的结果。
+        """
+        # 优先级相同时保持原有顺序
+        waiting: deque[BookJob] = deque(sorted(jobs, key=lambda job: -job.priority))
+        active: list[BookJob] = []  # 还有未提交任务的书籍
+        pending: dict[Future, tuple[BookJob, TranslationTask]] = {}
+        loading: dict[BookJob, Future] = {}
+        writes: list[Future] = []
+        logger.info(f"开始翻译{len(jobs)}本书籍，并发数: {self.engine.max_workers}")
+
+        # 后台线程负责提前解析后续书籍和写出已完成的书籍，期间在途请求不受影响
+        executor: ThreadPoolExecutor
+        background: ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.engine.max_workers, thread_name_prefix="translator") as executor:
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="book_io") as background:
+                while waiting or active or pending:
+                    for job in list(waiting)[: self.max_active_books]:
+                        if job not in loading:
+                            load_book = job.metrics.bind(self.translator.load_book)
+                            loading[job] = background.submit(load_book, job.pdf_file_path)
+                    # 只开始已经提交解析的书籍，其余书籍在下一轮提交解析
+                    while waiting and waiting[0] in loading and len(active) < self.max_active_books:
+                        job = waiting.popleft()
+                        self.start(job, loading.pop(job), model_name, resume)
+                        if job.tasks:
+                            active.append(job)
+                        elif job.status == "running":
+                            writes.append(self.finish(job, background))
+
+                    while active and len(pending) < self.engine.max_workers:
+                        job = min(active, key=lambda item: item.vtime)
+                        task: TranslationTask = job.tasks.popleft()
+                        self._clock = job.vtime
+                        job.vtime += max(1, estimate_tokens(task.prompt)) / job.priority
+                        pending[executor.submit(job.metrics.bind(self.engine.run_task), task, model_name)] = (job, task)
+                        if not job.tasks:
+                            active.remove(job)
+
+                    if not pending:
+                        continue
+                    done: set[Future]
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job, task = pending.pop(future)
+                        if job.status != "running":
+                            continue
+                        try:
+                            with job.metrics.activate():
+                                TranslationEngine.apply_results(
+                                    job.book.pages, task, TranslationEngine.task_results(task, future), job.journal
+                                )
+                        except Exception as e:
+                            self.fail(job, e)
+                            if job in active:
+                                active.remove(job)
+                            continue
+                        job.remaining -= 1
+                        if not job.remaining and not job.tasks:
+                            writes.append(self.finish(job, background))
+                for write in writes:
+                    write.result()
+
+        done_count: int = sum(job.status == "done" for job in jobs)
+        logger.info(f"翻译队列完成，成功{done_count}本，失败{len(jobs) - done_count}本")
+        return jobs
+
+    def start(self, job: BookJob, loading: Future, model_name: str, resume: bool) -> None:
+        """读取解析结果并规划书籍的翻译任务。
+
+        Args:
+            job: 书籍任务。
+            loading: 后台解析任务。
+            model_name: 模型版本名称。
+            resume: 是否根据任务日志续跑。
+        """
+        try:
+            job.book = loading.result()
+            with job.metrics.activate():
+                job.journal = self.translator.open_journal(
+                    job.output_path,
+                    job.pdf_file_path,
+                    job.source_language,
+                    job.target_language,
+                    None,
+                    model_name,
+                    resume,
+                )
+                job.journal.restore(job.book)
+                tasks: list[TranslationTask] = self.engine.plan(job.book, job.source_language, job.target_language)
+        except Exception as e:
+            self.fail(job, e)
+            return
+        job.tasks = deque(tasks)
+        job.remaining = len(tasks)
+        # 新加入的书籍从当前虚拟时间开始，不会因为之前没有参与调度而长时间独占请求
+        job.vtime = self._clock
+        job.status = "running"
+        logger.info(f"开始翻译{job.pdf_file_path}，{len(tasks)}个翻译请求，优先级: {job.priority}")
+
+    def finish(self, job: BookJob, background: ThreadPoolExecutor) -> Future:
+        """书籍翻译完成后在后台写出结果。
+
+        Args:
+            job: 书籍任务。
+            background: 后台线程池。
+
+        Returns:
+            返回写入任务。
+        """
+        job.journal.close()
+        if self.engine.memory is not None:
+            for page in job.book.pages:
+                self.engine.memory.add_page(page, job.source_language, job.target_language)
+        return background.submit(job.metrics.bind(self.write), job)
+
+    def write(self, job: BookJob) -> None:
+        """写出翻译结果和翻译快照，并释放书籍占用的内存。
+
+        Args:
+            job: 书籍任务。
+        """
+        try:
+            job.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self.translator.writer.save_translated_book(job.book, job.output_path)
+            BookSnapshot.save(
+                job.book, self.translator.snapshot_path(job.output_path), job.source_language, job.target_language
+            )
+        except Exception as e:
+            self.fail(job, e)
+            return
+        job.book = None
+        job.status = "done"
+        metrics.incr("books_translated")
+        logger.info(f"书籍翻译完成: {job.output_path}")
+
+    @classmethod
+    def fail(cls, job: BookJob, e: Exception) -> None:
+        """将书籍标记为失败，其余尚未提交的任务不再翻译。
+
+        Args:
+            job: 书籍任务。
+            e: 失败原因。
+        """
+        logger.error(f"书籍翻译失败: {job.pdf_file_path}, {e}")
+        job.status = "failed"
+        job.error = str(e)
+        job.tasks.clear()
+        job.book = None
+        if job.journal is not None:
+            job.journal.close()
+        metrics.incr("books_failed")
@@ -0,0 +1,176 @@
+import difflib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.book.content import Content
+from ai_translator.book.page import Page
+from ai_translator.translator.job_journal import JobJournal
+from ai_translator.translator.writer import BookWriter
+from ai_translator.utils.metrics import metrics
+
+
+class BookSnapshot:
+    """已翻译书籍的快照，用于文档修订后只翻译变化的内容。
+
+    快照为JSONL文件，第一行为语言信息，之后按书籍顺序每行记录一段内容的原文摘要和译文：
+    {"hash": 原文摘要, "translation": 可写回的译文，未翻译成功时为null}
+    新版本的内容先按原文摘要序列与快照做序列比对，对齐且未变化的内容直接复用译文；
+    位置发生移动的内容按摘要查找复用，其余内容才需要翻译。
+    """
+
+    VERSION: int = 1  # 快照格式版本
+
+    def __init__(self, source_language: str, target_language: str, entries: list[tuple[str, Optional[str]]]) -> None:
+        """初始化快照。
+
+        Args:
+            source_language: 源语言。
+            target_language: 目标语言。
+            entries: 按书籍顺序排列的(原文摘要, 译文)列表。
+        """
+        self.source_language: str = source_language
+        self.target_language: str = target_language
+        self.entries: list[tuple[str, Optional[str]]] = entries
+
+    @classmethod
+    def save(cls, book: Book, snapshot_path: Path, source_language: str, target_language: str) -> Path:
+        """保存书籍的翻译快照。
+
+        Args:
+            book: 翻译完成的书籍对象。
+            snapshot_path: 快照文件路径。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            返回快照文件路径。
+        """
+        snapshot_writer: SnapshotWriter
+        with SnapshotWriter(snapshot_path, source_language, target_language) as snapshot_writer:
+            for page in book.pages:
+                snapshot_writer.write_page(page)
+        return snapshot_path
+
+    @classmethod
+    def load(cls, snapshot_path: Path) -> "BookSnapshot":
+        """读取翻译快照。
+
+        Args:
+            snapshot_path: 快照文件路径。
+
+        Returns:
+            返回快照对象。
+        """
+        with open(snapshot_path, "r", encoding="utf-8") as snapshot_file:
+            header: dict[str, Any] = json.loads(snapshot_file.readline())
+            if header.get("version") != cls.VERSION:
+                raise ValueError(f"不支持的快照版本: {header.get('version')}")
+            entries: list[tuple[str, Optional[str]]] = []
+            for line in snapshot_file:
+                entry: dict[str, Any] = json.loads(line)
+                entries.append((entry["hash"], entry["translation"]))
+        return cls(header["source_language"], header["target_language"], entries)
+
+    def apply(self, book: Book, source_language: str, target_language: str) -> int:
+        """将快照中未变化内容的译文写回新版本的书籍。
+
+        Args:
+            book: 新版本的书籍对象，已完成重复行拆分和文本切分。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            返回复用译文的内容数量。
+        """
+        if (source_language, target_language) != (self.source_language, self.target_language):
+            raise ValueError(
+                f"快照语言与当前任务不一致: {self.source_language}->{self.target_language}, "
+                f"{source_language}->{target_language}"
+            )
+        hashes: list[str] = [JobJournal.content_hash(content) for page in book.pages for content in page.contents]
+        old_hashes: list[str] = [content_hash for content_hash, _ in self.entries]
+
+        # 先按序列比对复用对齐的内容，再按摘要复用移动过位置的内容
+        translations: dict[int, str] = {}
+        matcher: difflib.SequenceMatcher = difflib.SequenceMatcher(None, old_hashes, hashes, autojunk=False)
+        for tag, old_start, old_end, new_start, _ in matcher.get_opcodes():
+            if tag != "equal":
+                continue
+            for offset in range(old_end - old_start):
+                translation: Optional[str] = self.entries[old_start + offset][1]
+                if translation is not None:
+                    translations[new_start + offset] = translation
+        by_hash: dict[str, str] = {
+            content_hash: translation for content_hash, translation in self.entries if translation is not None
+        }
+        moved: int = 0
+        for idx, content_hash in enumerate(hashes):
+            if idx not in translations and content_hash in by_hash:
+                translations[idx] = by_hash[content_hash]
+                moved += 1
+
+        position: int = 0
+        page: Page
+        for page_idx, page in enumerate(book.pages):
+            content: Content
+            for content in page.contents:
+                if position in translations and not content.status:
+                    content.set_translation(translations[position], True)
+                position += 1
+            book.update_page(page_idx, page)
+
+        logger.info(
+            f"复用上一版本{len(translations)}段译文（其中{moved}段位置移动），{len(hashes) - len(translations)}段需要翻译"
+        )
+        metrics.incr("revision_reused", len(translations))
+        return len(translations)
+
+
+class SnapshotWriter(BookWriter):
+    """逐页写入翻译快照的增量写入器，可以与输出文件的写入器组合，在流水线翻译中同时生成快照。
+
+    快照先写入临时文件，完成后才替换同名快照，中途出错时不会留下不完整的快照。
+    """
+
+    def __init__(self, snapshot_path: Path, source_language: str, target_language: str) -> None:
+        """初始化快照写入器。
+
+        Args:
+            snapshot_path: 快照文件路径。
+            source_language: 源语言。
+            target_language: 目标语言。
+        """
+        super().__init__(snapshot_path)
+        header: dict[str, Any] = {
+            "version": BookSnapshot.VERSION,
+            "source_language": source_language,
+            "target_language": target_language,
+        }
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        self.temp_path: Path = snapshot_path.with_name(f"{snapshot_path.name}.tmp")
+        self.snapshot_file: TextIO = open(self.temp_path, "w", encoding="utf-8")
+        self.snapshot_file.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def write_page(self, page: Page) -> None:
+        for content in page.contents:
+            entry: dict[str, Any] = {
+                "hash": JobJournal.content_hash(content),
+                "translation": content.dump_translation() if content.status else None,
+            }
+            self.snapshot_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.page_count += 1
+
+    def close(self) -> Path:
+        self.snapshot_file.close()
+        os.replace(self.temp_path, self.output_file_path)
+        logger.info(f"保存翻译快照: {self.output_file_path}")
+        return self.output_file_path
+
+    def abort(self) -> None:
+        self.snapshot_file.close()
+        self.temp_path.unlink(missing_ok=True)
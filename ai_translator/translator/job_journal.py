@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.book.content import Content
+from ai_translator.book.page import Page
+
+
+class JobJournal:
+    """翻译任务日志，以追加写入的JSONL文件记录每段内容的翻译结果，用于中断后续跑。
+
+    文件第一行为任务信息，之后每行记录一段内容的翻译结果：
+    {"page": 页码索引, "content": 页内内容索引, "hash": 原文摘要, "translation": 翻译结果, "status": 是否成功}
+    """
+
+    def __init__(self, journal_path: Path, job_info: dict[str, Any], resume: bool = False) -> None:
+        """初始化任务日志。
+
+        Args:
+            journal_path: 日志文件路径。
+            job_info: 任务信息，例如PDF路径、源语言、目标语言和模型名称，续跑时必须与日志中的一致。
+            resume: 是否在已有日志的基础上续跑，否则清空已有日志。
+        """
+        self.journal_path: Path = journal_path
+        self.job_info: dict[str, Any] = job_info
+        self.records: dict[tuple[int, int], dict[str, Any]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+        if resume and journal_path.exists():
+            self._load()
+            self._file: TextIO = open(journal_path, "a", encoding="utf-8")
+        else:
+            journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(journal_path, "w", encoding="utf-8")
+            self._write_line({"job": job_info})
+
+    @classmethod
+    def content_hash(cls, content: Content) -> str:
+        """计算内容原文摘要，用于确认日志记录与当前解析结果对应同一段内容。
+
+        Args:
+            content: 内容对象。
+
+        Returns:
+            返回原文的SHA-1十六进制摘要。
+        """
+        return hashlib.sha1(str(content).encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        """读取已有日志。"""
+        with open(self.journal_path, "r", encoding="utf-8") as journal_file:
+            header: dict[str, Any] = json.loads(journal_file.readline())
+            if header.get("job") != self.job_info:
+                raise ValueError(f"任务信息与日志不一致，无法续跑: {header.get('job')} != {self.job_info}")
+            for line in journal_file:
+                try:
+                    record: dict[str, Any] = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程中断时最后一行可能只写入了一部分
+                    logger.warning(f"忽略不完整的日志记录: {line!r}")
+                    continue
+                self.records[(record["page"], record["content"])] = record
+        logger.info(f"读取任务日志{self.journal_path}，共{len(self.records)}条记录")
+
+    def _write_line(self, data: dict[str, Any]) -> None:
+        self._file.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def record(self, page_idx: int, content_idx: int, content: Content, translation: str) -> None:
+        """记录一段内容的翻译结果。
+
+        Args:
+            page_idx: 页码索引。
+            content_idx: 页内内容索引。
+            content: 已设置翻译结果的内容对象。
+            translation: 模型返回的原始翻译结果。
+        """
+        record: dict[str, Any] = {
+            "page": page_idx,
+            "content": content_idx,
+            "hash": self.content_hash(content),
+            "translation": translation,
+            "status": content.status,
+        }
+        with self._lock:
+            self.records[(page_idx, content_idx)] = record
+            self._write_line(record)
+
+    def restore_page(self, page_idx: int, page: Page) -> int:
+        """将日志中已成功翻译的结果写回页面。
+
+        Args:
+            page_idx: 页码索引。
+            page: 页面对象。
+
+        Returns:
+            返回恢复的内容数量。
+        """
+        restored: int = 0
+        for content_idx, content in enumerate(page.contents):
+            record: Optional[dict[str, Any]] = self.records.get((page_idx, content_idx))
+            if not record or not record["status"] or record["hash"] != self.content_hash(content):
+                continue
+            content.set_translation(record["translation"], record["status"])
+            restored += content.status
+        return restored
+
+    def restore(self, book: Book) -> int:
+        """将日志中已成功翻译的结果写回书籍。
+
+        Args:
+            book: 书籍对象。
+
+        Returns:
+            返回恢复的内容数量。
+        """
+        restored: int = 0
+        for page_idx, page in enumerate(book.pages):
+            restored += self.restore_page(page_idx, page)
+            book.update_page(page_idx, page)
+        logger.info(f"从任务日志恢复{restored}段翻译结果")
+        return restored
+
+    def close(self) -> None:
+        """关闭日志文件。"""
+        with self._lock:
+            self._file.close()
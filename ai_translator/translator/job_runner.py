@@ -0,0 +1,115 @@
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.utils.metrics import Metrics, metrics
+
+
+@dataclass(eq=False)
+class TranslationJob:
+    """后台翻译任务的状态，由任务线程更新，界面线程只读取。"""
+
+    job_id: str  # 任务ID
+    name: str  # 任务名称，例如上传的文件名
+    status: str = "running"  # 状态：running、done、failed
+    error: Optional[str] = None  # 失败原因
+    book: Optional[Book] = field(default=None, repr=False)  # 书籍对象，按顺序添加翻译完成的页面
+    total_pages: int = 0  # 总页数，读取PDF文件前为0
+    finished_pages: int = 0  # 按顺序翻译完成的页数，前`finished_pages`页可以安全读取
+    partial: dict[tuple[int, int], str] = field(default_factory=dict, repr=False)  # 流式翻译中各内容已收到的文本
+    page_progress: dict[int, tuple[int, int]] = field(default_factory=dict, repr=False)  # 翻译中各页的(已完成内容数, 内容数)
+    outputs: dict[str, Path] = field(default_factory=dict)  # 输出文件，键为文件格式
+    work_dirs: list[Path] = field(default_factory=list)  # 任务专用的上传和输出目录，清理任务时一并删除
+    metrics: Metrics = field(default_factory=Metrics, repr=False)  # 本任务的埋点统计，同时计入全局统计
+    info: dict[str, Any] = field(default_factory=dict, repr=False)  # 任务完成后的统计信息
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """任务是否仍在运行。"""
+        return self.status == "running"
+
+
+class JobRunner:
+    """在后台线程池中执行翻译任务，任务按ID登记，可以在任意会话或界面刷新后查询进度和结果。
+
+    同时执行的任务数不超过`max_jobs`，其余任务排队等待；完成超过`retention_seconds`秒的任务在提交新任务时清理，
+    同时删除其输出文件和专用目录。任务执行期间的埋点计入任务自己的`metrics`，不同任务的统计互不影响。
+    """
+
+    def __init__(self, max_jobs: int = 2, retention_seconds: float = 3600) -> None:
+        """初始化任务执行器。
+
+        Args:
+            max_jobs: 同时执行的最大任务数量。
+            retention_seconds: 已完成任务的保留时间（秒）。
+        """
+        if max_jobs < 1:
+            raise ValueError(f"任务数量必须大于0: {max_jobs}")
+        self.retention_seconds: float = retention_seconds
+        self.jobs: dict[str, TranslationJob] = {}
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+        self._lock: threading.Lock = threading.Lock()
+
+    def submit(self, name: str, run: Callable[[TranslationJob], None]) -> TranslationJob:
+        """提交翻译任务。
+
+        Args:
+            name: 任务名称。
+            run: 任务函数，接收任务状态对象并在执行过程中更新进度。
+
+        Returns:
+            返回任务状态对象。
+        """
+        job: TranslationJob = TranslationJob(uuid.uuid4().hex, name)
+        with self._lock:
+            self._prune()
+            self.jobs[job.job_id] = job
+        self._executor.submit(self._run, job, run)
+        metrics.incr("jobs_submitted")
+        logger.info(f"提交翻译任务{job.job_id}: {name}")
+        return job
+
+    def get(self, job_id: Optional[str]) -> Optional[TranslationJob]:
+        """查询任务。
+
+        Args:
+            job_id: 任务ID。
+
+        Returns:
+            返回任务状态对象，任务不存在或已清理时返回None。
+        """
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job: TranslationJob, run: Callable[[TranslationJob], None]) -> None:
+        try:
+            with job.metrics.activate():
+                run(job)
+            job.status = "done"
+            logger.info(f"翻译任务完成{job.job_id}: {job.name}")
+        except Exception as e:
+            logger.exception(f"翻译任务失败{job.job_id}: {job.name}")
+            job.error = str(e)
+            job.status = "failed"
+            metrics.incr("jobs_failed")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        deadline: float = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished_at and job.finished_at < deadline]:
+            job: TranslationJob = self.jobs.pop(job_id)
+            for output_path in job.outputs.values():
+                output_path.unlink(missing_ok=True)
+            for work_dir in job.work_dirs:
+                shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,139 @@
+import re
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Optional
+
+from ai_translator.book.content import Content, ContentType
+from ai_translator.utils.metrics import metrics
+from ai_translator.utils.token_estimator import estimate_tokens
+
+if TYPE_CHECKING:
+    from config import Config
+
+_SENTENCE_END_PATTERN: re.Pattern = re.compile(r"[.!?;。！？；](?:\s|$)")
+_WORD_PATTERN: re.Pattern = re.compile(r"[^\W\d_]")
+
+
+class ModelRouter:
+    """自动路由：按内容难度在快速模型和高质量模型之间分配翻译请求。
+
+    模型版本名称为`AUTO`时生效。短文本、纯数字和符号的文本以及单元格都很短的表格交给快速模型，
+    较长或包含多个句子的文本交给高质量模型，打包请求中只要有一段较难即整体交给高质量模型。
+    快速模型的响应未通过校验时（例如打包或表格JSON无法解析、译文为空），改用高质量模型重新请求。
+    每个模型的请求耗时见`llm_request.<模型>`计时区间，`report`汇总各模型的请求量、升级次数和耗时。
+    """
+
+    AUTO: str = "auto"  # 自动路由的模型版本名称
+
+    def __init__(self, fast_model: str = "GLM-3-Turbo", strong_model: str = "GLM-4", max_easy_tokens: int = 48) -> None:
+        """初始化模型路由。
+
+        Args:
+            fast_model: 快速模型版本名称。
+            strong_model: 高质量模型版本名称。
+            max_easy_tokens: 交给快速模型的文本或单元格的最大token数。
+        """
+        self.fast_model: str = fast_model
+        self.strong_model: str = strong_model
+        self.max_easy_tokens: int = max_easy_tokens
+        self.routed: dict[str, int] = defaultdict(int)
+        self.escalated: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: "Config") -> "ModelRouter":
+        """根据配置信息创建模型路由。
+
+        Args:
+            config: 配置信息。
+
+        Returns:
+            返回模型路由对象。
+        """
+        return cls(config.route_fast_model, config.route_strong_model, config.route_max_easy_tokens)
+
+    def is_hard(self, content: Content) -> bool:
+        """判断内容是否需要高质量模型翻译。
+
+        Args:
+            content: 内容对象。
+
+        Returns:
+            较难时返回True。
+        """
+        if content.content_type == ContentType.TABLE:
+            return any(estimate_tokens(cell) > self.max_easy_tokens for cell in content.translatable_cells())
+        text: str = str(content)
+        if not _WORD_PATTERN.search(text):
+            # 只有数字和符号的文本
+            return False
+        return estimate_tokens(text) > self.max_easy_tokens or len(_SENTENCE_END_PATTERN.findall(text.strip())) > 1
+
+    def select(self, hard: bool, model_name: str) -> str:
+        """确定请求使用的模型，不计入路由统计。
+
+        Args:
+            hard: 任务是否较难。
+            model_name: 调用方指定的模型版本名称。
+
+        Returns:
+            返回模型版本名称，未开启自动路由时原样返回。
+        """
+        if model_name != self.AUTO:
+            return model_name
+        return self.strong_model if hard else self.fast_model
+
+    def route(self, hard: bool, model_name: str) -> tuple[str, Optional[str]]:
+        """确定请求使用的模型并计入路由统计。
+
+        Args:
+            hard: 任务是否较难。
+            model_name: 调用方指定的模型版本名称。
+
+        Returns:
+            返回(请求使用的模型, 校验失败时升级使用的模型)，未开启自动路由或已经是高质量模型时不升级。
+        """
+        if model_name != self.AUTO:
+            return model_name, None
+        routed: str = self.select(hard, model_name)
+        with self._lock:
+            self.routed[routed] += 1
+        metrics.incr("routed_strong" if hard else "routed_fast")
+        return routed, None if hard else self.strong_model
+
+    def escalate(self, escalation: Optional[str]) -> Optional[str]:
+        """记录一次升级请求。
+
+        Args:
+            escalation: `route`返回的升级模型。
+
+        Returns:
+            返回升级使用的模型，不可升级时返回None。
+        """
+        if escalation is None:
+            return None
+        with self._lock:
+            self.escalated += 1
+        metrics.incr("route_escalations")
+        return escalation
+
+    def report(self) -> dict[str, Any]:
+        """汇总各模型的路由请求量和请求耗时，用于调整难度阈值，请求耗时取自当前任务的统计。
+
+        Returns:
+            返回可以序列化为JSON的统计数据。
+        """
+        spans: dict[str, dict[str, float]] = metrics.current().report()["spans"]
+        with self._lock:
+            routed: dict[str, int] = dict(self.routed)
+            escalated: int = self.escalated
+        models: dict[str, dict[str, Any]] = {}
+        for model_name in (self.fast_model, self.strong_model):
+            latency: dict[str, float] = spans.get(f"llm_request.{model_name}", {})
+            models[model_name] = {
+                "routed_tasks": routed.get(model_name, 0),
+                "requests": latency.get("count", 0),
+                "p50_seconds": latency.get("p50_seconds", 0.0),
+                "p95_seconds": latency.get("p95_seconds", 0.0),
+            }
+        return {"models": models, "escalations": escalated}
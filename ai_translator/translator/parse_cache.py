@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.book.page import Page
+from ai_translator.book.page_store import PageStore
+
+if TYPE_CHECKING:
+    from config import Config
+
+
+class ParseCache:
+    """PDF解析结果的磁盘缓存，以文件内容哈希和解析器版本作为键，文件改名或覆盖上传都不会命中旧结果。
+
+    缓存文件是压缩后逐页连续序列化的页面记录，以None结尾，写入和读取都逐页进行，配合页面存储使用时内存中只保留一页。
+    """
+
+    def __init__(self, cache_dir: Path, parser_version: str) -> None:
+        """初始化解析缓存。
+
+        Args:
+            cache_dir: 缓存目录。
+            parser_version: 解析器版本，解析逻辑变化后旧缓存自动失效。
+        """
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir: Path = cache_dir
+        self.parser_version: str = parser_version
+
+    @classmethod
+    def from_config(cls, config: "Config", parser_version: str) -> "ParseCache":
+        """根据配置信息创建解析缓存。
+
+        Args:
+            config: 配置信息。
+            parser_version: 解析器版本。
+
+        Returns:
+            返回解析缓存。
+        """
+        return cls(Path(config.parse_cache_dir), parser_version)
+
+    @classmethod
+    def file_hash(cls, pdf_file_path: str) -> str:
+        """计算文件内容的SHA-256摘要。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+
+        Returns:
+            返回十六进制摘要。
+        """
+        digest = hashlib.sha256()
+        with open(pdf_file_path, "rb") as pdf_file:
+            for chunk in iter(lambda: pdf_file.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def cache_path(self, pdf_file_path: str, page_count: Optional[int] = None) -> Path:
+        """计算缓存文件路径。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+
+        Returns:
+            返回缓存文件路径。
+        """
+        pages: str = str(page_count) if page_count else "all"
+        return self.cache_dir / f"{self.file_hash(pdf_file_path)}-v{self.parser_version}-{pages}.pages.gz"
+
+    def load(
+        self, pdf_file_path: str, page_count: Optional[int] = None, page_store: Optional[PageStore] = None
+    ) -> Optional[Book]:
+        """读取缓存的解析结果。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+            page_store: 页面存储，提供时每读取一页即转存到磁盘。
+
+        Returns:
+            命中时返回书籍对象，否则返回None。
+        """
+        cache_path: Path = self.cache_path(pdf_file_path, page_count)
+        if not cache_path.exists():
+            return None
+        # 相同内容的文件可能以不同路径上传
+        book: Book = Book(Path(pdf_file_path), page_store)
+        try:
+            for page in self.read_pages(cache_path):
+                book.add_page(page)
+        except Exception as e:
+            logger.warning(f"解析缓存损坏，重新解析: {cache_path}, {e}")
+            if page_store is not None:
+                # 已读入的页面作废，存储交给重新解析使用
+                page_store.clear()
+            return None
+        logger.info(f"解析缓存命中: {cache_path}")
+        return book
+
+    def iter_pages(self, pdf_file_path: str, page_count: Optional[int] = None) -> Optional[Iterator[Page]]:
+        """逐页读取缓存的解析结果，读取一页即返回一页。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+
+        Returns:
+            命中时返回页面迭代器，否则返回None。缓存损坏时迭代器在读到损坏处抛出异常。
+        """
+        cache_path: Path = self.cache_path(pdf_file_path, page_count)
+        if not cache_path.exists():
+            return None
+        logger.info(f"解析缓存命中: {cache_path}")
+        return self.read_pages(cache_path)
+
+    @classmethod
+    def read_pages(cls, cache_path: Path) -> Iterator[Page]:
+        """逐页读取缓存文件。
+
+        Args:
+            cache_path: 缓存文件路径。
+
+        Returns:
+            返回页面迭代器。
+        """
+        with gzip.open(cache_path, "rb") as cache_file:
+            # 缺少结尾记录的文件在读取时抛出EOFError，按损坏处理
+            page: Optional[Page] = pickle.load(cache_file)
+            while page is not None:
+                yield page
+                page = pickle.load(cache_file)
+
+    def discard(self, pdf_file_path: str, page_count: Optional[int] = None) -> None:
+        """删除损坏的缓存文件。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+        """
+        self.cache_path(pdf_file_path, page_count).unlink(missing_ok=True)
+
+    def record(self, pages: Iterable[Page], pdf_file_path: str, page_count: Optional[int] = None) -> Iterator[Page]:
+        """边解析边保存：逐页写入缓存并原样返回页面，全部页面读取完成后缓存才生效。
+
+        Args:
+            pages: 页面迭代器。
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+
+        Returns:
+            返回与输入相同的页面迭代器。
+        """
+        cache_path: Path = self.cache_path(pdf_file_path, page_count)
+        # 先写临时文件再替换，避免并发读取到写了一半的缓存，中途失败时不留下不完整的缓存
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with gzip.open(os.fdopen(fd, "wb"), "wb") as cache_file:
+                for page in pages:
+                    pickle.dump(page, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+                    yield page
+                pickle.dump(None, cache_file)
+            os.replace(temp_path, cache_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        logger.info(f"保存解析缓存: {cache_path}")
+
+    def save(self, book: Book, pdf_file_path: str, page_count: Optional[int] = None) -> Path:
+        """保存解析结果。
+
+        Args:
+            book: 书籍对象。
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+
+        Returns:
+            返回缓存文件路径。
+        """
+        for _ in self.record(book.pages, pdf_file_path, page_count):
+            pass
+        return self.cache_path(pdf_file_path, page_count)
@@ -1,32 +1,189 @@
+import itertools
+import math
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterable, Iterator, Optional
 
 import pdfplumber
-import streamlit as st
 from pdfplumber.page import Page as PdfPage
+from pdfplumber.table import Table as PdfTable
 from loguru import logger
 
 from ai_translator.book.book import Book
 from ai_translator.book.content import Content, ContentType, TableContent
 from ai_translator.book.page import Page
+from ai_translator.book.page_store import PageStore
 from ai_translator.translator.exceptions import PageOutOfRangeException
+from ai_translator.translator.parse_cache import ParseCache
+from ai_translator.utils.metrics import metrics
+
+
+BBox = tuple[float, float, float, float]
 
 
 class PDFParser:
 
+    VERSION: str = "3"  # 解析器版本，解析结果变化时递增，使旧的解析缓存失效
+    CHUNKS_PER_WORKER: int = 4  # 并行解析时每个进程平均分配的页码区间数量
+
     @classmethod
-    @st.cache_data
-    def parse_pdf(cls, pdf_file_path: str, page_count: Optional[int] = None) -> Book:
+    def parse_pdf(
+        cls,
+        pdf_file_path: str,
+        page_count: Optional[int] = None,
+        workers: int = 1,
+        cache: Optional[ParseCache] = None,
+        page_store: Optional[PageStore] = None,
+    ) -> Book:
         """解析PDF文件内容。
 
         Args:
             pdf_file_path: PDF文件路径。
             page_count: 解析页面数量。
+            workers: 解析进程数量，大于1时按页码区间分配给多个进程并行解析。
+            cache: 解析缓存，提供时优先读取相同文件内容的解析结果，未命中时边解析边逐页写入缓存。
+            page_store: 页面存储，提供时每解析或从缓存读取一页即转存到磁盘。
 
         Returns:
             返回一个Book对象。
         """
-        book: Book = Book(Path(pdf_file_path))
+        with metrics.span("parse_pdf"):
+            if cache is not None:
+                cached_book: Optional[Book] = cache.load(pdf_file_path, page_count, page_store)
+                if cached_book is not None:
+                    metrics.incr("parse_cache_hits")
+                    return cached_book
+
+            book: Book = Book(Path(pdf_file_path), page_store)
+            if workers > 1:
+                pages: Iterable[Page] = cls.parse_pages_parallel(pdf_file_path, page_count, workers)
+            else:
+                pages = cls.iter_pages(pdf_file_path, page_count)
+            if cache is not None:
+                pages = cache.record(pages, pdf_file_path, page_count)
+            for page in pages:
+                book.add_page(page)
+        metrics.incr("parsed_pages", len(book.pages))
+        return book
+
+    @classmethod
+    def parse_pages_parallel(cls, pdf_file_path: str, page_count: Optional[int] = None, workers: int = 2) -> list[Page]:
+        """使用进程池按页码区间并行解析PDF文件，结果与串行解析完全一致。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+            workers: 解析进程数量。
+
+        Returns:
+            按页码顺序排列的单页数据列表。
+        """
+        with pdfplumber.open(pdf_file_path) as pdf:
+            total_pages: int = len(pdf.pages)
+        if page_count is not None and page_count > total_pages:
+            raise PageOutOfRangeException(total_pages, page_count)
+        if page_count:
+            total_pages = page_count
+
+        # 区间数量多于进程数，避免个别页面较重的区间拖慢整体进度
+        chunk_size: int = max(1, math.ceil(total_pages / (workers * cls.CHUNKS_PER_WORKER)))
+        page_ranges: list[tuple[int, int]] = [
+            (start, min(start + chunk_size, total_pages)) for start in range(0, total_pages, chunk_size)
+        ]
+        logger.info(f"并行解析{total_pages}页，进程数: {workers}，区间数: {len(page_ranges)}")
+
+        pages: list[Page] = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures: list[Future] = [
+                executor.submit(cls.parse_page_range, pdf_file_path, start, end) for start, end in page_ranges
+            ]
+            for future in futures:
+                pages.extend(future.result())
+        return pages
+
+    @classmethod
+    def parse_page_range(cls, pdf_file_path: str, start: int, end: int) -> list[Page]:
+        """在当前进程中独立打开PDF文件并解析指定页码区间。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            start: 起始页码索引（包含）。
+            end: 结束页码索引（不包含）。
+
+        Returns:
+            返回区间内的单页数据列表。
+        """
+        pages: list[Page] = []
+        with pdfplumber.open(pdf_file_path) as pdf:
+            for pdf_page in pdf.pages[start:end]:
+                pages.append(cls.parse_page(pdf_page))
+                pdf_page.flush_cache()
+        return pages
+
+    @classmethod
+    def stream_pdf(
+        cls, pdf_file_path: str, page_count: Optional[int] = None, cache: Optional[ParseCache] = None
+    ) -> Iterator[Page]:
+        """逐页解析PDF文件，用于解析和翻译的流水线，首页不必等待整本书解析完成。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+            cache: 解析缓存，提供时优先逐页读取相同文件内容的解析结果，未命中时边解析边逐页写入缓存。
+                缓存读到中途发现损坏时删除缓存，从损坏处开始重新解析剩余页面。
+
+        Returns:
+            返回单页数据的迭代器。
+        """
+        cached_pages: Optional[Iterator[Page]] = cache.iter_pages(pdf_file_path, page_count) if cache else None
+        if cached_pages is None:
+            pages: Iterator[Page] = cls.iter_pages(pdf_file_path, page_count)
+            yield from pages if cache is None else cache.record(pages, pdf_file_path, page_count)
+            return
+
+        metrics.incr("parse_cache_hits")
+        read_pages: int = 0
+        try:
+            for page in cached_pages:
+                yield page
+                read_pages += 1
+        except Exception as e:
+            logger.warning(f"解析缓存损坏，从第{read_pages + 1}页开始重新解析: {e}")
+            cache.discard(pdf_file_path, page_count)
+            yield from itertools.islice(cls.iter_pages(pdf_file_path, page_count), read_pages, None)
+
+    @classmethod
+    def count_pages(cls, pdf_file_path: str, page_count: Optional[int] = None) -> int:
+        """读取需要解析的页数，不解析页面内容。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+
+        Returns:
+            返回页数。
+        """
+        if not Path(pdf_file_path).exists():
+            raise FileNotFoundError(f"PDF文件不存在: {pdf_file_path}")
+
+        with pdfplumber.open(pdf_file_path) as pdf:
+            if page_count is not None and page_count > len(pdf.pages):
+                raise PageOutOfRangeException(len(pdf.pages), page_count)
+            return page_count or len(pdf.pages)
+
+    @classmethod
+    def iter_pages(cls, pdf_file_path: str, page_count: Optional[int] = None) -> Iterator[Page]:
+        """逐页解析PDF文件内容，每解析完一页立即返回，不在内存中保留整本书。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页面数量。
+
+        Returns:
+            返回单页数据的迭代器。
+        """
+        if not Path(pdf_file_path).exists():
+            raise FileNotFoundError(f"PDF文件不存在: {pdf_file_path}")
 
         with pdfplumber.open(pdf_file_path) as pdf:
             if page_count is not None and page_count > len(pdf.pages):
@@ -35,34 +192,68 @@ class PDFParser:
             pages_to_parse: list[PdfPage] = pdf.pages[:page_count] if page_count else pdf.pages
 
             for pdf_page in pages_to_parse:
-                page: Page = Page()
-
-                # Store the original text content
-                raw_text: str = pdf_page.extract_text()
-                tables: list[list[list[Optional[str]]]] = pdf_page.extract_tables()
-
-                # Remove each cell's content from the original text
-                for table_data in tables:
-                    for row in table_data:
-                        for cell in row:
-                            raw_text = raw_text.replace(cell, "", 1)
-
-                # Handling text
-                if raw_text:
-                    # Remove empty lines and leading/trailing whitespaces
-                    raw_text_lines: list[str] = raw_text.splitlines()
-                    cleaned_raw_text_lines: list[str] = [line.strip() for line in raw_text_lines if line.strip()]
-                    cleaned_raw_text: str = "\n".join(cleaned_raw_text_lines)
-
-                    text_content: Content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
-                    page.add_content(text_content)
-                    logger.debug(f"[raw_text]\n {cleaned_raw_text}")
-
-                # Handling tables
-                if tables:
-                    for table in tables:
-                        table_content: TableContent = TableContent(table)
-                        page.add_content(table_content)
-                        logger.debug(f"[table]\n{table_content.original}")
-                book.add_page(page)
-        return book
+                with metrics.span("parse_page"):
+                    page: Page = cls.parse_page(pdf_page)
+                # 释放pdfplumber缓存的页面对象，避免内存随页数增长
+                pdf_page.flush_cache()
+                yield page
+
+    @classmethod
+    def parse_page(cls, pdf_page: PdfPage) -> Page:
+        """解析单页PDF内容。
+
+        Args:
+            pdf_page: pdfplumber页面对象。
+
+        Returns:
+            返回单页数据。
+        """
+        page: Page = Page()
+
+        # Locate tables first, then extract text only from objects outside the table areas
+        pdf_tables: list[PdfTable] = pdf_page.find_tables()
+        tables: list[list[list[Optional[str]]]] = [pdf_table.extract() for pdf_table in pdf_tables]
+        table_bboxes: list[BBox] = [pdf_table.bbox for pdf_table in pdf_tables]
+        text_page: PdfPage = pdf_page
+        if table_bboxes:
+            text_page = pdf_page.filter(lambda obj: cls.is_outside_bboxes(obj, table_bboxes))
+        raw_text: str = text_page.extract_text()
+
+        # Handling text
+        if raw_text:
+            # Remove empty lines and leading/trailing whitespaces
+            raw_text_lines: list[str] = raw_text.splitlines()
+            cleaned_raw_text_lines: list[str] = [line.strip() for line in raw_text_lines if line.strip()]
+            cleaned_raw_text: str = "\n".join(cleaned_raw_text_lines)
+
+            text_content: Content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
+            page.add_content(text_content)
+            logger.debug("[raw_text]\n {}", cleaned_raw_text)
+
+        # Handling tables
+        if tables:
+            for table in tables:
+                table_content: TableContent = TableContent(table)
+                page.add_content(table_content)
+                logger.opt(lazy=True).debug("[table]\n{}", lambda: table_content.original)
+        return page
+
+    @classmethod
+    def is_outside_bboxes(cls, obj: dict[str, Any], bboxes: list[BBox]) -> bool:
+        """判断页面对象是否位于所有区域之外，以对象中心点为准。
+
+        Args:
+            obj: pdfplumber页面对象，例如字符。
+            bboxes: 区域列表，每项为(x0, top, x1, bottom)。
+
+        Returns:
+            对象中心不在任何区域内时返回True。
+        """
+        if "x0" not in obj or "top" not in obj:
+            return True
+        h_mid: float = (obj["x0"] + obj["x1"]) / 2
+        v_mid: float = (obj["top"] + obj["bottom"]) / 2
+        for x0, top, x1, bottom in bboxes:
+            if x0 <= h_mid < x1 and top <= v_mid < bottom:
+                return False
+        return True
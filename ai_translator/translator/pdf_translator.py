@@ -1,48 +1,306 @@
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional
-
-from loguru import logger
+from typing import Iterator, Optional
 
 from ai_translator.book.book import Book
+from ai_translator.book.page import Page
+from ai_translator.book.page_store import PageStore
 from ai_translator.llm.llm_base import LLMBase
+from ai_translator.translator.batch_job import BatchJob
+from ai_translator.translator.boilerplate import BoilerplateDetector
+from ai_translator.translator.book_snapshot import BookSnapshot, SnapshotWriter
+from ai_translator.translator.job_journal import JobJournal
+from ai_translator.translator.model_router import ModelRouter
+from ai_translator.translator.parse_cache import ParseCache
 from ai_translator.translator.pdf_parser import PDFParser
-from ai_translator.translator.writer import Writer
+from ai_translator.translator.segmenter import Segmenter
+from ai_translator.translator.translation_engine import TranslationEngine
+from ai_translator.translator.translation_memory import TranslationMemory
+from ai_translator.translator.writer import MultiBookWriter, Writer
 
 
 class PDFTranslator:
-    def __init__(self, model: LLMBase):
+    def __init__(
+        self,
+        model: LLMBase,
+        max_workers: int = 4,
+        pack_token_budget: Optional[int] = None,
+        parse_workers: int = 1,
+        parse_cache: Optional[ParseCache] = None,
+        segmenter: Optional[Segmenter] = None,
+        boilerplate: Optional[BoilerplateDetector] = None,
+        memory: Optional[TranslationMemory] = None,
+        spill_pages: bool = False,
+        router: Optional[ModelRouter] = None,
+    ):
         self.model: LLMBase = model
+        self.parse_workers: int = parse_workers
+        self.parse_cache: Optional[ParseCache] = parse_cache
+        self.segmenter: Optional[Segmenter] = segmenter
+        self.boilerplate: Optional[BoilerplateDetector] = boilerplate
+        self.spill_pages: bool = spill_pages
+        self.engine: TranslationEngine = TranslationEngine(
+            model, max_workers, pack_token_budget, memory, router
+        )
         self.writer: Writer = Writer()
         self.book: Optional[Book] = None
 
     def translate_pdf(
         self,
         pdf_file_path: str,
+        source_language: Optional[str] = None,
+        target_language: Optional[str] = None,
+        output_file_path: Optional[str] = None,
+        page_count: Optional[int] = None,
+        model_name: str = "GLM-4",
+        resume: bool = False,
+        revise_from: Optional[str] = None,
+    ) -> Path:
+        """翻译PDF文件，并在输出文件旁保存翻译快照。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            source_language: 源语言。
+            target_language: 目标语言。
+            output_file_path: 输出文件路径。
+            page_count: 翻译页数。
+            model_name: 模型版本名称。
+            resume: 是否根据任务日志续跑，只翻译上次未完成的内容。
+            revise_from: 上一版本文档的翻译快照路径，提供时未变化的内容直接复用译文，只翻译修改和新增的内容。
+
+        Returns:
+            返回文件保存路径。
+        """
+        source_language = source_language or "英语"
+        target_language = target_language or "中文"
+        output_path: Path = self.resolve_output_path(pdf_file_path, output_file_path)
+        self.book = self.load_book(pdf_file_path, page_count, self.spill_pages)
+        if revise_from:
+            BookSnapshot.load(Path(revise_from)).apply(self.book, source_language, target_language)
+
+        journal: JobJournal = self.open_journal(
+            output_path, pdf_file_path, source_language, target_language, page_count, model_name, resume
+        )
+        try:
+            self.engine.translate_book(self.book, source_language, target_language, model_name, journal)
+        finally:
+            journal.close()
+
+        self.writer.save_translated_book(self.book, output_path)
+        BookSnapshot.save(self.book, self.snapshot_path(output_path), source_language, target_language)
+        return output_path
+
+    def export_batch(
+        self,
+        pdf_file_path: str,
+        requests_file_path: str,
+        source_language: Optional[str] = None,
+        target_language: Optional[str] = None,
+        page_count: Optional[int] = None,
+        model_name: str = "GLM-4",
+    ) -> int:
+        """将PDF文件的全部翻译请求导出为批量接口的请求文件。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            requests_file_path: 请求文件路径。
+            source_language: 源语言。
+            target_language: 目标语言。
+            page_count: 翻译页数。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回导出的请求数量。
+        """
+        source_language = source_language or "英语"
+        target_language = target_language or "中文"
+        self.book = self.load_book(pdf_file_path, page_count)
+        return BatchJob(self.engine).export(
+            self.book, source_language, target_language, model_name, Path(requests_file_path)
+        )
+
+    def translate_pdf_from_batch(
+        self,
+        pdf_file_path: str,
+        results_file_path: str,
+        source_language: Optional[str] = None,
+        target_language: Optional[str] = None,
+        output_file_path: Optional[str] = None,
+        page_count: Optional[int] = None,
+        model_name: str = "GLM-4",
+        resume: bool = False,
+    ) -> Path:
+        """使用批量接口的结果文件完成翻译并输出，并在输出文件旁保存翻译快照，参数需要与导出请求时相同。
+
+        没有批量结果的内容保持未翻译，并记录在任务日志中，之后可以通过`resume`续跑在线翻译。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            results_file_path: 批量结果文件路径。
+            source_language: 源语言。
+            target_language: 目标语言。
+            output_file_path: 输出文件路径。
+            page_count: 翻译页数。
+            model_name: 模型版本名称。
+            resume: 是否在已有任务日志的基础上写回结果。
+
+        Returns:
+            返回文件保存路径。
+        """
+        source_language = source_language or "英语"
+        target_language = target_language or "中文"
+        output_path: Path = self.resolve_output_path(pdf_file_path, output_file_path)
+        self.book = self.load_book(pdf_file_path, page_count)
+
+        journal: JobJournal = self.open_journal(
+            output_path, pdf_file_path, source_language, target_language, page_count, model_name, resume
+        )
+        try:
+            BatchJob(self.engine).ingest(
+                self.book, source_language, target_language, model_name, Path(results_file_path), journal
+            )
+        finally:
+            journal.close()
+
+        self.writer.save_translated_book(self.book, output_path)
+        BookSnapshot.save(self.book, self.snapshot_path(output_path), source_language, target_language)
+        return output_path
+
+    def load_book(self, pdf_file_path: str, page_count: Optional[int] = None, spill_pages: bool = False) -> Book:
+        """解析PDF文件，并拆分跨页重复行和切分长文本。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            page_count: 解析页数。
+            spill_pages: 是否将页面暂存到磁盘，内存中只保留翻译窗口内的页面。
+
+        Returns:
+            返回书籍对象。
+        """
+        page_store: Optional[PageStore] = PageStore() if spill_pages else None
+        book: Book = PDFParser.parse_pdf(pdf_file_path, page_count, self.parse_workers, self.parse_cache, page_store)
+        if self.boilerplate is not None:
+            self.boilerplate.process_book(book)
+        if self.segmenter is not None:
+            self.segmenter.segment_book(book)
+        return book
+
+    def translate_pdf_streaming(
+        self,
+        pdf_file_path: str,
+        source_language: Optional[str] = None,
         target_language: Optional[str] = None,
         output_file_path: Optional[str] = None,
         page_count: Optional[int] = None,
-    ) -> None:
-        """翻译PDF文件。
+        model_name: str = "GLM-4",
+        window: int = 8,
+        resume: bool = False,
+    ) -> Path:
+        """以解析、翻译、写入流水线的方式翻译PDF文件，内存占用只与页面窗口大小有关，翻译快照与输出文件同步逐页写入。
 
         Args:
             pdf_file_path: PDF文件路径。
+            source_language: 源语言。
             target_language: 目标语言。
             output_file_path: 输出文件路径。
             page_count: 翻译页数。
+            model_name: 模型版本名称。
+            window: 同时处理的最大页面数量。
+            resume: 是否根据任务日志续跑，只翻译上次未完成的内容。
+
+        Returns:
+            返回文件保存路径。
+        """
+        source_language = source_language or "英语"
+        target_language = target_language or "中文"
+        output_path: Path = self.resolve_output_path(pdf_file_path, output_file_path)
+
+        journal: JobJournal = self.open_journal(
+            output_path, pdf_file_path, source_language, target_language, page_count, model_name, resume
+        )
+        try:
+            with ExitStack() as stack:
+                # 快照写入器创建失败时，已创建的输出文件写入器也会放弃写入
+                book_writer: MultiBookWriter = MultiBookWriter(
+                    [
+                        stack.enter_context(self.writer.open_book_writer(output_path)),
+                        stack.enter_context(
+                            SnapshotWriter(self.snapshot_path(output_path), source_language, target_language)
+                        ),
+                    ]
+                )
+                pages: Iterator[Page] = PDFParser.stream_pdf(pdf_file_path, page_count, self.parse_cache)
+                if self.boilerplate is not None:
+                    pages = self.boilerplate.process_pages(pages, max(window, 32))
+                if self.segmenter is not None:
+                    pages = self.segmenter.segment_pages(pages)
+                page: Page
+                for page in self.engine.translate_pages(
+                    pages, source_language, target_language, model_name, window, journal
+                ):
+                    book_writer.write_page(page)
+        finally:
+            journal.close()
+        return output_path
+
+    @classmethod
+    def resolve_output_path(cls, pdf_file_path: str, output_file_path: Optional[str] = None) -> Path:
+        """确定输出文件路径，未指定时输出到PDF文件同目录下。
+
+        Args:
+            pdf_file_path: PDF文件路径。
+            output_file_path: 输出文件路径。
+
+        Returns:
+            返回输出文件路径。
+        """
+        if output_file_path:
+            return Path(output_file_path)
+        return Path(pdf_file_path).parent / f"{Path(pdf_file_path).stem}_translated.pdf"
+
+    @classmethod
+    def snapshot_path(cls, output_path: Path) -> Path:
+        """翻译快照路径，保存在输出文件旁边。
+
+        Args:
+            output_path: 输出文件路径。
+
+        Returns:
+            返回快照文件路径。
+        """
+        return output_path.with_name(f"{output_path.name}.snapshot.jsonl")
+
+    @classmethod
+    def open_journal(
+        cls,
+        output_path: Path,
+        pdf_file_path: str,
+        source_language: str,
+        target_language: str,
+        page_count: Optional[int],
+        model_name: str,
+        resume: bool,
+    ) -> JobJournal:
+        """打开与输出文件对应的任务日志。
+
+        Args:
+            output_path: 输出文件路径，日志保存在其旁边。
+            pdf_file_path: PDF文件路径。
+            source_language: 源语言。
+            target_language: 目标语言。
+            page_count: 翻译页数。
+            model_name: 模型版本名称。
+            resume: 是否续跑。
+
+        Returns:
+            返回任务日志。
         """
-        if not target_language:
-            target_language = "中文"
-        self.book = PDFParser.parse_pdf(pdf_file_path, page_count)
-
-        for page_idx, page in enumerate(self.book.pages):
-            for content_idx, content in enumerate(page.contents):
-                logger.debug(content.content_type)
-                prompt: str = self.model.translate_prompt(content, target_language)
-                logger.debug(prompt)
-                translation: str
-                status: bool
-                translation, status = self.model.make_request(prompt)
-                logger.info(translation)
-                self.book.pages[page_idx].contents[content_idx].set_translation(translation, status)
-
-        self.writer.save_translated_book(self.book, Path(output_file_path))
+        journal_path: Path = output_path.with_name(f"{output_path.name}.journal.jsonl")
+        job_info: dict = {
+            "pdf_file_path": str(Path(pdf_file_path).resolve()),
+            "source_language": source_language,
+            "target_language": target_language,
+            "page_count": page_count,
+            "model_name": model_name,
+        }
+        return JobJournal(journal_path, job_info, resume)
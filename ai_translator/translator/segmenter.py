@@ -0,0 +1,187 @@
+import re
+from typing import Iterable, Iterator
+
+from ai_translator.book.book import Book
+from ai_translator.book.content import Content, ContentType
+from ai_translator.book.page import Page
+from ai_translator.utils.token_estimator import estimate_tokens
+
+# 句末标点，后面可以断句
+_SENTENCE_END_PATTERN: re.Pattern = re.compile(r"(?<=[.!?;。！？；])\s+|(?<=[。！？；])")
+_CJK_SENTENCE_END_CHARS: tuple[str, ...] = ("。", "！", "？", "；")
+_LINE_END_CHARS: tuple[str, ...] = tuple(".!?:;。！？：；\"'”’)）")
+
+
+class Segmenter:
+    """按token预算切分页面文本，在段落和句子边界处断开，并合并过短的片段。
+
+    切分后的文本片段依次作为独立的文本内容放回页面原来的位置，翻译完成后按顺序输出即还原为整页译文。
+    """
+
+    def __init__(self, token_budget: int = 800, min_tokens: int = 64) -> None:
+        """初始化切分器。
+
+        Args:
+            token_budget: 每个片段的token上限。
+            min_tokens: 片段的最少token数，更短的片段会与相邻片段合并。
+        """
+        if token_budget < 1:
+            raise ValueError(f"token预算必须大于0: {token_budget}")
+        self.token_budget: int = token_budget
+        self.min_tokens: int = min(min_tokens, token_budget)
+
+    @classmethod
+    def split_paragraphs(cls, text: str) -> list[str]:
+        """将PDF提取的逐行文本还原为段落，以句末标点结尾的行视为段落结束。
+
+        Args:
+            text: 页面文本，每行对应PDF中的一行。
+
+        Returns:
+            返回段落列表，段落内保留原始换行。
+        """
+        paragraphs: list[str] = []
+        lines: list[str] = []
+        for line in text.split("\n"):
+            lines.append(line)
+            if line.rstrip().endswith(_LINE_END_CHARS):
+                paragraphs.append("\n".join(lines))
+                lines = []
+        if lines:
+            paragraphs.append("\n".join(lines))
+        return paragraphs
+
+    def split_oversized(self, paragraph: str) -> list[str]:
+        """将超出预算的段落按句子切分，单句仍超出预算时按字符数硬切。
+
+        Args:
+            paragraph: 段落文本。
+
+        Returns:
+            返回不超过预算的片段列表。
+        """
+        pieces: list[str] = []
+        for sentence in _SENTENCE_END_PATTERN.split(paragraph):
+            if not sentence:
+                continue
+            tokens: int = estimate_tokens(sentence)
+            if tokens <= self.token_budget:
+                pieces.append(sentence)
+                continue
+            pieces.extend(self.split_by_length(sentence, max(1, len(sentence) * self.token_budget // tokens)))
+        return pieces
+
+    @classmethod
+    def split_by_length(cls, sentence: str, max_chars: int) -> list[str]:
+        """按字符数切分超长句子，尽量在空白处断开以免截断单词。
+
+        Args:
+            sentence: 句子文本。
+            max_chars: 每段最大字符数。
+
+        Returns:
+            返回切分后的片段列表。
+        """
+        pieces: list[str] = []
+        start: int = 0
+        while len(sentence) - start > max_chars:
+            end: int = start + max_chars
+            space: int = max(sentence.rfind(" ", start + 1, end), sentence.rfind("\n", start + 1, end))
+            if space > start:
+                end = space
+            pieces.append(sentence[start:end])
+            start = end + 1 if sentence[end].isspace() else end
+        pieces.append(sentence[start:])
+        return pieces
+
+    def split_text(self, text: str) -> list[str]:
+        """将文本切分为不超过token预算的片段。
+
+        Args:
+            text: 待切分文本。
+
+        Returns:
+            返回按原文顺序排列的片段列表。
+        """
+        if estimate_tokens(text) <= self.token_budget:
+            return [text]
+
+        units: list[tuple[str, str]] = []  # (片段, 与前一片段的连接符)
+        for paragraph in self.split_paragraphs(text):
+            if estimate_tokens(paragraph) <= self.token_budget:
+                units.append((paragraph, "\n"))
+            else:
+                pieces: list[str] = self.split_oversized(paragraph)
+                units.append((pieces[0], "\n"))
+                for previous, piece in zip(pieces, pieces[1:]):
+                    units.append((piece, "" if previous.endswith(_CJK_SENTENCE_END_CHARS) else " "))
+
+        chunks: list[str] = []
+        chunk: str = ""
+        chunk_tokens: int = 0
+        for unit, separator in units:
+            unit_tokens: int = estimate_tokens(unit)
+            if chunk and chunk_tokens + unit_tokens > self.token_budget:
+                chunks.append(chunk)
+                chunk, chunk_tokens = "", 0
+            chunk = f"{chunk}{separator}{unit}" if chunk else unit
+            chunk_tokens += unit_tokens
+        if chunk:
+            # 末尾的碎片并入前一个片段，前一片段允许略微超出预算
+            if chunks and chunk_tokens < self.min_tokens:
+                chunks[-1] = f"{chunks[-1]}\n{chunk}"
+            else:
+                chunks.append(chunk)
+        return chunks
+
+    def segment_page(self, page: Page) -> int:
+        """切分页面中的文本内容，切分后的片段替换原内容。
+
+        Args:
+            page: 页面对象。
+
+        Returns:
+            返回切分后页面新增的内容数量。
+        """
+        contents: list[Content] = []
+        for content in page.contents:
+            if content.content_type != ContentType.TEXT or content.status:
+                contents.append(content)
+                continue
+            chunks: list[str] = self.split_text(str(content))
+            if len(chunks) == 1:
+                # 无需切分的内容保留原对象，以免丢失重复行标记等属性
+                contents.append(content)
+                continue
+            contents.extend(Content(ContentType.TEXT, chunk) for chunk in chunks)
+        added: int = len(contents) - len(page.contents)
+        page.contents = contents
+        return added
+
+    def segment_book(self, book: Book) -> int:
+        """切分整本书籍中的文本内容。
+
+        Args:
+            book: 书籍对象。
+
+        Returns:
+            返回切分后新增的内容数量。
+        """
+        added: int = 0
+        for page_idx, page in enumerate(book.pages):
+            added += self.segment_page(page)
+            book.update_page(page_idx, page)
+        return added
+
+    def segment_pages(self, pages: Iterable[Page]) -> Iterator[Page]:
+        """逐页切分文本内容，用于解析和翻译的流水线。
+
+        Args:
+            pages: 页面迭代器。
+
+        Returns:
+            返回切分后的页面迭代器。
+        """
+        for page in pages:
+            self.segment_page(page)
+            yield page
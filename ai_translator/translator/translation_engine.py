@@ -0,0 +1,801 @@
+import contextvars
+import json
+import queue
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Union
+
+from loguru import logger
+
+from ai_translator.book.book import Book
+from ai_translator.book.content import Content, ContentType, TableContent
+from ai_translator.book.page import Page
+from ai_translator.llm.llm_base import LLMBase
+from ai_translator.translator.boilerplate import BoilerplateDetector, BoilerplateMemo
+from ai_translator.translator.job_journal import JobJournal
+from ai_translator.translator.model_router import ModelRouter
+from ai_translator.translator.translation_memory import MemoryMatch, TranslationMemory
+from ai_translator.utils.metrics import metrics
+from ai_translator.utils.token_estimator import estimate_tokens
+
+
+@dataclass
+class TranslationTask:
+    """单个翻译请求任务，可能对应书籍中的一个或多个内容槽位。"""
+
+    slots: list[tuple[int, int]]  # 内容槽位列表，每项为(页码索引, 页内内容索引)
+    prompt: str  # 翻译Prompt
+    fallback_prompts: list[str] = field(default_factory=list)  # 打包任务中每个内容单独翻译的Prompt
+    template: Optional[str] = None  # 跨页重复行任务的原文，其余重复内容复用该原文的译文
+    duplicates: list[tuple[tuple[int, int], str, str]] = field(default_factory=list)  # 复用译文的(槽位, 原文, Prompt)
+    cells: list[str] = field(default_factory=list)  # 表格任务中去重后的待翻译单元格
+    cell_batches: list[tuple[int, str]] = field(default_factory=list)  # 表格任务每批单元格的(起始索引, 打包Prompt)
+    hard: bool = False  # 自动路由时是否交给高质量模型
+
+    @property
+    def packed(self) -> bool:
+        """是否为多段打包任务。"""
+        return len(self.fallback_prompts) > 0
+
+    @property
+    def all_slots(self) -> list[tuple[int, int]]:
+        """任务结果对应的全部槽位，包括复用译文的重复内容。"""
+        return self.slots + [slot for slot, _, _ in self.duplicates]
+
+
+@dataclass
+class StreamUpdate:
+    """流式翻译的进度通知。"""
+
+    page_idx: int  # 页码索引
+    content_idx: Optional[int] = None  # 页内内容索引，页面完成的通知为None
+    delta: Optional[str] = None  # 新收到的增量文本，内容完成的通知为None
+    page: Optional[Page] = None  # 翻译完成的页面，只在页面完成的通知中提供
+
+
+class TranslationEngine:
+    """并发翻译引擎。
+
+    使用线程池并发发送翻译请求，同时在途的请求数量不超过`max_workers`，
+    翻译结果按照(页码, 内容)索引写回对应的`Content`，因此输出顺序与串行翻译完全一致。
+    开启打包后，连续的短文本会在token预算内合并为一次请求。
+    带有`boilerplate_key`的跨页重复行只翻译一次，其余重复内容复用译文。
+    提供翻译记忆时，与历史原文仅数字不同的文本直接复用译文，相似的文本将历史译文作为参考单独请求。
+    模型版本名称为`ModelRouter.AUTO`时，每个任务按内容难度交给快速模型或高质量模型。
+    """
+
+    MAX_PACKED_SEGMENTS: int = 32  # 单次打包请求的最大文本段数
+    MAX_TABLE_CELLS: int = 128  # 表格单次请求的最大单元格数
+    TABLE_TOKEN_BUDGET: int = 1024  # 未开启打包时表格单次请求的单元格token预算
+    SPILL_WINDOW: int = 16  # 页面保存在磁盘上时同时读入内存的最大页面数量
+
+    def __init__(
+        self,
+        model: LLMBase,
+        max_workers: int = 4,
+        pack_token_budget: Optional[int] = None,
+        memory: Optional[TranslationMemory] = None,
+        router: Optional[ModelRouter] = None,
+    ) -> None:
+        """初始化翻译引擎。
+
+        Args:
+            model: 翻译模型。
+            max_workers: 最大并发请求数量。
+            pack_token_budget: 打包请求的待翻译文本token预算，为空或0表示不打包。
+            memory: 翻译记忆，为空表示不使用。
+            router: 自动路由使用的模型路由，为空时使用默认配置。
+        """
+        if max_workers < 1:
+            raise ValueError(f"并发数量必须大于0: {max_workers}")
+        self.model: LLMBase = model
+        self.max_workers: int = max_workers
+        self.pack_token_budget: Optional[int] = pack_token_budget
+        self.memory: Optional[TranslationMemory] = memory
+        self.router: ModelRouter = router or ModelRouter()
+
+    def plan(self, book: Book, source_language: str, target_language: str) -> list[TranslationTask]:
+        """生成书籍的翻译任务列表。
+
+        Args:
+            book: 书籍对象。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            按书籍顺序排列的翻译任务列表。
+        """
+        items: Iterator[tuple[int, int, Content]] = (
+            (page_idx, content_idx, content)
+            for page_idx, page in enumerate(book.pages)
+            for content_idx, content in enumerate(page.contents)
+        )
+        return self.plan_contents(items, source_language, target_language)
+
+    def plan_contents(
+        self,
+        items: Iterable[tuple[int, int, Content]],
+        source_language: str,
+        target_language: str,
+        memo: Optional[BoilerplateMemo] = None,
+    ) -> list[TranslationTask]:
+        """为一组内容生成翻译任务，开启打包时合并相邻的文本内容。
+
+        Args:
+            items: 待翻译内容，每项为(页码索引, 页内内容索引, 内容)。
+            source_language: 源语言。
+            target_language: 目标语言。
+            memo: 已完成的重复行译文，命中的内容直接套用译文，不再生成任务。
+
+        Returns:
+            按内容顺序排列的翻译任务列表。
+        """
+        tasks: list[TranslationTask] = []
+        templates: dict[str, TranslationTask] = {}
+        batch: list[tuple[int, int, Content]] = []
+        batch_tokens: int = 0
+
+        def flush() -> None:
+            nonlocal batch, batch_tokens
+            if batch:
+                tasks.append(self._make_task(batch, source_language, target_language))
+            batch = []
+            batch_tokens = 0
+
+        for page_idx, content_idx, content in items:
+            # 已经翻译成功的内容（例如从任务日志恢复的内容）不再重复翻译
+            if content.status:
+                continue
+            if content.boilerplate_key is not None:
+                if self.reuse_memo(content, memo):
+                    continue
+                prompt: str = self.model.translate_prompt(content, source_language, target_language)
+                template_task: Optional[TranslationTask] = templates.get(content.boilerplate_key)
+                if template_task is not None:
+                    template_task.duplicates.append(((page_idx, content_idx), str(content), prompt))
+                    continue
+                template_task = TranslationTask(
+                    [(page_idx, content_idx)], prompt, template=str(content), hard=self.router.is_hard(content)
+                )
+                templates[content.boilerplate_key] = template_task
+                tasks.append(template_task)
+                continue
+            if self.memory is not None and content.content_type == ContentType.TEXT:
+                reference_prompt: Optional[str] = self.apply_memory(content, source_language, target_language)
+                if content.status:
+                    continue
+                if reference_prompt is not None:
+                    # 带参考译文的请求单独发送，不参与打包
+                    tasks.append(
+                        TranslationTask([(page_idx, content_idx)], reference_prompt, hard=self.router.is_hard(content))
+                    )
+                    continue
+            if content.content_type == ContentType.TABLE:
+                table_task: Optional[TranslationTask] = self._make_table_task(
+                    page_idx, content_idx, content, source_language, target_language
+                )
+                if table_task is not None:
+                    tasks.append(table_task)
+                continue
+            if not self.pack_token_budget or content.content_type != ContentType.TEXT:
+                prompt = self.model.translate_prompt(content, source_language, target_language)
+                tasks.append(TranslationTask([(page_idx, content_idx)], prompt, hard=self.router.is_hard(content)))
+                continue
+
+            tokens: int = estimate_tokens(str(content))
+            if batch and (batch_tokens + tokens > self.pack_token_budget or len(batch) >= self.MAX_PACKED_SEGMENTS):
+                flush()
+            batch.append((page_idx, content_idx, content))
+            batch_tokens += tokens
+        flush()
+        return tasks
+
+    def _make_task(
+        self, batch: list[tuple[int, int, Content]], source_language: str, target_language: str
+    ) -> TranslationTask:
+        """将一组文本内容生成为翻译任务，多于一段时打包为一次请求。
+
+        Args:
+            batch: 待翻译内容列表，每项为(页码索引, 页内内容索引, 内容)。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            返回翻译任务。
+        """
+        slots: list[tuple[int, int]] = [(page_idx, content_idx) for page_idx, content_idx, _ in batch]
+        prompts: list[str] = [
+            self.model.translate_prompt(content, source_language, target_language) for _, _, content in batch
+        ]
+        hard: bool = any(self.router.is_hard(content) for _, _, content in batch)
+        if len(batch) == 1:
+            return TranslationTask(slots, prompts[0], hard=hard)
+        texts: list[str] = [str(content) for _, _, content in batch]
+        return TranslationTask(
+            slots, self.model.make_batch_prompt(texts, source_language, target_language), prompts, hard=hard
+        )
+
+    def _make_table_task(
+        self, page_idx: int, content_idx: int, content: TableContent, source_language: str, target_language: str
+    ) -> Optional[TranslationTask]:
+        """将表格中去重后的待翻译单元格分批打包为翻译任务，数字、日期和空白单元格不发送给模型。
+
+        Args:
+            page_idx: 页码索引。
+            content_idx: 页内内容索引。
+            content: 表格内容。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            返回翻译任务，表格没有需要翻译的单元格时直接写回原表并返回None。
+        """
+        cells: list[str] = content.translatable_cells()
+        if not cells:
+            content.set_translation("{}", True)
+            return None
+
+        budget: int = self.pack_token_budget or self.TABLE_TOKEN_BUDGET
+        batches: list[tuple[int, str]] = []
+        start: int = 0
+        batch_tokens: int = 0
+        for idx, cell in enumerate(cells):
+            tokens: int = estimate_tokens(cell)
+            if idx > start and (batch_tokens + tokens > budget or idx - start >= self.MAX_TABLE_CELLS):
+                batches.append((start, self.model.make_batch_prompt(cells[start:idx], source_language, target_language)))
+                start, batch_tokens = idx, 0
+            batch_tokens += tokens
+        batches.append((start, self.model.make_batch_prompt(cells[start:], source_language, target_language)))
+        fallback_prompts: list[str] = [
+            self.model.make_text_prompt(cell, source_language, target_language) for cell in cells
+        ]
+        return TranslationTask(
+            [(page_idx, content_idx)],
+            batches[0][1],
+            fallback_prompts,
+            cells=cells,
+            cell_batches=batches,
+            hard=self.router.is_hard(content),
+        )
+
+    def apply_memory(self, content: Content, source_language: str, target_language: str) -> Optional[str]:
+        """查询翻译记忆，与历史原文仅数字不同时直接写回译文。
+
+        Args:
+            content: 文本内容。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            找到相似的历史译文但不能直接复用时，返回以其作为参考的Prompt，否则返回None。
+        """
+        match: Optional[MemoryMatch] = self.memory.lookup(str(content), source_language, target_language)
+        if match is None:
+            return None
+        reused: Optional[str] = self.memory.reuse(match, str(content))
+        if reused is not None:
+            content.set_translation(reused, True)
+            metrics.incr("memory_reused")
+            return None
+        metrics.incr("memory_references")
+        return self.model.make_text_prompt(
+            str(content), source_language, target_language, (match.source, match.translation)
+        )
+
+    @classmethod
+    def reuse_memo(cls, content: Content, memo: Optional[BoilerplateMemo]) -> bool:
+        """尝试为重复行套用已完成的译文。
+
+        Args:
+            content: 带有`boilerplate_key`的内容。
+            memo: 已完成的重复行译文。
+
+        Returns:
+            成功套用时返回True。
+        """
+        if memo is None or content.boilerplate_key not in memo:
+            return False
+        template: str
+        translation: str
+        template, translation = memo[content.boilerplate_key]
+        adapted: Optional[str] = BoilerplateDetector.adapt_translation(template, translation, str(content))
+        if adapted is None:
+            return False
+        content.set_translation(adapted, True)
+        metrics.incr("boilerplate_reused")
+        return True
+
+    def translate_book(
+        self,
+        book: Book,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        journal: Optional[JobJournal] = None,
+    ) -> None:
+        """并发翻译整本书籍，翻译结果直接写回书籍对象。
+
+        Args:
+            book: 书籍对象。
+            source_language: 源语言。
+            target_language: 目标语言。
+            model_name: 模型版本名称。
+            journal: 任务日志，提供时跳过日志中已完成的内容，并记录每段新完成的翻译结果。
+        """
+        if book.spilled:
+            # 页面保存在磁盘上时按页面窗口读入内存，翻译完成后立即写回，打包只在单页内部进行
+            page: Page
+            for page_idx, page in enumerate(
+                self.translate_pages(book.pages, source_language, target_language, model_name, self.SPILL_WINDOW, journal)
+            ):
+                book.update_page(page_idx, page)
+            return
+
+        if journal is not None:
+            journal.restore(book)
+        tasks: list[TranslationTask] = self.plan(book, source_language, target_language)
+        content_count: int = sum(len(task.all_slots) for task in tasks)
+        logger.info(f"共{content_count}段内容，{len(tasks)}个翻译请求，并发数: {self.max_workers}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="translator") as executor:
+            pending: dict[Future, TranslationTask] = {}
+            for task in tasks:
+                # 控制在途任务数量，避免一次性为整本书创建全部请求
+                if len(pending) >= self.max_workers:
+                    self._drain(book.pages, pending, FIRST_COMPLETED, journal)
+                future: Future = executor.submit(contextvars.copy_context().run, self.run_task, task, model_name)
+                pending[future] = task
+            self._drain(book.pages, pending, ALL_COMPLETED, journal)
+
+        if self.memory is not None:
+            for page in book.pages:
+                self.memory.add_page(page, source_language, target_language)
+
+    def translate_pages(
+        self,
+        pages: Iterable[Page],
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        window: int = 8,
+        journal: Optional[JobJournal] = None,
+    ) -> Iterator[Page]:
+        """流水线方式翻译页面序列，按原始顺序逐页返回翻译完成的页面。
+
+        页面从输入迭代器中按需拉取，前面页面翻译的同时继续解析后续页面，
+        同时驻留内存的页面数量不超过`window`，打包只在单页内部进行。
+
+        Args:
+            pages: 页面迭代器，例如`PDFParser.iter_pages`。
+            source_language: 源语言。
+            target_language: 目标语言。
+            model_name: 模型版本名称。
+            window: 同时处理的最大页面数量。
+            journal: 任务日志，提供时跳过日志中已完成的内容，并记录每段新完成的翻译结果。
+
+        Returns:
+            返回翻译完成的页面迭代器。
+        """
+        if window < 1:
+            raise ValueError(f"页面窗口大小必须大于0: {window}")
+
+        window_pages: dict[int, Page] = {}
+        remaining: dict[int, int] = {}  # 每页尚未完成的翻译任务数
+        next_page_idx: int = 0
+        memo: BoilerplateMemo = {}  # 打包和去重只在单页内部进行，跨页的重复行通过已完成的译文复用
+
+        def pop_finished() -> Iterator[Page]:
+            nonlocal next_page_idx
+            while next_page_idx in window_pages and remaining[next_page_idx] == 0:
+                del remaining[next_page_idx]
+                finished_page: Page = window_pages.pop(next_page_idx)
+                if self.memory is not None:
+                    # 先完成的页面可以作为后续页面的参考
+                    self.memory.add_page(finished_page, source_language, target_language)
+                yield finished_page
+                next_page_idx += 1
+
+        def drain(return_when: str) -> None:
+            for task in self._drain(window_pages, pending, return_when, journal, memo):
+                remaining[task.slots[0][0]] -= 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="translator") as executor:
+            pending: dict[Future, TranslationTask] = {}
+            for page_idx, page in enumerate(pages):
+                while len(window_pages) >= window:
+                    drain(FIRST_COMPLETED)
+                    yield from pop_finished()
+                window_pages[page_idx] = page
+                if journal is not None:
+                    journal.restore_page(page_idx, page)
+                items: list[tuple[int, int, Content]] = [
+                    (page_idx, content_idx, content) for content_idx, content in enumerate(page.contents)
+                ]
+                tasks: list[TranslationTask] = self.plan_contents(items, source_language, target_language, memo)
+                remaining[page_idx] = len(tasks)
+                for task in tasks:
+                    if len(pending) >= self.max_workers:
+                        drain(FIRST_COMPLETED)
+                    future: Future = executor.submit(contextvars.copy_context().run, self.run_task, task, model_name)
+                    pending[future] = task
+                yield from pop_finished()
+            drain(ALL_COMPLETED)
+            yield from pop_finished()
+
+    def stream_pages(
+        self,
+        pages: Iterable[Page],
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        window: int = 8,
+        memo: Optional[BoilerplateMemo] = None,
+    ) -> Iterator[StreamUpdate]:
+        """流式翻译页面序列，用于在界面上实时显示翻译进度。
+
+        页面从输入迭代器中按需拉取，同时翻译的页面数量不超过`window`，窗口内各页的内容共用`max_workers`个请求线程，
+        各段的增量交错返回。文本内容每收到一段增量即返回带`delta`的通知；表格内容需要完整解析，因此整体翻译完成后才返回。
+        每段内容完成并写回`Content`后返回不带`delta`的通知，已翻译成功的内容直接返回完成通知；
+        一页的全部内容完成后，按原始页面顺序返回带`page`的通知。流式请求不做打包。
+
+        Args:
+            pages: 页面迭代器，例如`PDFParser.stream_pdf`。
+            source_language: 源语言。
+            target_language: 目标语言。
+            model_name: 模型版本名称。
+            window: 同时翻译的最大页面数量。
+            memo: 跨页重复行的译文，重复行只翻译一次。
+
+        Returns:
+            返回翻译进度通知的迭代器。
+        """
+        if window < 1:
+            raise ValueError(f"页面窗口大小必须大于0: {window}")
+
+        memo = {} if memo is None else memo
+        # 工作线程只负责请求，增量和完成通知通过队列交给调用方线程，写回内容和翻译记忆都在调用方线程中进行
+        updates: queue.Queue[tuple[tuple[int, int], Optional[str]]] = queue.Queue()
+        running: dict[tuple[int, int], tuple[Future, Content]] = {}
+        window_pages: dict[int, Page] = {}
+        remaining: dict[int, int] = {}  # 每页尚未完成的内容数
+        next_page_idx: int = 0
+        page_iter: Iterator[tuple[int, Page]] = enumerate(pages)
+        exhausted: bool = False
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="translator") as executor:
+            while True:
+                while not exhausted and len(window_pages) < window:
+                    item: Optional[tuple[int, Page]] = next(page_iter, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    page_idx: int
+                    page: Page
+                    page_idx, page = item
+                    window_pages[page_idx] = page
+                    remaining[page_idx] = 0
+                    for content_idx, content in enumerate(page.contents):
+                        slot: tuple[int, int] = (page_idx, content_idx)
+                        future: Optional[Future] = self._submit_stream(
+                            executor, slot, content, source_language, target_language, model_name, memo, updates
+                        )
+                        if future is None:
+                            yield StreamUpdate(page_idx, content_idx)
+                            continue
+                        future.add_done_callback(lambda _, slot=slot: updates.put((slot, None)))
+                        running[slot] = (future, content)
+                        remaining[page_idx] += 1
+
+                while next_page_idx in window_pages and remaining[next_page_idx] == 0:
+                    del remaining[next_page_idx]
+                    yield StreamUpdate(next_page_idx, page=window_pages.pop(next_page_idx))
+                    next_page_idx += 1
+                if not running:
+                    if exhausted:
+                        break
+                    continue
+
+                delta: Optional[str]
+                slot, delta = updates.get()
+                if delta is not None:
+                    yield StreamUpdate(*slot, delta=delta)
+                    continue
+                future, content = running.pop(slot)
+                remaining[slot[0]] -= 1
+                if future.exception() is not None:
+                    logger.error(f"[{slot[0]}-{slot[1]}] 流式翻译失败，保留原文: {future.exception()}")
+                    metrics.incr("failed_tasks")
+                    content.set_translation("{}" if content.content_type == ContentType.TABLE else "", False)
+                    yield StreamUpdate(*slot)
+                    continue
+                if content.content_type == ContentType.TABLE:
+                    content.set_translation(*future.result()[0])
+                    yield StreamUpdate(*slot)
+                    continue
+                content.set_translation(future.result(), True)
+                if content.boilerplate_key is not None:
+                    memo[content.boilerplate_key] = (str(content), content.translation)
+                elif self.memory is not None:
+                    self.memory.add(str(content), content.translation, source_language, target_language)
+                yield StreamUpdate(*slot)
+
+    def _submit_stream(
+        self,
+        executor: ThreadPoolExecutor,
+        slot: tuple[int, int],
+        content: Content,
+        source_language: str,
+        target_language: str,
+        model_name: str,
+        memo: BoilerplateMemo,
+        updates: queue.Queue,
+    ) -> Optional[Future]:
+        """提交单段内容的流式翻译请求。
+
+        Args:
+            executor: 请求线程池。
+            slot: 内容槽位(页码索引, 页内内容索引)。
+            content: 内容对象。
+            source_language: 源语言。
+            target_language: 目标语言。
+            model_name: 模型版本名称。
+            memo: 跨页重复行的译文。
+            updates: 增量队列。
+
+        Returns:
+            返回请求的Future，内容已翻译或直接复用了译文时返回None。
+        """
+        if content.status or (content.boilerplate_key is not None and self.reuse_memo(content, memo)):
+            return None
+        reference_prompt: Optional[str] = None
+        if self.memory is not None and content.content_type == ContentType.TEXT and content.boilerplate_key is None:
+            reference_prompt = self.apply_memory(content, source_language, target_language)
+            if content.status:
+                return None
+        if content.content_type == ContentType.TABLE:
+            table_task: Optional[TranslationTask] = self._make_table_task(
+                *slot, content, source_language, target_language
+            )
+            if table_task is None:
+                return None
+            return executor.submit(contextvars.copy_context().run, self.run_task, table_task, model_name)
+        prompt: str = reference_prompt or self.model.translate_prompt(content, source_language, target_language)
+        # 流式输出已经显示给用户，不做校验和升级
+        routed_model: str
+        routed_model, _ = self.router.route(self.router.is_hard(content), model_name)
+        return executor.submit(contextvars.copy_context().run, self._stream_request, slot, prompt, routed_model, updates)
+
+    def _stream_request(self, slot: tuple[int, int], prompt: str, model_name: str, updates: queue.Queue) -> str:
+        """在工作线程中发送流式请求，增量文本放入队列。
+
+        Args:
+            slot: 内容槽位(页码索引, 页内内容索引)。
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+            updates: 增量队列。
+
+        Returns:
+            返回完整的翻译结果。
+        """
+        deltas: list[str] = []
+        for delta in self.model.make_stream_request(prompt, model_name):
+            deltas.append(delta)
+            updates.put((slot, delta))
+        return "".join(deltas)
+
+    def run_task(self, task: TranslationTask, model_name: str) -> list[tuple[str, bool]]:
+        """执行翻译任务。
+
+        打包任务的响应无法与原文段落一一对应时，会退回为逐段单独翻译；
+        重复行的译文无法套用到其他页面的原文时（例如数字对应不上），会为该内容单独翻译。
+        开启自动路由时，由快速模型翻译的响应未通过校验，会先改用高质量模型重新请求。
+
+        Args:
+            task: 翻译任务。
+            model_name: 模型版本名称。
+
+        Returns:
+            返回与`task.all_slots`一一对应的(翻译结果, 是否成功响应)列表。
+        """
+        escalation: Optional[str]
+        model_name, escalation = self.router.route(task.hard, model_name)
+        if task.cells:
+            return [self.request_table_task(task, model_name, escalation)]
+        results: list[tuple[str, bool]] = self.request_task(task, model_name, escalation)
+        translation: str
+        status: bool
+        translation, status = results[0]
+        for _, original, prompt in task.duplicates:
+            adapted: Optional[str] = None
+            if status:
+                adapted = BoilerplateDetector.adapt_translation(task.template, translation, original)
+            if adapted is not None:
+                metrics.incr("boilerplate_reused")
+                results.append((adapted, True))
+            else:
+                results.append(self.model.make_request(prompt, model_name))
+        return results
+
+    def request_table_task(
+        self, task: TranslationTask, model_name: str, escalation: Optional[str] = None
+    ) -> tuple[str, bool]:
+        """依次发送表格任务的各批单元格请求。
+
+        某一批的响应无法与单元格一一对应时，先改用升级模型重新请求，仍失败时该批单元格逐个单独翻译，
+        单独翻译仍失败的单元格保留原文。
+
+        Args:
+            task: 表格翻译任务。
+            model_name: 模型版本名称。
+            escalation: 响应未通过校验时改用的模型，为空表示不升级。
+
+        Returns:
+            返回(单元格原文到译文的JSON对象, 是否成功响应)，只要有单元格翻译成功即视为成功。
+        """
+        mapping: dict[str, str] = {}
+        ends: list[int] = [start for start, _ in task.cell_batches[1:]] + [len(task.cells)]
+        for (start, prompt), end in zip(task.cell_batches, ends):
+            cells: list[str] = task.cells[start:end]
+            translation: str
+            status: bool
+            translation, status = self.model.make_request(prompt, model_name)
+            translations: Optional[list[str]] = self.validate_batch(prompt, model_name, translation, status, len(cells))
+            batch_model: str = model_name
+            if translations is None and self.router.escalate(escalation) is not None:
+                logger.warning(f"表格翻译结果无法解析，改用{escalation}重新翻译: {task.slots}")
+                batch_model = escalation
+                translation, status = self.model.make_request(prompt, batch_model)
+                translations = self.validate_batch(prompt, batch_model, translation, status, len(cells))
+            if translations is not None:
+                mapping.update(zip(cells, translations))
+                continue
+            logger.warning(f"表格翻译结果与单元格数量不一致，逐个单元格重新翻译: {task.slots}")
+            for cell, fallback_prompt in zip(cells, task.fallback_prompts[start:end]):
+                translation, status = self.model.make_request(fallback_prompt, batch_model)
+                if status:
+                    mapping[cell] = translation
+        metrics.incr("table_cells_translated", len(mapping))
+        return json.dumps(mapping, ensure_ascii=False), bool(mapping)
+
+    def validate_batch(
+        self, prompt: str, model_name: str, translation: str, status: bool, count: int
+    ) -> Optional[list[str]]:
+        """解析打包或表格请求的响应，无法解析时通知模型丢弃该响应，带缓存的模型不会重复返回同一个错误结果。
+
+        Args:
+            prompt: Prompt文本。
+            model_name: 模型版本名称。
+            translation: 模型返回的翻译结果。
+            status: 是否成功响应。
+            count: 打包的文本数量。
+
+        Returns:
+            解析成功且数量一致时返回译文列表，否则返回None。
+        """
+        if not status:
+            return None
+        translations: Optional[list[str]] = self.model.parse_batch_response(translation, count)
+        if translations is None:
+            metrics.incr("invalid_batch_responses")
+            self.model.discard(prompt, model_name)
+        return translations
+
+    def request_task(
+        self, task: TranslationTask, model_name: str, escalation: Optional[str] = None
+    ) -> list[tuple[str, bool]]:
+        """发送翻译任务的请求。
+
+        Args:
+            task: 翻译任务。
+            model_name: 模型版本名称。
+            escalation: 响应未通过校验时改用的模型，为空表示不升级。
+
+        Returns:
+            返回与`task.slots`一一对应的(翻译结果, 是否成功响应)列表。
+        """
+        translation: str
+        status: bool
+        translation, status = self.model.make_request(task.prompt, model_name)
+        if not task.packed:
+            if status and not translation.strip():
+                self.model.discard(task.prompt, model_name)
+            if (not status or not translation.strip()) and self.router.escalate(escalation) is not None:
+                logger.warning(f"翻译结果为空，改用{escalation}重新翻译: {task.slots}")
+                translation, status = self.model.make_request(task.prompt, escalation)
+                if status and not translation.strip():
+                    self.model.discard(task.prompt, escalation)
+            return [(translation, status)]
+
+        translations: Optional[list[str]] = self.validate_batch(
+            task.prompt, model_name, translation, status, len(task.slots)
+        )
+        if translations is None and self.router.escalate(escalation) is not None:
+            logger.warning(f"打包翻译结果无法解析，改用{escalation}重新翻译: {task.slots}")
+            model_name = escalation
+            translation, status = self.model.make_request(task.prompt, model_name)
+            translations = self.validate_batch(task.prompt, model_name, translation, status, len(task.slots))
+        if translations is not None:
+            return [(item, True) for item in translations]
+
+        logger.warning(f"打包翻译结果与原文段落不一致，逐段重新翻译: {task.slots}")
+        return [self.model.make_request(prompt, model_name) for prompt in task.fallback_prompts]
+
+    @classmethod
+    def _drain(
+        cls,
+        pages: Union[Sequence[Page], Mapping[int, Page]],
+        pending: dict[Future, TranslationTask],
+        return_when: str = ALL_COMPLETED,
+        journal: Optional[JobJournal] = None,
+        memo: Optional[BoilerplateMemo] = None,
+    ) -> list[TranslationTask]:
+        """等待在途任务完成，并将结果写回对应页面。
+
+        Args:
+            pages: 可按页码索引访问的页面集合。
+            pending: 在途任务，完成的任务会从中移除。
+            return_when: 等待条件，默认等待全部任务完成。
+            journal: 任务日志，提供时记录每段完成的翻译结果。
+            memo: 重复行译文，提供时记录翻译成功的重复行。
+
+        Returns:
+            返回本次完成的任务列表。
+        """
+        done: set[Future]
+        done, _ = wait(pending, return_when=return_when)
+        finished: list[TranslationTask] = []
+        for future in done:
+            task: TranslationTask = pending.pop(future)
+            cls.apply_results(pages, task, cls.task_results(task, future), journal, memo)
+            finished.append(task)
+        return finished
+
+    @classmethod
+    def task_results(cls, task: TranslationTask, future: Future) -> list[tuple[str, bool]]:
+        """读取已完成任务的结果。
+
+        单个任务出错（例如内容审核拒绝）不影响其他任务，该任务的全部槽位标记为翻译失败，
+        写入任务日志后续跑时重新翻译，输出文件中保留原文。
+
+        Args:
+            task: 翻译任务。
+            future: 已完成的任务Future。
+
+        Returns:
+            返回与`task.all_slots`一一对应的(翻译结果, 是否成功响应)列表。
+        """
+        try:
+            return future.result()
+        except Exception as e:
+            page_idx, content_idx = task.slots[0]
+            logger.error(f"[{page_idx}-{content_idx}] 翻译任务失败，共{len(task.all_slots)}段内容保留原文: {e}")
+            metrics.incr("failed_tasks")
+            # 表格译文是单元格映射，空映射表示全部保留原文
+            return [("{}" if task.cells else "", False)] * len(task.all_slots)
+
+    @classmethod
+    def apply_results(
+        cls,
+        pages: Union[Sequence[Page], Mapping[int, Page]],
+        task: TranslationTask,
+        results: list[tuple[str, bool]],
+        journal: Optional[JobJournal] = None,
+        memo: Optional[BoilerplateMemo] = None,
+    ) -> None:
+        """将任务结果写回对应页面。
+
+        Args:
+            pages: 可按页码索引访问的页面集合。
+            task: 已完成的翻译任务。
+            results: `run_task`返回的结果。
+            journal: 任务日志，提供时记录每段完成的翻译结果。
+            memo: 重复行译文，提供时记录翻译成功的重复行。
+        """
+        for (page_idx, content_idx), (translation, status) in zip(task.all_slots, results):
+            logger.debug("[{}-{}] {}", page_idx, content_idx, translation)
+            content: Content = pages[page_idx].contents[content_idx]
+            content.set_translation(translation, status)
+            if journal is not None:
+                journal.record(page_idx, content_idx, content, translation)
+        if task.template is not None and memo is not None and results[0][1]:
+            page_idx, content_idx = task.slots[0]
+            memo[pages[page_idx].contents[content_idx].boilerplate_key] = (task.template, results[0][0])
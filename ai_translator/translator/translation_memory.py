@@ -0,0 +1,285 @@
+import json
+import random
+import re
+import threading
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, TextIO
+
+from loguru import logger
+
+from ai_translator.book.content import ContentType
+from ai_translator.book.page import Page
+from ai_translator.translator.boilerplate import BoilerplateDetector
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from config import Config
+
+_SPACES_PATTERN: re.Pattern = re.compile(r"\s+")
+
+
+@dataclass
+class MemoryMatch:
+    """翻译记忆的匹配结果。"""
+
+    source: str  # 记忆中的原文
+    translation: str  # 记忆中的译文
+    similarity: float  # 与待翻译文本的n-gram Jaccard相似度
+
+
+class TranslationMemory:
+    """模糊匹配的翻译记忆，用于复用相似原文的历史译文。
+
+    每段已翻译的原文按字符n-gram计算MinHash签名，并按LSH分段建立倒排索引，
+    查询时只对落入相同分桶的候选计算精确的Jaccard相似度。记忆以追加写入的JSONL文件保存，
+    第一行为索引参数，之后每行为一条记录（包含签名），首次查询或写入时才读取文件建立索引。
+    """
+
+    VERSION: int = 1  # 记录格式版本
+    SHINGLE_SIZE: int = 4  # 字符n-gram长度
+    NUM_PERM: int = 64  # MinHash签名长度
+    BANDS: int = 16  # LSH分段数量，每段NUM_PERM // BANDS个哈希值
+    MAX_CANDIDATES: int = 8  # 计算精确相似度的最大候选数量
+    _PRIME: int = (1 << 31) - 1
+    _SEED: int = 20240501  # 哈希函数参数的随机种子，修改后已保存的签名失效
+
+    def __init__(self, memory_path: Path, threshold: float = 0.6, min_chars: int = 20) -> None:
+        """初始化翻译记忆。
+
+        Args:
+            memory_path: 记忆文件路径。
+            threshold: 作为参考译文的最低相似度。
+            min_chars: 参与匹配和记录的最短原文长度，过短的文本匹配没有意义。
+        """
+        self.memory_path: Path = memory_path
+        self.threshold: float = threshold
+        self.min_chars: int = min_chars
+        import numpy as np
+
+        rng: random.Random = random.Random(self._SEED)
+        self._a: np.ndarray = np.array([rng.randrange(1, self._PRIME) for _ in range(self.NUM_PERM)], dtype=np.uint64)
+        self._b: np.ndarray = np.array([rng.randrange(0, self._PRIME) for _ in range(self.NUM_PERM)], dtype=np.uint64)
+        self.entries: list[dict[str, Any]] = []
+        self._by_source: dict[tuple[str, str, str], int] = {}
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[int]] = defaultdict(list)
+        self._loaded: bool = False
+        self._file: Optional[TextIO] = None
+        self._lock: threading.RLock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: "Config") -> "TranslationMemory":
+        """根据配置信息创建翻译记忆。
+
+        Args:
+            config: 配置信息。
+
+        Returns:
+            返回翻译记忆对象。
+        """
+        return cls(Path(config.translation_memory_path), config.translation_memory_threshold)
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """合并空白并忽略大小写。"""
+        return _SPACES_PATTERN.sub(" ", text).strip().casefold()
+
+    @classmethod
+    def shingles(cls, text: str) -> set[str]:
+        """计算文本的字符n-gram集合。
+
+        Args:
+            text: 原文。
+
+        Returns:
+            返回n-gram集合。
+        """
+        normalized: str = cls.normalize(text)
+        if len(normalized) <= cls.SHINGLE_SIZE:
+            return {normalized}
+        return {normalized[idx : idx + cls.SHINGLE_SIZE] for idx in range(len(normalized) - cls.SHINGLE_SIZE + 1)}
+
+    def signature(self, shingles: set[str]) -> list[int]:
+        """计算MinHash签名。
+
+        Args:
+            shingles: n-gram集合。
+
+        Returns:
+            返回长度为`NUM_PERM`的签名。
+        """
+        import numpy as np
+
+        hashes: np.ndarray = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        # a < 2^31且hash < 2^32，乘积与b之和不会超出uint64
+        permuted: np.ndarray = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % self._PRIME
+        return permuted.min(axis=1).tolist()
+
+    def _band_keys(self, signature: list[int]) -> list[tuple[int, tuple[int, ...]]]:
+        rows: int = self.NUM_PERM // self.BANDS
+        return [(band, tuple(signature[band * rows : (band + 1) * rows])) for band in range(self.BANDS)]
+
+    def _index(self, entry_id: int) -> None:
+        entry: dict[str, Any] = self.entries[entry_id]
+        self._by_source[(entry["source_language"], entry["target_language"], entry["source"])] = entry_id
+        for band_key in self._band_keys(entry["signature"]):
+            self._buckets[band_key].append(entry_id)
+
+    def _ensure_loaded(self) -> None:
+        """首次使用时读取记忆文件并建立索引。"""
+        if self._loaded:
+            return
+        header: dict[str, Any] = {"version": self.VERSION, "shingle_size": self.SHINGLE_SIZE, "num_perm": self.NUM_PERM}
+        if self.memory_path.exists():
+            with open(self.memory_path, "r", encoding="utf-8") as memory_file:
+                file_header: dict[str, Any] = json.loads(memory_file.readline() or "{}")
+                # 索引参数变化时按原文重新计算签名
+                rebuild: bool = file_header != header
+                for line in memory_file:
+                    try:
+                        entry: dict[str, Any] = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"忽略不完整的翻译记忆记录: {line!r}")
+                        continue
+                    if rebuild:
+                        entry["signature"] = self.signature(self.shingles(entry["source"]))
+                    key: tuple[str, str, str] = (entry["source_language"], entry["target_language"], entry["source"])
+                    if key in self._by_source:
+                        # 同一原文以最后一次记录的译文为准
+                        self.entries[self._by_source[key]]["translation"] = entry["translation"]
+                        continue
+                    self.entries.append(entry)
+                    self._index(len(self.entries) - 1)
+            if rebuild:
+                logger.info(f"翻译记忆索引参数变化，重建索引: {self.memory_path}")
+                self._rewrite(header)
+            logger.info(f"读取翻译记忆{self.memory_path}，共{len(self.entries)}条记录")
+        else:
+            self.memory_path.parent.mkdir(parents=True, exist_ok=True)
+            self._rewrite(header)
+        self._file = open(self.memory_path, "a", encoding="utf-8")
+        self._loaded = True
+
+    def _rewrite(self, header: dict[str, Any]) -> None:
+        with open(self.memory_path, "w", encoding="utf-8") as memory_file:
+            memory_file.write(json.dumps(header) + "\n")
+            for entry in self.entries:
+                memory_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def lookup(self, text: str, source_language: str, target_language: str) -> Optional[MemoryMatch]:
+        """查找最相似的历史译文。
+
+        Args:
+            text: 待翻译文本。
+            source_language: 源语言。
+            target_language: 目标语言。
+
+        Returns:
+            相似度不低于阈值时返回最相似的记录，否则返回None。
+        """
+        if len(text) < self.min_chars:
+            return None
+        shingles: set[str] = self.shingles(text)
+        signature: list[int] = self.signature(shingles)
+        with self._lock:
+            self._ensure_loaded()
+            votes: dict[int, int] = defaultdict(int)
+            for band_key in self._band_keys(signature):
+                for entry_id in self._buckets.get(band_key, ()):
+                    entry: dict[str, Any] = self.entries[entry_id]
+                    if entry["source_language"] == source_language and entry["target_language"] == target_language:
+                        votes[entry_id] += 1
+            candidates: list[dict[str, Any]] = [
+                self.entries[entry_id]
+                for entry_id in sorted(votes, key=votes.__getitem__, reverse=True)[: self.MAX_CANDIDATES]
+            ]
+
+        best: Optional[MemoryMatch] = None
+        for entry in candidates:
+            entry_shingles: set[str] = self.shingles(entry["source"])
+            similarity: float = len(shingles & entry_shingles) / len(shingles | entry_shingles)
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = MemoryMatch(entry["source"], entry["translation"], similarity)
+        return best
+
+    @classmethod
+    def reuse(cls, match: MemoryMatch, text: str) -> Optional[str]:
+        """判断历史译文能否直接用于待翻译文本。
+
+        只有两者仅数字不同（例如条款编号、金额）时才直接复用并替换数字，其余差异需要重新翻译。
+
+        Args:
+            match: 匹配结果。
+            text: 待翻译文本。
+
+        Returns:
+            可以复用时返回译文，否则返回None。
+        """
+        if BoilerplateDetector.normalize(match.source) != BoilerplateDetector.normalize(text):
+            return None
+        return BoilerplateDetector.adapt_translation(match.source, match.translation, text)
+
+    def add(self, source: str, translation: str, source_language: str, target_language: str) -> None:
+        """记录一段译文。
+
+        Args:
+            source: 原文。
+            translation: 译文。
+            source_language: 源语言。
+            target_language: 目标语言。
+        """
+        if len(source) < self.min_chars or not translation:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            entry_id: Optional[int] = self._by_source.get((source_language, target_language, source))
+            if entry_id is not None:
+                if self.entries[entry_id]["translation"] == translation:
+                    return
+                self.entries[entry_id]["translation"] = translation
+                entry: dict[str, Any] = self.entries[entry_id]
+            else:
+                entry = {
+                    "source_language": source_language,
+                    "target_language": target_language,
+                    "source": source,
+                    "translation": translation,
+                    "signature": self.signature(self.shingles(source)),
+                }
+                self.entries.append(entry)
+                self._index(len(self.entries) - 1)
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def add_page(self, page: Page, source_language: str, target_language: str) -> None:
+        """记录页面中翻译成功的文本内容，跨页重复行不参与记录。
+
+        Args:
+            page: 页面对象。
+            source_language: 源语言。
+            target_language: 目标语言。
+        """
+        for content in page.contents:
+            if content.content_type == ContentType.TEXT and content.status and content.boilerplate_key is None:
+                self.add(str(content), content.translation, source_language, target_language)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self.entries)
+
+    def close(self) -> None:
+        """关闭记忆文件。"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._loaded = False
+            self.entries = []
+            self._by_source = {}
+            self._buckets = defaultdict(list)
@@ -1,20 +1,263 @@
+import os
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional
+from types import TracebackType
+from typing import TYPE_CHECKING, Optional, TextIO
 
 from loguru import logger
-from pandas import DataFrame
-from reportlab.lib import colors, pagesizes
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import Flowable, PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
 
 from ai_translator.book.book import Book
-from ai_translator.book.content import ContentType
+from ai_translator.book.content import ContentType, TableData
+from ai_translator.book.page import Page
+from ai_translator.utils.metrics import metrics
+
+# reportlab只在输出PDF时导入
+if TYPE_CHECKING:
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import BaseDocTemplate, Flowable, Paragraph, Table, TableStyle
+
+
+class BookWriter:
+    """增量写入翻译结果的基类，逐页接收翻译完成的页面。"""
+
+    def __init__(self, output_file_path: Path) -> None:
+        """初始化写入器。
+
+        Args:
+            output_file_path: 输出文件路径。
+        """
+        self.output_file_path: Path = output_file_path
+        self.page_count: int = 0
+
+    def write_page(self, page: Page) -> None:
+        """写入单页翻译结果。
+
+        Args:
+            page: 翻译完成的页面。
+        """
+        raise NotImplementedError("子类必须实现 write_page 方法")
+
+    def close(self) -> Path:
+        """完成写入。
+
+        Returns:
+            返回文件保存路径。
+        """
+        raise NotImplementedError("子类必须实现 close 方法")
+
+    def abort(self) -> None:
+        """放弃写入，释放打开的文件等资源，不完成文件。"""
+
+    def __enter__(self) -> "BookWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        # 出错时只释放资源，不输出不完整的文档
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PdfBookWriter(BookWriter):
+    """PDF格式的增量写入器，每收到一页即生成对应的排版元素并立即排版，最后统一输出文档。
+
+    排版元素不在内存中累积，但reportlab在保存前仍会保留已生成页面的PDF数据，这部分内存随页数增长。
+    """
+
+    def __init__(self, output_file_path: Path) -> None:
+        """初始化PDF写入器。
+
+        Args:
+            output_file_path: 输出文件路径。
+        """
+        from reportlab.lib import colors, pagesizes
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, TableStyle
+
+        super().__init__(output_file_path)
+        font_path: str = "fonts/simsun.ttc"  # 请将此路径替换为您的字体文件路径
+        pdfmetrics.registerFont(TTFont("SimSun", font_path))
+
+        # Create a new ParagraphStyle with the SimSun font
+        self.simsun_style: ParagraphStyle = ParagraphStyle("SimSun", fontName="SimSun", fontSize=12, leading=14)
+        self.table_style: TableStyle = TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("FONTNAME", (0, 0), (-1, 0), "SimSun"),  # 更改表头字体为 "SimSun"
+                ("FONTSIZE", (0, 0), (-1, 0), 14),
+                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+                ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+                ("FONTNAME", (0, 1), (-1, -1), "SimSun"),  # 更改表格中的字体为 "SimSun"
+                ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ]
+        )
+        # 与SimpleDocTemplate相同的单栏版式，逐页调用handle_flowable排版，不需要一次性传入全部排版元素
+        self.doc: BaseDocTemplate = BaseDocTemplate(str(output_file_path), pagesize=pagesizes.letter)
+        frame: Frame = Frame(self.doc.leftMargin, self.doc.bottomMargin, self.doc.width, self.doc.height, id="normal")
+        self.doc.addPageTemplates([PageTemplate(id="normal", frames=frame, pagesize=self.doc.pagesize)])
+        self.doc._startBuild()
+        self.doc.canv._doctemplate = self.doc
+
+    def write_page(self, page: Page) -> None:
+        with metrics.span("write_pdf_page"):
+            self._write_page(page)
+
+    def _write_page(self, page: Page) -> None:
+        from reportlab.platypus import PageBreak, Paragraph, Table
+
+        story: list[Flowable] = []
+        # Add a page break between pages
+        if self.page_count:
+            story.append(PageBreak())
+        for content in page.contents:
+            if content.status:
+                if content.content_type == ContentType.TEXT:
+                    # Add translated text to the PDF
+                    text: str = content.translation
+                    for frag in text.split("\n"):
+                        para: Paragraph = Paragraph(frag, self.simsun_style)
+                        story.append(para)
+                elif content.content_type == ContentType.TABLE:
+                    # Add table to the PDF
+                    table: TableData = content.translation
+                    pdf_table: Table = Table([table.columns] + table.rows)
+                    pdf_table.setStyle(self.table_style)
+                    story.append(pdf_table)
+        while story:
+            self.doc.clean_hanging()
+            self.doc.handle_flowable(story)
+        self.page_count += 1
+
+    def close(self) -> Path:
+        # Save the translated book as a new PDF file
+        del self.doc.canv._doctemplate
+        with metrics.span("write_pdf_build"):
+            self.doc._endBuild()
+        logger.info(f"翻译完成: {self.output_file_path}")
+        return self.output_file_path
+
+    def abort(self) -> None:
+        # 文档只在保存时写入磁盘，放弃写入时不留下文件，只需解除画布与文档模板之间的循环引用
+        del self.doc.canv._doctemplate
+
+
+class MarkdownBookWriter(BookWriter):
+    """Markdown格式的增量写入器，每收到一页即追加写入临时文件，完成时替换输出文件，出错时不留下不完整的文件。"""
+
+    def __init__(self, output_file_path: Path) -> None:
+        """初始化Markdown写入器。
+
+        Args:
+            output_file_path: 输出文件路径。
+        """
+        super().__init__(output_file_path)
+        self.temp_path: Path = output_file_path.with_name(f"{output_file_path.name}.tmp")
+        self.output_file: TextIO = open(self.temp_path, "w", encoding="utf-8")
+
+    def write_page(self, page: Page) -> None:
+        with metrics.span("write_markdown_page"):
+            self._write_page(page)
+
+    def _write_page(self, page: Page) -> None:
+        # Add a page break (horizontal rule) between pages
+        if self.page_count:
+            self.output_file.write("---\n\n")
+        for content in page.contents:
+            if content.status:
+                if content.content_type == ContentType.TEXT:
+                    # Add translated text to the Markdown file
+                    text: str = content.translation
+                    for frag in text.split("\n"):
+                        self.output_file.write(frag + "\n\n")
+
+                elif content.content_type == ContentType.TABLE:
+                    # Add table to the Markdown file
+                    table: TableData = content.translation
+                    header = "| " + " | ".join(str(column) for column in table.columns) + " |" + "\n"
+                    separator = "| " + " | ".join(["---"] * len(table.columns)) + " |" + "\n"
+                    body = (
+                        "\n".join(["| " + " | ".join(str(cell) for cell in row) + " |" for row in table.rows])
+                        + "\n\n"
+                    )
+                    self.output_file.write(header + separator + body)
+        self.output_file.flush()
+        self.page_count += 1
+
+    def close(self) -> Path:
+        self.output_file.close()
+        os.replace(self.temp_path, self.output_file_path)
+        logger.info(f"翻译完成: {self.output_file_path}")
+        return self.output_file_path
+
+    def abort(self) -> None:
+        self.output_file.close()
+        self.temp_path.unlink(missing_ok=True)
+
+
+class MultiBookWriter(BookWriter):
+    """同时写出多种格式的增量写入器，每页只读取一次，依次交给各格式的写入器。"""
+
+    def __init__(self, writers: list[BookWriter]) -> None:
+        """初始化组合写入器。
+
+        Args:
+            writers: 各格式的写入器。
+        """
+        if not writers:
+            raise ValueError("至少需要一个写入器")
+        super().__init__(writers[0].output_file_path)
+        self.writers: list[BookWriter] = writers
+
+    def write_page(self, page: Page) -> None:
+        for writer in self.writers:
+            writer.write_page(page)
+        self.page_count += 1
+
+    def close(self) -> Path:
+        for writer in self.writers:
+            writer.close()
+        return self.output_file_path
+
+    def abort(self) -> None:
+        for writer in self.writers:
+            writer.abort()
+
+    @property
+    def output_file_paths(self) -> list[Path]:
+        """各格式的输出文件路径。"""
+        return [writer.output_file_path for writer in self.writers]
 
 
 class Writer:
 
+    @classmethod
+    def open_book_writer(cls, output_file_path: Path) -> BookWriter:
+        """根据输出文件格式创建增量写入器。
+
+        Args:
+            output_file_path: 输出文件路径。
+
+        Returns:
+            返回增量写入器。
+        """
+        file_format: str = output_file_path.suffix.lower()
+        logger.info(f"开始翻译: {output_file_path}")
+        if file_format == ".pdf":
+            return PdfBookWriter(output_file_path)
+        elif file_format == ".md":
+            return MarkdownBookWriter(output_file_path)
+        raise ValueError(f"Unsupported file format: {file_format}")
+
     @classmethod
     def save_translated_book(cls, book: Book, output_file_path: Optional[Path] = None) -> None:
         """保存翻译结果。
@@ -50,94 +293,60 @@ class Writer:
             output_file_path = book.pdf_file_path.parent / f"{book.pdf_file_path.stem}_translated.pdf"
 
         logger.info(f"pdf_file_path: {book.pdf_file_path}")
-        logger.info(f"开始翻译: {output_file_path}")
+        with metrics.span("save_translated_book_pdf"):
+            return cls._write_book(book, Path(output_file_path))
 
-        font_path: str = "fonts/simsun.ttc"  # 请将此路径替换为您的字体文件路径
-        pdfmetrics.registerFont(TTFont("SimSun", font_path))
+    @classmethod
+    def save_translated_book_markdown(cls, book: Book, output_file_path: Optional[Path] = None) -> Path:
+        """将翻译结果保存为Markdown文件。
 
-        # Create a new ParagraphStyle with the SimSun font
-        simsun_style: ParagraphStyle = ParagraphStyle("SimSun", fontName="SimSun", fontSize=12, leading=14)
+        Args:
+            book: 书籍对象。
+            output_file_path: 保存文档路径。
 
-        # Create a PDF document
-        doc: SimpleDocTemplate = SimpleDocTemplate(str(output_file_path), pagesize=pagesizes.letter)
-        story: list[Flowable] = []
+        Returns:
+            返回文件保存路径。
+        """
+        if output_file_path is None:
+            output_file_path = book.pdf_file_path.parent / f"{book.pdf_file_path.stem}_translated.md"
+
+        logger.info(f"pdf_file_path: {book.pdf_file_path}")
+        with metrics.span("save_translated_book_markdown"):
+            return cls._write_book(book, Path(output_file_path))
 
-        # Iterate over the pages and contents
-        for page in book.pages:
-            for content in page.contents:
-                if content.status:
-                    if content.content_type == ContentType.TEXT:
-                        # Add translated text to the PDF
-                        text: str = content.translation
-                        for frag in text.split("\n"):
-                            para: Paragraph = Paragraph(frag, simsun_style)
-                            story.append(para)
-                    elif content.content_type == ContentType.TABLE:
-                        # Add table to the PDF
-                        table: DataFrame = content.translation
-                        table_style: TableStyle = TableStyle(
-                            [
-                                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                                ("FONTNAME", (0, 0), (-1, 0), "SimSun"),  # 更改表头字体为 "SimSun"
-                                ("FONTSIZE", (0, 0), (-1, 0), 14),
-                                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                                ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                                ("FONTNAME", (0, 1), (-1, -1), "SimSun"),  # 更改表格中的字体为 "SimSun"
-                                ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                            ]
-                        )
-                        pdf_table: Table = Table([table.columns] + table.values.tolist())
-                        pdf_table.setStyle(table_style)
-                        story.append(pdf_table)
-            # Add a page break after each page except the last one
-            if page != book.pages[-1]:
-                story.append(PageBreak())
+    @classmethod
+    def save_translated_book_formats(cls, book: Book, output_file_paths: list[Path]) -> list[Path]:
+        """遍历一次书籍，同时保存为多种格式，页面暂存在磁盘上时每页只读取一次。
 
-        # Save the translated book as a new PDF file
-        doc.build(story)
-        logger.info(f"翻译完成: {output_file_path}")
-        return output_file_path
+        Args:
+            book: 书籍对象。
+            output_file_paths: 各格式的保存文档路径，格式由扩展名决定。
+
+        Returns:
+            返回各格式的文件保存路径。
+        """
+        with metrics.span("save_translated_book_formats"), ExitStack() as stack:
+            # 每个写入器创建后立即登记，后续写入器创建或写入失败时已创建的写入器都会放弃写入
+            book_writer: MultiBookWriter = MultiBookWriter(
+                [stack.enter_context(cls.open_book_writer(path)) for path in output_file_paths]
+            )
+            for page in book.pages:
+                book_writer.write_page(page)
+        return book_writer.output_file_paths
 
     @classmethod
-    def save_translated_book_markdown(cls, book: Book, output_file_path: str = None) -> Path:
-        if output_file_path is None:
-            output_file_path = book.pdf_file_path.parent / f"{book.pdf_file_path.stem}_translated.md"
+    def _write_book(cls, book: Book, output_file_path: Path) -> Path:
+        """使用增量写入器写出整本书籍。
 
-        logger.info(f"pdf_file_path: {book.pdf_file_path}")
-        logger.info(f"开始翻译: {output_file_path}")
-        with open(output_file_path, "w", encoding="utf-8") as output_file:
-            # Iterate over the pages and contents
+        Args:
+            book: 书籍对象。
+            output_file_path: 保存文档路径。
+
+        Returns:
+            返回文件保存路径。
+        """
+        book_writer: BookWriter
+        with cls.open_book_writer(output_file_path) as book_writer:
             for page in book.pages:
-                for content in page.contents:
-                    if content.status:
-                        if content.content_type == ContentType.TEXT:
-                            # Add translated text to the Markdown file
-                            text: str = content.translation
-                            for frag in text.split("\n"):
-                                output_file.write(frag + "\n\n")
-
-                        elif content.content_type == ContentType.TABLE:
-                            # Add table to the Markdown file
-                            table = content.translation
-                            header = "| " + " | ".join(str(column) for column in table.columns) + " |" + "\n"
-                            separator = "| " + " | ".join(["---"] * len(table.columns)) + " |" + "\n"
-                            # body = '\n'.join(['| ' + ' | '.join(row) + ' |' for row in table.values.tolist()]) + '\n\n'
-                            body = (
-                                "\n".join(
-                                    [
-                                        "| " + " | ".join(str(cell) for cell in row) + " |"
-                                        for row in table.values.tolist()
-                                    ]
-                                )
-                                + "\n\n"
-                            )
-                            output_file.write(header + separator + body)
-
-                # Add a page break (horizontal rule) after each page except the last one
-                if page != book.pages[-1]:
-                    output_file.write("---\n\n")
-
-        logger.info(f"翻译完成: {output_file_path}")
-        return output_file_path
+                book_writer.write_page(page)
+        return book_writer.output_file_path
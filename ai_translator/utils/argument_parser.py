@@ -5,12 +5,100 @@ class ArgumentParser:
     def __init__(self):
         self.parser = argparse.ArgumentParser(description="Translate English PDF book to Chinese.")
         self.parser.add_argument("--book", type=str, help="PDF file to translate.")
+        self.parser.add_argument("--book_dir", type=str, help="Translate every PDF file in this directory.")
+        self.parser.add_argument(
+            "--manifest",
+            type=str,
+            help="JSONL manifest of books to translate, one {\"book\", \"priority\", \"output\"} object per line.",
+        )
+        self.parser.add_argument(
+            "--max_books", type=int, help="Number of books scheduled at the same time in multi-book mode.", default=4
+        )
+        self.parser.add_argument("--source_lang", type=str, help="Source language.", default="英语")
         self.parser.add_argument("--target_lang", type=str, help="Target language.", default="中文")
         self.parser.add_argument(
             "--output",
             type=str,
-            help="The file format of translated book. Now supporting PDF and Markdown",
+            help="The file format of translated book. Now supporting PDF and Markdown. Output directory in multi-book mode.",
+        )
+        self.parser.add_argument(
+            "--model",
+            type=str,
+            help="LLM model version, or 'auto' to route each segment to a fast or strong model by difficulty.",
+            default="GLM-4",
+        )
+        self.parser.add_argument("--workers", type=int, help="Number of concurrent translation requests.", default=4)
+        self.parser.add_argument(
+            "--parse_workers", type=int, help="Number of processes used to parse the PDF.", default=1
+        )
+        self.parser.add_argument(
+            "--segment_tokens",
+            type=int,
+            help="Token budget for splitting long page text into segments, 0 disables segmentation.",
+            default=800,
+        )
+        self.parser.add_argument(
+            "--pack_tokens",
+            type=int,
+            help="Token budget for packing short text segments into one request, 0 disables packing.",
+            default=1024,
+        )
+        self.parser.add_argument(
+            "--streaming",
+            action="store_true",
+            help="Pipeline parsing, translation and writing page by page instead of loading the whole book.",
+        )
+        self.parser.add_argument("--window", type=int, help="Number of pages in flight in streaming mode.", default=8)
+        self.parser.add_argument(
+            "--batch_export",
+            type=str,
+            help="Write all translation requests to this Batch API JSONL file instead of translating.",
+        )
+        self.parser.add_argument(
+            "--batch_results",
+            type=str,
+            help="Translate from this Batch API results JSONL file instead of calling the API.",
+        )
+        self.parser.add_argument(
+            "--spill_pages",
+            action="store_true",
+            help="Keep parsed pages in a temporary file on disk and load only the pages being translated.",
+        )
+        self.parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Resume an interrupted job from its journal and only translate the remaining segments.",
+        )
+        self.parser.add_argument(
+            "--revise_from",
+            type=str,
+            help="Snapshot saved next to a previous edition's output; only changed or new segments are translated.",
+        )
+        self.parser.add_argument(
+            "--hedge",
+            action="store_true",
+            help="Send a duplicate request when one runs past the configured latency percentile; first answer wins.",
+        )
+        self.parser.add_argument(
+            "--metrics_report",
+            type=str,
+            help=(
+                "Write per-stage timing and token usage as JSON to this file, and Prometheus text next to it. "
+                "In multi-book mode each book also gets <output>.metrics.json."
+            ),
+        )
+        self.parser.add_argument("--metrics_port", type=int, help="Serve Prometheus metrics on this port (localhost only).")
+        self.parser.add_argument(
+            "--no_boilerplate",
+            action="store_true",
+            help="Disable detection of headers, footers and other lines repeated across pages.",
+        )
+        self.parser.add_argument(
+            "--no_memory",
+            action="store_true",
+            help="Disable the fuzzy translation memory built from previously translated segments.",
         )
+        self.parser.add_argument("--no_cache", action="store_true", help="Disable the persistent translation and parse caches.")
 
     def parse_arguments(self):
         args = self.parser.parse_args()
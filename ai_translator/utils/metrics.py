@@ -0,0 +1,263 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+
+class SpanStats:
+    """同一名称计时区间的耗时统计。
+
+    次数、总耗时和最大耗时精确统计，百分位数由最多`MAX_SAMPLES`个均匀抽样的耗时（蓄水池抽样）计算，
+    长时间运行的服务内存占用不会随请求数增长。
+    """
+
+    MAX_SAMPLES: int = 4096  # 计算百分位数保留的最大样本数
+
+    def __init__(self) -> None:
+        self.durations: list[float] = []  # 耗时样本
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.errors: int = 0
+        self._random: random.Random = random.Random(0)
+
+    def add(self, duration: float, failed: bool = False) -> None:
+        """记录一次耗时。
+
+        Args:
+            duration: 耗时（秒）。
+            failed: 是否抛出异常。
+        """
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.errors += failed
+        if len(self.durations) < self.MAX_SAMPLES:
+            self.durations.append(duration)
+            return
+        idx: int = self._random.randrange(self.count)
+        if idx < self.MAX_SAMPLES:
+            self.durations[idx] = duration
+
+    def percentile(self, pct: int) -> float:
+        """计算耗时百分位数。"""
+        if not self.durations:
+            return 0.0
+        if len(self.durations) == 1:
+            return self.durations[0]
+        return statistics.quantiles(self.durations, n=100, method="inclusive")[pct - 1]
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": self.total,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "p99_seconds": self.percentile(99),
+        }
+
+
+class Metrics:
+    """翻译任务的埋点统计：各阶段计时区间、每个模型的请求token用量以及计数器。
+
+    全局实例`metrics`统计整个进程。需要单独统计某个任务时，创建新的实例并在任务中调用`activate`或`bind`，
+    期间全局实例收到的埋点同时计入该实例；提交给线程池的函数需要通过`contextvars.copy_context().run`
+    或`bind`执行，工作线程中的埋点才会计入同一个任务。
+    """
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self.reset()
+
+    def current(self) -> "Metrics":
+        """返回当前上下文中生效的任务统计，没有时返回自身。"""
+        return _active_scope.get() or self
+
+    @contextmanager
+    def activate(self) -> Iterator["Metrics"]:
+        """在当前上下文中将埋点同时计入本实例。"""
+        token = _active_scope.set(self)
+        try:
+            yield self
+        finally:
+            _active_scope.reset(token)
+
+    def bind(self, func: Callable[..., _T]) -> Callable[..., _T]:
+        """包装函数，使其在任意线程中执行时埋点同时计入本实例。
+
+        Args:
+            func: 被包装的函数。
+
+        Returns:
+            返回包装后的函数。
+        """
+
+        def run(*args: Any, **kwargs: Any) -> _T:
+            with self.activate():
+                return func(*args, **kwargs)
+
+        return run
+
+    def _targets(self) -> list["Metrics"]:
+        scope: Optional[Metrics] = _active_scope.get()
+        return [self] if scope is None or scope is self else [self, scope]
+
+    def reset(self) -> None:
+        """清空统计数据，开始新的任务时调用。"""
+        with self._lock:
+            self.started_at: float = time.time()
+            self.spans: dict[str, SpanStats] = defaultdict(SpanStats)
+            self.usage: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            self.counters: dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """记录一段代码的耗时，代码抛出异常时同时记录错误次数。
+
+        Args:
+            name: 区间名称，例如parse_pdf、llm_request。
+        """
+        start: float = time.perf_counter()
+        failed: bool = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            duration: float = time.perf_counter() - start
+            for target in self._targets():
+                with target._lock:
+                    target.spans[name].add(duration, failed)
+
+    def record_usage(self, model_name: str, prompt_tokens: int, completion_tokens: int) -> None:
+        """记录一次请求的token用量。
+
+        Args:
+            model_name: 模型版本名称。
+            prompt_tokens: 输入token数量。
+            completion_tokens: 输出token数量。
+        """
+        for target in self._targets():
+            with target._lock:
+                usage: dict[str, int] = target.usage[model_name]
+                usage["requests"] += 1
+                usage["prompt_tokens"] += prompt_tokens
+                usage["completion_tokens"] += completion_tokens
+                usage["total_tokens"] += prompt_tokens + completion_tokens
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """增加计数器。
+
+        Args:
+            name: 计数器名称。
+            value: 增加的数值。
+        """
+        for target in self._targets():
+            with target._lock:
+                target.counters[name] += value
+
+    def report(self) -> dict[str, Any]:
+        """生成统计报告。
+
+        Returns:
+            返回可以序列化为JSON的统计数据。
+        """
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "elapsed_seconds": time.time() - self.started_at,
+                "spans": {name: stats.summary() for name, stats in self.spans.items()},
+                "usage": {model_name: dict(usage) for model_name, usage in self.usage.items()},
+                "counters": dict(self.counters),
+            }
+
+    def to_prometheus(self) -> str:
+        """生成Prometheus文本格式的统计数据。
+
+        Returns:
+            返回Prometheus文本。
+        """
+        report: dict[str, Any] = self.report()
+        lines: list[str] = [
+            "# TYPE ai_translator_span_seconds summary",
+        ]
+        for name, summary in report["spans"].items():
+            for quantile, key in (("0.5", "p50_seconds"), ("0.95", "p95_seconds"), ("0.99", "p99_seconds")):
+                lines.append(f'ai_translator_span_seconds{{span="{name}",quantile="{quantile}"}} {summary[key]}')
+            lines.append(f'ai_translator_span_seconds_sum{{span="{name}"}} {summary["total_seconds"]}')
+            lines.append(f'ai_translator_span_seconds_count{{span="{name}"}} {summary["count"]}')
+        lines.append("# TYPE ai_translator_span_errors_total counter")
+        for name, summary in report["spans"].items():
+            lines.append(f'ai_translator_span_errors_total{{span="{name}"}} {summary["errors"]}')
+        lines.append("# TYPE ai_translator_tokens_total counter")
+        for model_name, usage in report["usage"].items():
+            for kind in ("prompt_tokens", "completion_tokens"):
+                lines.append(f'ai_translator_tokens_total{{model="{model_name}",kind="{kind}"}} {usage[kind]}')
+        lines.append("# TYPE ai_translator_requests_total counter")
+        for model_name, usage in report["usage"].items():
+            lines.append(f'ai_translator_requests_total{{model="{model_name}"}} {usage["requests"]}')
+        for name, value in report["counters"].items():
+            lines.append(f"# TYPE ai_translator_{name} counter")
+            lines.append(f"ai_translator_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export_json(self, report_path: Path) -> None:
+        """将统计报告保存为JSON文件。
+
+        Args:
+            report_path: 报告文件路径。
+        """
+        report_path.write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def export_prometheus(self, report_path: Path) -> None:
+        """将统计数据保存为Prometheus文本文件，可供node_exporter的textfile采集。
+
+        Args:
+            report_path: 文件路径。
+        """
+        report_path.write_text(self.to_prometheus(), encoding="utf-8")
+
+    def serve_prometheus(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """在后台线程中启动Prometheus采集端点。
+
+        Args:
+            port: 监听端口。
+            host: 监听地址，默认只允许本机访问，需要远程采集时显式指定。
+
+        Returns:
+            返回HTTP服务对象，调用其shutdown方法停止服务。
+        """
+        metrics: Metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body: bytes = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server: ThreadingHTTPServer = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        return server
+
+
+_active_scope: ContextVar[Optional[Metrics]] = ContextVar("metrics_scope", default=None)  # 当前任务的统计
+
+metrics: Metrics = Metrics()  # 全局统计实例
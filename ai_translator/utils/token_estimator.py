@@ -0,0 +1,22 @@
+import math
+import re
+
+# 中日韩字符（含标点），每个字符大致对应一个token
+_CJK_PATTERN: re.Pattern = re.compile("[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """在本地快速估算文本的token数量，无需调用分词接口。
+
+    中日韩字符按每字一个token计算，其余字符按每4个字符一个token计算。
+
+    Args:
+        text: 待估算文本。
+
+    Returns:
+        返回估算的token数量。
+    """
+    if not text:
+        return 0
+    cjk_count: int = len(_CJK_PATTERN.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
@@ -0,0 +1,70 @@
+"""启动耗时检查：在全新的子进程中统计各入口模块的导入耗时，并确认核心模块没有提前导入重量级依赖。
+
+超出耗时上限或导入了不应导入的依赖时以非零状态码退出，可以放在CI中防止启动耗时回退。
+
+运行方式: python -m benchmarks.bench_import_time --max_ms 800
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Optional
+
+# 入口模块及其导入后不应出现在sys.modules中的重量级依赖
+MODULES: dict[str, list[str]] = {
+    "ai_translator.translator.pdf_parser": ["streamlit", "pandas", "PIL", "reportlab", "zhipuai"],
+    "ai_translator.translator.translation_engine": ["streamlit", "pandas", "PIL", "reportlab", "zhipuai", "numpy"],
+    "ai_translator.translator.pdf_translator": ["streamlit", "pandas", "PIL", "reportlab", "zhipuai", "numpy"],
+    "ai_translator.llm.glm_model": ["streamlit", "pandas", "PIL", "reportlab", "zhipuai"],
+    "ai_translator.__main__": ["streamlit", "pandas", "PIL", "reportlab"],
+}
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """在子进程中导入模块。
+
+    Args:
+        module: 模块名称。
+
+    Returns:
+        返回(导入耗时毫秒数, 已导入的重量级依赖列表)。
+    """
+    heavy: list[str] = sorted({name for names in MODULES.values() for name in names})
+    code: str = (
+        "import importlib, json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"importlib.import_module({module!r})\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"print(json.dumps([elapsed, [name for name in {heavy!r} if name in sys.modules]]))\n"
+    )
+    output: str = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the CLI entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreter runs per module.")
+    parser.add_argument("--max_ms", type=float, default=None, help="Fail if any median import time exceeds this.")
+    args = parser.parse_args()
+
+    failures: list[str] = []
+    for module, forbidden in MODULES.items():
+        runs: list[tuple[float, list[str]]] = [measure(module) for _ in range(args.repeat)]
+        median_ms: float = statistics.median(elapsed for elapsed, _ in runs)
+        loaded: list[str] = [name for name in runs[0][1] if name in forbidden]
+        print(f"{module:<45} {median_ms:8.1f}ms  heavy={','.join(loaded) or '-'}", flush=True)
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)}")
+        max_ms: Optional[float] = args.max_ms
+        if max_ms is not None and median_ms > max_ms:
+            failures.append(f"{module} takes {median_ms:.1f}ms > {max_ms:.1f}ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
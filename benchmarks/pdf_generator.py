@@ -0,0 +1,107 @@
+"""生成压测用的PDF文件：正文密集、表格密集以及超长文档。
+
+运行方式: python -m benchmarks.pdf_generator --output_dir benchmarks/data
+"""
+import argparse
+import random
+from pathlib import Path
+
+from reportlab.lib import colors, pagesizes
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Flowable, PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+_WORDS: list[str] = (
+    "the translation of technical documents requires careful handling of terminology layout tables figures "
+    "revenue growth quarter region contract party agreement clause obligation product manual install configure "
+    "system network device warranty service customer report analysis result method data model performance"
+).split()
+
+
+def make_sentence(rng: random.Random, words: int) -> str:
+    """生成一个随机英文句子。"""
+    sentence: str = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return sentence.capitalize() + "."
+
+
+def make_text_heavy_pdf(pdf_file_path: Path, pages: int, paragraphs_per_page: int = 6, seed: int = 0) -> None:
+    """生成每页只有多段正文的PDF文件。
+
+    Args:
+        pdf_file_path: 输出文件路径。
+        pages: 页数。
+        paragraphs_per_page: 每页段落数。
+        seed: 随机数种子。
+    """
+    rng: random.Random = random.Random(seed)
+    styles = getSampleStyleSheet()
+    story: list[Flowable] = []
+    for page_idx in range(pages):
+        story.append(Paragraph(f"Chapter {page_idx + 1}", styles["Heading2"]))
+        for _ in range(paragraphs_per_page):
+            text: str = " ".join(make_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(2, 5)))
+            story.append(Paragraph(text, styles["Normal"]))
+        story.append(PageBreak())
+    SimpleDocTemplate(str(pdf_file_path), pagesize=pagesizes.A4).build(story)
+
+
+def make_dense_table_pdf(pdf_file_path: Path, pages: int, rows: int = 40, cols: int = 8, seed: int = 0) -> None:
+    """生成每页包含一段正文和一张密集表格的PDF文件。
+
+    Args:
+        pdf_file_path: 输出文件路径。
+        pages: 页数。
+        rows: 每张表格的行数。
+        cols: 每张表格的列数。
+        seed: 随机数种子。
+    """
+    rng: random.Random = random.Random(seed)
+    styles = getSampleStyleSheet()
+    story: list[Flowable] = []
+    for page_idx in range(pages):
+        story.append(Paragraph(f"Quarterly report page {page_idx}: revenue 1.00 grew in every region.", styles["Normal"]))
+        data: list[list[str]] = [[f"Col{col}" for col in range(cols)]]
+        for row in range(rows):
+            data.append([rng.choice(_WORDS) if col == 0 else f"{(row * cols + col) % 97:.2f}" for col in range(cols)])
+        table: Table = Table(data)
+        table.setStyle(TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.black), ("FONTSIZE", (0, 0), (-1, -1), 6)]))
+        story.append(table)
+        story.append(PageBreak())
+    SimpleDocTemplate(str(pdf_file_path), pagesize=pagesizes.A4).build(story)
+
+
+def generate_corpus(output_dir: Path, large_pages: int = 500) -> dict[str, Path]:
+    """生成压测文档集，已存在的文件不会重复生成。
+
+    Args:
+        output_dir: 输出目录。
+        large_pages: 超长文档的页数。
+
+    Returns:
+        返回文档名称到文件路径的映射。
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus: dict[str, Path] = {
+        "text_heavy": output_dir / "text_heavy_50.pdf",
+        "table_heavy": output_dir / "table_heavy_50.pdf",
+        "large": output_dir / f"large_{large_pages}.pdf",
+    }
+    if not corpus["text_heavy"].exists():
+        make_text_heavy_pdf(corpus["text_heavy"], 50)
+    if not corpus["table_heavy"].exists():
+        make_dense_table_pdf(corpus["table_heavy"], 50)
+    if not corpus["large"].exists():
+        make_text_heavy_pdf(corpus["large"], large_pages, paragraphs_per_page=4, seed=1)
+    return corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate benchmark PDFs.")
+    parser.add_argument("--output_dir", type=str, default="benchmarks/data")
+    parser.add_argument("--large_pages", type=int, default=500)
+    args = parser.parse_args()
+    for name, pdf_file_path in generate_corpus(Path(args.output_dir), args.large_pages).items():
+        print(f"{name}: {pdf_file_path}")
+
+
+if __name__ == "__main__":
+    main()
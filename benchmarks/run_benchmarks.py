@@ -0,0 +1,195 @@
+"""离线压测：使用本地模拟的GLM客户端，分别统计解析、翻译、写入三个阶段的吞吐、延迟和内存峰值。
+
+每个阶段在独立的子进程中运行，因此内存峰值互不影响。
+
+运行方式: python -m benchmarks.run_benchmarks --latency_median 0.2 --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import pickle
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from ai_translator.book.book import Book
+from ai_translator.llm.fake_client import FakeZhipuAIClient, LatencyDistribution
+from ai_translator.llm.glm_model import GLMModel
+from ai_translator.llm.llm_base import LLMBase
+from ai_translator.llm.request_governor import RequestGovernor
+from ai_translator.translator.pdf_parser import PDFParser
+from ai_translator.translator.segmenter import Segmenter
+from ai_translator.translator.translation_engine import TranslationEngine
+from ai_translator.translator.writer import Writer
+from benchmarks.pdf_generator import generate_corpus
+
+
+class TimedModel(LLMBase):
+    """记录每次请求耗时的模型包装。"""
+
+    def __init__(self, model: LLMBase) -> None:
+        self.model: LLMBase = model
+        self.latencies: list[float] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def make_request(self, prompt: str, model_name: str) -> tuple[str, bool]:
+        start: float = time.perf_counter()
+        try:
+            return self.model.make_request(prompt, model_name)
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """计算百分位数，数据为空时返回0。"""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def peak_rss_mb() -> float:
+    """当前进程的内存峰值（MB）。"""
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS单位为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def count_segments(book: Book) -> int:
+    return sum(len(page.contents) for page in book.pages)
+
+
+def stage_parse(pdf_file_path: str, book_path: str, options: dict[str, Any]) -> dict[str, Any]:
+    start: float = time.perf_counter()
+    book: Book = PDFParser.parse_pdf(pdf_file_path, workers=options["parse_workers"])
+    if options["segment_tokens"]:
+        Segmenter(options["segment_tokens"]).segment_book(book)
+    elapsed: float = time.perf_counter() - start
+    Path(book_path).write_bytes(pickle.dumps(book))
+    return {"seconds": elapsed, "pages": len(book.pages), "segments": count_segments(book)}
+
+
+def stage_translate(pdf_file_path: str, book_path: str, options: dict[str, Any]) -> dict[str, Any]:
+    book: Book = pickle.loads(Path(book_path).read_bytes())
+    client: FakeZhipuAIClient = FakeZhipuAIClient(
+        latency=LatencyDistribution(
+            options["latency_kind"], options["latency_median"], options["latency_spread"], options["token_latency"]
+        ),
+        throttle_rate=options["throttle_rate"],
+        error_rate=options["error_rate"],
+        response_scale=options["response_scale"],
+        seed=0,
+    )
+    governor: RequestGovernor = RequestGovernor(
+        max_retries=10, base_delay=0.05, initial_concurrency=options["workers"], max_concurrency=options["workers"]
+    )
+    model: TimedModel = TimedModel(GLMModel("benchmark", governor, client))
+    engine: TranslationEngine = TranslationEngine(model, options["workers"], options["pack_tokens"])
+
+    start: float = time.perf_counter()
+    engine.translate_book(book, "英语", "中文", "GLM-4")
+    elapsed: float = time.perf_counter() - start
+    Path(book_path).write_bytes(pickle.dumps(book))
+    return {
+        "seconds": elapsed,
+        "pages": len(book.pages),
+        "segments": count_segments(book),
+        "requests": len(model.latencies),
+        "api_calls": client.requests,
+        "p50": percentile(model.latencies, 50),
+        "p95": percentile(model.latencies, 95),
+        "p99": percentile(model.latencies, 99),
+    }
+
+
+def stage_write(pdf_file_path: str, book_path: str, options: dict[str, Any]) -> dict[str, Any]:
+    book: Book = pickle.loads(Path(book_path).read_bytes())
+    output_path: Path = Path(book_path).with_suffix(".md")
+    start: float = time.perf_counter()
+    Writer.save_translated_book_markdown(book, output_path)
+    elapsed: float = time.perf_counter() - start
+    return {"seconds": elapsed, "pages": len(book.pages), "segments": count_segments(book)}
+
+
+def _run_in_child(stage: Callable[..., dict[str, Any]], args: tuple, queue: multiprocessing.Queue) -> None:
+    from loguru import logger
+
+    logger.remove()
+    result: dict[str, Any] = stage(*args)
+    result["peak_rss_mb"] = peak_rss_mb()
+    queue.put(result)
+
+
+def run_stage(stage: Callable[..., dict[str, Any]], *args: Any) -> dict[str, Any]:
+    """在独立的子进程中运行一个阶段，返回其统计结果。"""
+    context = multiprocessing.get_context("spawn")
+    queue: multiprocessing.Queue = context.Queue()
+    process = context.Process(target=_run_in_child, args=(stage, args, queue))
+    process.start()
+    result: dict[str, Any] = queue.get()
+    process.join()
+    seconds: float = result["seconds"] or 1e-9
+    result["pages_per_sec"] = result["pages"] / seconds
+    result["segments_per_sec"] = result["segments"] / seconds
+    return result
+
+
+def format_row(document: str, stage: str, result: dict[str, Any]) -> str:
+    latency: str = ""
+    if "p50" in result:
+        latency = (
+            f" requests={result['requests']} api_calls={result['api_calls']}"
+            f" p50={result['p50'] * 1000:.0f}ms p95={result['p95'] * 1000:.0f}ms p99={result['p99'] * 1000:.0f}ms"
+        )
+    return (
+        f"{document:<12} {stage:<10} {result['seconds']:8.2f}s {result['pages_per_sec']:9.1f} pages/s "
+        f"{result['segments_per_sec']:9.1f} segments/s peak_rss={result['peak_rss_mb']:.0f}MB{latency}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline throughput/latency benchmark with a mock GLM client.")
+    parser.add_argument("--data_dir", type=str, default="benchmarks/data")
+    parser.add_argument("--documents", type=str, default="text_heavy,table_heavy,large")
+    parser.add_argument("--large_pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--parse_workers", type=int, default=1)
+    parser.add_argument("--pack_tokens", type=int, default=1024)
+    parser.add_argument("--segment_tokens", type=int, default=800)
+    parser.add_argument("--latency_kind", type=str, default="lognormal", choices=["constant", "uniform", "lognormal"])
+    parser.add_argument("--latency_median", type=float, default=0.05)
+    parser.add_argument("--latency_spread", type=float, default=0.5)
+    parser.add_argument("--token_latency", type=float, default=0.0)
+    parser.add_argument("--throttle_rate", type=float, default=0.0)
+    parser.add_argument("--error_rate", type=float, default=0.0)
+    parser.add_argument("--response_scale", type=float, default=1.0)
+    parser.add_argument("--report", type=str, default=None, help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    options: dict[str, Any] = vars(args)
+    corpus: dict[str, Path] = generate_corpus(Path(args.data_dir), args.large_pages)
+    report: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for document in args.documents.split(","):
+            pdf_file_path: str = str(corpus[document])
+            book_path: str = str(Path(tmp_dir) / f"{document}.pkl")
+            report[document] = {}
+            for stage_name, stage in (("parse", stage_parse), ("translate", stage_translate), ("write", stage_write)):
+                result: dict[str, Any] = run_stage(stage, pdf_file_path, book_path, options)
+                report[document][stage_name] = result
+                print(format_row(document, stage_name, result), flush=True)
+
+    report_path: Optional[str] = args.report
+    if report_path:
+        Path(report_path).write_text(json.dumps({"options": options, "results": report}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
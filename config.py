@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,5 +9,23 @@ class Config(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
+        env_ignore_empty=True,
     )
     api_key: str  # GLM API密钥
+    translation_cache_path: str = "data/cache/translation_cache.db"  # 翻译缓存数据库路径
+    translation_cache_max_entries: Optional[int] = 200000  # 翻译缓存最大条目数
+    translation_cache_max_age_days: Optional[float] = 90  # 翻译缓存最长保留天数
+    parse_cache_dir: str = "data/cache/books"  # PDF解析缓存目录
+    translation_memory_path: str = "data/cache/translation_memory.jsonl"  # 翻译记忆文件路径
+    translation_memory_threshold: float = 0.6  # 翻译记忆作为参考译文的最低相似度
+    requests_per_second: Optional[float] = None  # 每秒请求数上限，为空表示不限制
+    tokens_per_minute: Optional[int] = None  # 每分钟token数上限，为空表示不限制
+    max_retries: int = 5  # 限流或临时错误的最大重试次数
+    max_concurrency: int = 32  # 自适应并发的最大上限
+    http_keepalive_seconds: float = 30  # 空闲HTTP连接的保持时间
+    max_jobs: int = 2  # 图形界面同时执行的最大翻译任务数量，其余任务排队
+    hedge_percentile: float = 95  # 请求耗时超过该分位数时发送对冲请求
+    hedge_max_ratio: float = 0.1  # 对冲请求数占总请求数的比例上限
+    route_fast_model: str = "GLM-3-Turbo"  # 自动路由时翻译简单内容的快速模型
+    route_strong_model: str = "GLM-4"  # 自动路由时翻译复杂内容和升级请求的高质量模型
+    route_max_easy_tokens: int = 48  # 自动路由时交给快速模型的文本最大token数
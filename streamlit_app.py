@@ -1,30 +1,45 @@
-import base64
+import html
+from functools import partial
 from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+from urllib.parse import quote
 
 import streamlit as st
-from loguru import logger
-from pandas import DataFrame
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from ai_translator.book.book import Book
-from ai_translator.book.content import ContentType
+from ai_translator.book.content import Content, ContentType, TableData
+from ai_translator.book.page import Page
+from ai_translator.book.page_store import PageStore
+from ai_translator.llm.cached_model import CachedModel
 from ai_translator.llm.glm_model import GLMModel
+from ai_translator.llm.translation_cache import CacheStats, TranslationCache
+from ai_translator.translator.boilerplate import BoilerplateDetector
+from ai_translator.translator.job_runner import JobRunner, TranslationJob
+from ai_translator.translator.model_router import ModelRouter
+from ai_translator.translator.parse_cache import ParseCache
 from ai_translator.translator.pdf_parser import PDFParser
+from ai_translator.translator.segmenter import Segmenter
+from ai_translator.translator.translation_engine import TranslationEngine
+from ai_translator.translator.translation_memory import TranslationMemory
 from ai_translator.translator.writer import Writer
 from config import Config
 from logger import init_logger
 
 
+STATIC_DIR: Path = Path(__file__).parent / "static"  # Streamlit静态文件目录，需要开启server.enableStaticServing
+PAGE_WINDOW: int = 8  # 同时翻译的最大页面数量，与命令行的默认页面窗口一致
+MAX_WORKERS: int = 16  # 单个任务的最大并发请求数
+
+
 def get_file_downloader_html(file_path: Path, btn_text: str) -> None:
-    """生成用于下载文件的 HTML 代码"""
-    with open(file_path, "rb") as f:
-        file_content = f.read()
+    """生成用于下载文件的 HTML 代码，文件由静态文件服务从磁盘分块读取，不经过会话内存"""
+    url: str = "app/static/" + quote(file_path.resolve().relative_to(STATIC_DIR.resolve()).as_posix())
 
     # 创建下载链接
     st.markdown(
         f"""
-           <a href="data:application/octet-stream;base64,{base64.b64encode(file_content).decode()}"
-           download="{file_path.name}">
+           <a href="{url}" download="{html.escape(file_path.name)}">
            {btn_text}
            </a>
         """,
@@ -32,12 +47,178 @@ def get_file_downloader_html(file_path: Path, btn_text: str) -> None:
     )
 
 
+@st.cache_resource
+def get_model() -> CachedModel:
+    """进程内所有会话共用的翻译模型，复用HTTP连接池并共享限流额度，并发上限按同时执行的任务都用满并发请求数计算"""
+    model: GLMModel = GLMModel.from_config(config, config.max_jobs * MAX_WORKERS)
+    return CachedModel(model, TranslationCache.from_config(config))
+
+
+@st.cache_resource
+def get_parse_cache() -> ParseCache:
+    """进程内所有会话共用的PDF解析缓存"""
+    return ParseCache.from_config(config, PDFParser.VERSION)
+
+
+@st.cache_resource
+def get_memory() -> TranslationMemory:
+    """进程内所有会话共用的翻译记忆"""
+    return TranslationMemory.from_config(config)
+
+
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """进程内所有会话共用的后台任务执行器，界面刷新不会中断或重复执行任务"""
+    return JobRunner(config.max_jobs)
+
+
+def render_content(content: Content) -> None:
+    """显示单个内容的翻译结果"""
+    if content.status:
+        if content.content_type == ContentType.TEXT:
+            text: str = content.translation
+            for frag in text.split("\n"):
+                st.write(frag)
+        elif content.content_type == ContentType.TABLE:
+            table: TableData = content.translation
+            st.dataframe(table.to_dataframe(), hide_index=True)
+
+
+def track_page_contents(job: TranslationJob, pages: Iterable[Page]) -> Iterator[Page]:
+    """页面进入翻译窗口时登记其内容数，用于显示页面内的翻译进度"""
+    for page_idx, page in enumerate(pages):
+        job.page_progress[page_idx] = (0, len(page.contents))
+        yield page
+
+
+def translate_job(
+    job: TranslationJob,
+    pdf_data: bytes,
+    engine: TranslationEngine,
+    parse_cache: ParseCache,
+    source_language: str,
+    target_language: str,
+    model_name: str,
+    stream_output: bool,
+    spill_pages: bool,
+) -> None:
+    """在后台线程中解析并翻译 PDF 文件，通过任务状态对象报告进度"""
+    upload_file_path: Path = Path("data/upload") / job.job_id / Path(job.name).name
+    output_dir: Path = STATIC_DIR / "output" / job.job_id
+    job.work_dirs.extend([upload_file_path.parent, output_dir])
+    upload_file_path.parent.mkdir(parents=True, exist_ok=True)
+    upload_file_path.write_bytes(pdf_data)
+    job.total_pages = PDFParser.count_pages(str(upload_file_path))
+    book: Book = Book(upload_file_path, PageStore() if spill_pages else None)
+    job.book = book
+
+    # 逐页解析、识别页眉页脚和切分后立即翻译，首页不必等待整本书解析完成
+    pages: Iterator[Page] = PDFParser.stream_pdf(str(upload_file_path), cache=parse_cache)
+    pages = BoilerplateDetector().process_pages(pages)
+    pages = Segmenter().segment_pages(pages)
+    if stream_output:
+        # 窗口内各页的内容并发流式翻译，界面定时读取已收到的文本
+        for update in engine.stream_pages(
+            track_page_contents(job, pages), source_language, target_language, model_name, PAGE_WINDOW
+        ):
+            if update.page is not None:
+                book.add_page(update.page)
+                job.finished_pages = update.page_idx + 1
+                job.partial = {slot: text for slot, text in job.partial.items() if slot[0] != update.page_idx}
+                job.page_progress.pop(update.page_idx, None)
+            elif update.delta is not None:
+                slot: tuple[int, int] = (update.page_idx, update.content_idx)
+                job.partial[slot] = job.partial.get(slot, "") + update.delta
+            else:
+                finished: int
+                contents: int
+                finished, contents = job.page_progress[update.page_idx]
+                job.page_progress[update.page_idx] = (finished + 1, contents)
+    else:
+        # 通过并发翻译引擎按页面窗口翻译 PDF 文件，每完成一页即可显示
+        for page in engine.translate_pages(pages, source_language, target_language, model_name, PAGE_WINDOW):
+            book.add_page(page)
+            job.finished_pages = len(book.pages)
+
+    # 两种格式在一次遍历中写出，每个任务只生成一次，界面刷新时直接复用
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path: Path
+    markdown_path: Path
+    pdf_path, markdown_path = Writer.save_translated_book_formats(
+        book,
+        [output_dir / f"{upload_file_path.stem}_translated.pdf", output_dir / f"{upload_file_path.stem}_translated.md"],
+    )
+    job.outputs["pdf"] = pdf_path
+    job.outputs["md"] = markdown_path
+    # 缓存和性能统计只包含本任务，不受同时运行的其他任务影响
+    report: dict[str, Any] = job.metrics.report()
+    counters: dict[str, float] = report["counters"]
+    job.info["cache"] = str(CacheStats(int(counters.get("cache_hits", 0)), int(counters.get("cache_misses", 0))))
+    job.info["metrics"] = report
+    if model_name == ModelRouter.AUTO:
+        job.info["router"] = engine.router.report()
+
+
+def render_job(job_id: str, polling: bool) -> None:
+    """显示任务进度和已完成页面的翻译结果，任务运行期间定时刷新"""
+    job: Optional[TranslationJob] = get_job_runner().get(job_id)
+    if job is None:
+        return
+    if polling and not job.running:
+        # 任务结束后刷新整个页面，停止定时刷新
+        st.rerun()
+
+    st.subheader("翻译结果:")
+    if job.book is None:
+        if job.running:
+            st.info("解析中...")
+        else:
+            st.error(f"翻译失败: {job.error}")
+        return
+
+    book: Book = job.book
+    finished_pages: int = job.finished_pages
+    streaming: dict[tuple[int, int], str] = dict(job.partial)
+    progress_text: str = f"已完成 {finished_pages}/{job.total_pages} 页" if finished_pages else "翻译中..."
+    st.progress(finished_pages / max(job.total_pages, 1), text=progress_text)
+    page_progress: Optional[tuple[int, int]] = job.page_progress.get(finished_pages)
+    if job.running and page_progress is not None and page_progress[1]:
+        page_finished, page_contents = page_progress
+        st.progress(page_finished / page_contents, text=f"第 {finished_pages + 1} 页: 已完成 {page_finished}/{page_contents} 段")
+
+    with st.container(border=True):
+        for page_idx in range(finished_pages):
+            page: Page = book.pages[page_idx]
+            for content in page.contents:
+                render_content(content)
+            if page_idx < job.total_pages - 1:
+                st.divider()
+        # 正在翻译的页面只显示已收到的文本
+        for (page_idx, _), text in sorted(streaming.items()):
+            if page_idx >= finished_pages:
+                st.markdown(text.replace("\n", "\n\n"))
+
+    if job.status == "failed":
+        st.error(f"翻译失败: {job.error}")
+    if job.status != "done":
+        return
+    st.caption(f"翻译缓存统计: {job.info['cache']}")
+    with st.expander("性能统计"):
+        st.json(job.info["metrics"])
+        if "router" in job.info:
+            st.json(job.info["router"])
+
+    get_file_downloader_html(job.outputs["pdf"], "下载为PDF文件")
+    get_file_downloader_html(job.outputs["md"], "下载为md文件")
+
+
 init_logger("ai_translator.log", rotation="02:00")
 
 config: Config = Config()
 supported_llm_versions: list[str] = [
     "GLM-3-Turbo",
     "GLM-4",
+    ModelRouter.AUTO,
 ]
 
 # 设置页面标题和描述
@@ -46,8 +227,13 @@ st.title("PDF 翻译工具")
 st.write("上传 PDF 文件并选择目标语言进行翻译")
 
 # 选择目标语言
-llm_model_version: str = st.selectbox("选择使用模型版本", supported_llm_versions)
-model: GLMModel = GLMModel(config.api_key)
+llm_model_version: str = st.selectbox(
+    "选择使用模型版本",
+    supported_llm_versions,
+    format_func=lambda version: "自动路由（简单内容使用快速模型）" if version == ModelRouter.AUTO else version,
+)
+runner: JobRunner = get_job_runner()
+current_job: Optional[TranslationJob] = runner.get(st.session_state.get("job_id"))
 
 # 上传文件
 uploaded_file: UploadedFile = st.file_uploader("上传 PDF 文件", type=["pdf"])
@@ -60,50 +246,46 @@ target_language: str = st.selectbox(
     "选择目标语言", ["汉语", "法语", "德语", "西班牙语", "日语", "韩语", "粤语", "英语"]
 )
 
+# 选择并发请求数量
+max_workers: int = st.slider("并发请求数量", min_value=1, max_value=MAX_WORKERS, value=4)
+
+# 短文本打包翻译的token预算
+pack_token_budget: int = st.number_input("打包翻译token预算（0为不打包）", min_value=0, max_value=8192, value=1024, step=256)
+
+# 流式显示时每页内各段并发流式翻译（不打包），关闭后使用打包的并发翻译，按页显示
+stream_output: bool = st.checkbox("逐段流式显示翻译结果", value=True)
+
+# 大文件可以将页面暂存到磁盘，内存中只保留正在翻译和显示的页面
+spill_pages: bool = st.checkbox("低内存模式（页面暂存到磁盘）", value=False)
+
 
 if uploaded_file is not None:
     # 显示上传的文件名
     st.write("已上传文件:", uploaded_file.name)
 
-    if st.button("开始翻译"):
+    # 翻译在后台线程中执行，同一会话的任务完成前不能再次提交
+    if st.button("开始翻译", disabled=current_job is not None and current_job.running):
         if source_language == target_language:
             st.error("源语言与目标语言不得相同")
             st.stop()
-        with st.spinner(text="翻译中..."):
-            with open(f"data/upload/{uploaded_file.name}", "wb+") as temp_pdf_file:
-                temp_pdf_file.write(uploaded_file.read())
-                book: Book = PDFParser.parse_pdf(temp_pdf_file.name)
-
-            # 通过调用翻译函数翻译 PDF 文件
-            for page_idx, page in enumerate(book.pages):
-                for content_idx, content in enumerate(page.contents):
-                    logger.debug(content.content_type)
-                    prompt: str = model.translate_prompt(content, source_language, target_language)
-                    logger.debug(prompt)
-                    translation: str
-                    status: bool
-                    translation, status = model.make_request(prompt, llm_model_version)
-                    logger.info(translation)
-                    book.pages[page_idx].contents[content_idx].set_translation(translation, status)
-
-        # 显示翻译结果
-        st.subheader("翻译结果:")
-
-        with st.container(border=True):
-            for page in book.pages:
-                for content in page.contents:
-                    if content.status:
-                        if content.content_type == ContentType.TEXT:
-                            text: str = content.translation
-                            for frag in text.split("\n"):
-                                st.write(frag)
-                        elif content.content_type == ContentType.TABLE:
-                            table: DataFrame = content.translation
-                            st.dataframe(table, hide_index=True)
-                if page != book.pages[-1]:
-                    st.divider()
-
-        download_file_path: Path = Writer.save_translated_book_pdf(book)
-        get_file_downloader_html(download_file_path, "下载为PDF文件")
-        download_file_path: Path = Writer.save_translated_book_markdown(book)
-        get_file_downloader_html(download_file_path, "下载为md文件")
+        engine: TranslationEngine = TranslationEngine(
+            get_model(), max_workers, pack_token_budget, get_memory(), ModelRouter.from_config(config)
+        )
+        current_job = runner.submit(
+            uploaded_file.name,
+            partial(
+                translate_job,
+                pdf_data=uploaded_file.getvalue(),
+                engine=engine,
+                parse_cache=get_parse_cache(),
+                source_language=source_language,
+                target_language=target_language,
+                model_name=llm_model_version,
+                stream_output=stream_output,
+                spill_pages=spill_pages,
+            ),
+        )
+        st.session_state["job_id"] = current_job.job_id
+
+if current_job is not None:
+    st.fragment(render_job, run_every=1.0 if current_job.running else None)(current_job.job_id, current_job.running)
@@ -0,0 +1,38 @@
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from ai_translator.llm.fake_client import FakeZhipuAIClient
+from ai_translator.llm.glm_model import GLMModel
+from ai_translator.translator.pdf_translator import PDFTranslator
+from benchmarks.pdf_generator import make_dense_table_pdf, make_text_heavy_pdf
+
+
+def make_translator() -> PDFTranslator:
+    return PDFTranslator(GLMModel("test", client=FakeZhipuAIClient()), max_workers=4, pack_token_budget=1024)
+
+
+@pytest.mark.parametrize("make_pdf", [make_text_heavy_pdf, make_dense_table_pdf])
+def test_batch_round_trip_matches_live_run(tmp_path: Path, make_pdf: Callable[..., None]) -> None:
+    """导出批量请求、生成带错误的结果并写回，再通过`resume`在线补齐，输出与直接在线翻译一致。"""
+    pdf_file_path: str = str(tmp_path / "book.pdf")
+    make_pdf(Path(pdf_file_path), pages=3)
+    live_path: Path = tmp_path / "live.md"
+    make_translator().translate_pdf(pdf_file_path, output_file_path=str(live_path))
+
+    requests_path: Path = tmp_path / "requests.jsonl"
+    results_path: Path = tmp_path / "results.jsonl"
+    count: int = make_translator().export_batch(pdf_file_path, str(requests_path))
+    assert count > 0
+    client: FakeZhipuAIClient = FakeZhipuAIClient(error_rate=0.3, seed=1)
+    assert client.fabricate_batch_results(requests_path, results_path) == count
+    assert client.errors > 0
+
+    output_path: Path = tmp_path / "batch.md"
+    make_translator().translate_pdf_from_batch(pdf_file_path, str(results_path), output_file_path=str(output_path))
+    assert output_path.read_text(encoding="utf-8") != live_path.read_text(encoding="utf-8")
+
+    make_translator().translate_pdf(pdf_file_path, output_file_path=str(output_path), resume=True)
+    assert output_path.read_text(encoding="utf-8") == live_path.read_text(encoding="utf-8")
+    assert PDFTranslator.snapshot_path(output_path).exists()
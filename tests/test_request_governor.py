@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_translator.llm.fake_client import FakeZhipuAIClient
+from ai_translator.llm.glm_model import GLMModel
+from ai_translator.llm.request_governor import RequestGovernor, TokenBucket
+from config import Config
+
+
+def test_token_bucket_limits_rate() -> None:
+    """令牌用完后按补充速率放行，11个请求中突发1个，其余10个需要等待约0.2秒。"""
+    bucket: TokenBucket = TokenBucket(rate=50, capacity=1)
+    start: float = time.monotonic()
+    waited: float = sum(bucket.acquire() for _ in range(11))
+    elapsed: float = time.monotonic() - start
+    assert elapsed >= 0.18
+    assert waited >= 0.18
+
+
+def test_governor_limits_request_rate() -> None:
+    """调度器按每秒请求数限流，突发1秒的额度后，模拟客户端收到的请求不超过令牌桶的速率。"""
+    client: FakeZhipuAIClient = FakeZhipuAIClient()
+    model: GLMModel = GLMModel("test", governor=RequestGovernor(requests_per_second=50), client=client)
+    start: float = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results: list[tuple[str, bool]] = list(
+            executor.map(lambda idx: model.make_request(f"```text {idx}```", "GLM-4"), range(60))
+        )
+    assert all(status for _, status in results)
+    assert client.requests == 60
+    # 前50个请求使用突发额度，其余10个按每秒50个放行
+    assert time.monotonic() - start >= 0.18
+    assert model.governor.stats.wait_seconds > 0
+
+
+def test_governor_starts_at_worker_count() -> None:
+    """按翻译线程数创建的调度器一开始就允许全部线程同时请求，并发上限不超过配置的最大值。"""
+    config: Config = Config(api_key="test", max_concurrency=32)
+    governor: RequestGovernor = RequestGovernor.from_config(config, workers=16)
+    assert governor.limiter.limit == 16
+    assert governor.limiter.max_limit == 16
+    assert RequestGovernor.from_config(config, workers=64).limiter.limit == 32
+
+
+def test_governor_backs_off_on_throttle() -> None:
+    """服务端返回429时乘性减小并发上限并退避重试，最终全部请求成功。"""
+    client: FakeZhipuAIClient = FakeZhipuAIClient(latency=0.02, max_concurrency=2)
+    governor: RequestGovernor = RequestGovernor(base_delay=0.01, max_delay=0.05, initial_concurrency=8, max_retries=20)
+    model: GLMModel = GLMModel("test", governor=governor, client=client)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results: list[tuple[str, bool]] = list(
+            executor.map(lambda idx: model.make_request(f"```text {idx}```", "GLM-4"), range(16))
+        )
+
+    assert all(status for _, status in results)
+    assert client.throttled > 0
+    assert governor.stats.throttled == client.throttled
+    assert governor.stats.retries == client.throttled
+    assert governor.stats.failures == 0
+    # 冷却时间内只减小一次
+    assert governor.limiter.limit <= 4
+
+
+def test_governor_gives_up_after_max_retries() -> None:
+    """持续被限流时重试到上限后抛出异常。"""
+    client: FakeZhipuAIClient = FakeZhipuAIClient(throttle_rate=1.0)
+    governor: RequestGovernor = RequestGovernor(base_delay=0.001, max_retries=2)
+    model: GLMModel = GLMModel("test", governor=governor, client=client)
+    with pytest.raises(Exception) as exc_info:
+        model.make_request("```text```", "GLM-4")
+    assert GLMModel.is_throttle_error(exc_info.value.__cause__)
+    assert client.requests == 3
+    assert governor.stats.failures == 1